@@ -1,58 +1,98 @@
 # analytics/analytics_endpoints.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from db.base import get_db
-from db.models import User
+from db.base import get_async_db
+from db.models import Platform, Post, User
+from db.types import array_condition
+from core.config import settings
+from services.cache import read_through
+from services.leaderboards import leaderboard_key, trending_leaderboards
 from auth_unified.auth_endpoints import get_current_user
 from .schemas import TrendingPostResponse, HashtagStatsResponse
 
 analytics_router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
+async def _trending_from_db(
+    db: AsyncSession,
+    platform: Optional[str],
+    hashtag: Optional[str],
+    language: Optional[str],
+    limit: int
+) -> List[Post]:
+    """Top tendance en base (classements Redis pas encore construits ou incomplets).
+
+    Plateforme et langue insensibles à la casse, comme les clés des classements.
+    """
+    stmt = select(Post).where(Post.score_trend > 0)
+    if platform:
+        stmt = stmt.join(Platform).where(func.lower(Platform.name) == platform.strip().lower())
+    if language:
+        stmt = stmt.where(func.lower(Post.language) == language.strip().lower())
+    if hashtag:
+        dialect = db.get_bind().dialect.name
+        stmt = stmt.where(array_condition(dialect, Post.hashtags, [hashtag.lstrip("#")]))
+    stmt = stmt.order_by(Post.score_trend.desc(), Post.id.desc()).limit(limit)
+    return list((await db.scalars(stmt)).all())
+
+async def _posts_by_id(db: AsyncSession, post_ids: List[str]) -> List[Post]:
+    posts = {post.id: post for post in (await db.scalars(select(Post).where(Post.id.in_(post_ids)))).all()}
+    return [posts[pid] for pid in post_ids if pid in posts]
+
 @analytics_router.get("/trending", response_model=List[TrendingPostResponse])
-def get_trending_posts(
+@read_through("analytics:trending", settings.ANALYTICS_CACHE_TTL, key_params=("platform", "hashtag", "language", "limit"))
+async def get_trending_posts(
     platform: Optional[str] = Query(None),
+    hashtag: Optional[str] = Query(None),
+    language: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts les plus tendance"""
-    if platform:
-        # Utiliser la fonction PostgreSQL
-        result = db.execute(f"SELECT * FROM get_trending_posts('{platform}', {limit})")
+    """Récupérer les posts les plus tendance (classement Redis : global, plateforme, hashtag ou langue)"""
+    dimensions = {'platform': platform, 'hashtag': hashtag, 'language': language}
+    selected = [(dimension, value) for dimension, value in dimensions.items() if value]
+    if len(selected) > 1:
+        raise HTTPException(status_code=400, detail="Un seul filtre parmi platform, hashtag, language")
+    
+    key = leaderboard_key(*selected[0]) if selected else leaderboard_key()
+    entries = await trending_leaderboards.top(key, limit)
+    if entries is not None:
+        posts = await _posts_by_id(db, [post_id for post_id, _ in entries[:limit]])
     else:
-        result = db.execute(f"SELECT * FROM get_trending_posts(NULL, {limit})")
+        posts = await _trending_from_db(db, platform, hashtag, language, limit)
     
-    posts = result.fetchall()
     return [
         TrendingPostResponse(
-            post_id=post[0],
-            author=post[1],
-            caption=post[2],
-            score=post[3],
-            score_trend=post[4],
-            posted_at=post[5]
+            post_id=post.id,
+            author=post.author,
+            caption=post.caption,
+            score=post.score,
+            score_trend=post.score_trend,
+            posted_at=post.posted_at
         ) for post in posts
     ]
 
 @analytics_router.get("/hashtags/stats", response_model=List[HashtagStatsResponse])
-def get_hashtags_stats(
+@read_through("analytics:hashtags_stats", settings.ANALYTICS_CACHE_TTL, key_params=("platform", "limit"))
+async def get_hashtags_stats(
     platform: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer les statistiques des hashtags"""
     query = "SELECT * FROM hashtags_with_stats"
-    params = []
+    params = {'limit': limit}
     
     if platform:
-        query += " WHERE platform = %s"
-        params.append(platform)
+        query += " WHERE platform = :platform"
+        params['platform'] = platform
     
-    query += f" ORDER BY total_posts DESC LIMIT {limit}"
+    query += " ORDER BY total_posts DESC LIMIT :limit"
     
-    result = db.execute(query, params)
+    result = await db.execute(text(query), params)
     hashtags = result.fetchall()
     
     return [
@@ -68,10 +108,11 @@ def get_hashtags_stats(
     ]
 
 @analytics_router.get("/posts/engagement")
-def get_engagement_stats(
+@read_through("analytics:engagement", settings.ANALYTICS_CACHE_TTL, key_params=("platform", "days"))
+async def get_engagement_stats(
     platform: Optional[str] = Query(None),
     days: int = Query(7, ge=1, le=30),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer les statistiques d'engagement des posts"""
@@ -84,16 +125,16 @@ def get_engagement_stats(
             MAX(score_trend) as max_trend_score
         FROM posts p
         JOIN platforms pl ON p.platform_id = pl.id
-        WHERE p.posted_at > NOW() - INTERVAL '%s days'
+        WHERE p.posted_at > NOW() - make_interval(days => :days)
     """
     
-    params = [days]
+    params = {'days': days}
     
     if platform:
-        query += " AND pl.name = %s"
-        params.append(platform)
+        query += " AND pl.name = :platform"
+        params['platform'] = platform
     
-    result = db.execute(query, params)
+    result = await db.execute(text(query), params)
     stats = result.fetchone()
     
     return {
@@ -1,6 +1,7 @@
 # app.py - REFACTORISÉ - SABOTAGE ÉLIMINÉ - SÉCURISÉ - REDIS INTÉGRÉ !
 from fastapi import FastAPI  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
+import asyncio
 import time
 import logging
 
@@ -102,7 +103,7 @@ app.add_middleware(
         "X-Forwarded-Proto",  # Pour Railway/proxy
         "X-Forwarded-For",    # Pour Railway/proxy
     ],
-    expose_headers=["X-Total-Count"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
     max_age=3600,  # Cache preflight requests
 )
 
@@ -149,6 +150,7 @@ def healthz():
 def test_meilisearch():
     """Test de connexion Meilisearch"""
     from services.meilisearch_client import meilisearch_service
+    from services.meilisearch_async import async_meilisearch_service
     
     if not meilisearch_service.client:
         return {
@@ -163,7 +165,8 @@ def test_meilisearch():
             "status": "ok",
             "message": "Meilisearch connecté avec succès",
             "stats": stats,
-            "index_name": meilisearch_service.index_name
+            "index_name": meilisearch_service.index_name,
+            "breaker": async_meilisearch_service.breaker.snapshot()
         }
     except Exception as e:
         return {
@@ -404,11 +407,57 @@ async def startup_event():
     try:
         from db.base import Base, engine
         # Importer tous les modèles pour qu'ils soient enregistrés dans Base.metadata
-        from db.models import User, OAuthAccount, Platform, Hashtag, Post, PostHashtag, Subscription, Project, ProjectHashtag, ProjectCreator
+        from db.models import User, OAuthAccount, Platform, Hashtag, Post, PostHashtag, PostMetricSnapshot, SearchOutbox, Subscription, Project, ProjectHashtag, ProjectCreator
         Base.metadata.create_all(bind=engine)
         logger.info("✅ Tables de base de données créées/vérifiées")
+        # Table FTS5 sur SQLite (hors metadata) ; sur PostgreSQL, migration add_posts_search_vector seulement
+        from db.fulltext import ensure_fulltext_schema
+        try:
+            ensure_fulltext_schema(engine)
+        except Exception as e:
+            logger.warning(f"⚠️ Schéma plein texte non créé: {e} - fallback ILIKE")
     except Exception as e:
         logger.error(f"❌ Erreur création tables: {e}")
         import traceback
         traceback.print_exc()
         raise  # Propager l'erreur pour arrêter le démarrage si problème
+
+    # Appliquer la configuration Meilisearch si son hash a changé (jamais sur le chemin d'écriture)
+    try:
+        from services.meilisearch_settings import meilisearch_settings_manager
+        await meilisearch_settings_manager.migrate()
+    except Exception as e:
+        logger.warning(f"⚠️ Configuration Meilisearch non appliquée: {e}")
+    
+    # Drainer de l'outbox posts -> Meilisearch, classements tendance et similarité (même sans Meilisearch)
+    from jobs.search_outbox_drainer import search_outbox_drainer
+    search_outbox_drainer.start()
+    
+    # Historique des métriques : partitions des prochains jours + rétention (au démarrage puis toutes les heures)
+    from services.metric_snapshots import metric_snapshot_maintenance
+    metric_snapshot_maintenance.start()
+    
+    # Index de secours en mémoire, chargé puis suivi en tâche de fond (base tant qu'il n'est pas à jour)
+    from services.fallback_index import fallback_post_index
+    fallback_post_index.start()
+    
+    # Index de similarité : ouverture du memmap, construit en tâche de fond s'il n'existe pas
+    from services.similarity_index import similar_posts_index, rebuild_similar_posts_index
+    if not await asyncio.to_thread(similar_posts_index.load):
+        app.state.similar_index_build = asyncio.create_task(asyncio.to_thread(rebuild_similar_posts_index))
+    
+    # Classements tendance Redis : reconstruits depuis la base s'ils n'existent pas (PostgreSQL en attendant)
+    from services.leaderboards import ensure_trending_leaderboards
+    app.state.trending_leaderboards_build = asyncio.create_task(ensure_trending_leaderboards())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrêt de l'application - Fermeture des pools de connexions"""
+    from jobs.search_outbox_drainer import search_outbox_drainer
+    from services.meilisearch_async import async_meilisearch_service
+    from services.metric_snapshots import metric_snapshot_maintenance
+    from services.fallback_index import fallback_post_index
+    await search_outbox_drainer.stop()
+    await metric_snapshot_maintenance.stop()
+    await fallback_post_index.stop()
+    await async_meilisearch_service.close()
@@ -1,8 +1,10 @@
 # auth/auth_endpoints.py
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from db.base import get_db
+from db.base import get_async_db, get_db
 from db.models import User
 from .schemas import UserCreate, UserResponse, TokenResponse, LoginRequest
 from .auth_service import AuthService
@@ -17,7 +19,7 @@ def options_handler():
     """Gérer les requêtes preflight OPTIONS"""
     return Response(status_code=200)
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> User:
     """Obtenir l'utilisateur actuel depuis le token JWT"""
     from jose import JWTError, jwt
     from core.config import settings
@@ -42,7 +44,7 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     except JWTError:
         raise HTTPException(status_code=401, detail="Token invalide")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(status_code=401, detail="Utilisateur introuvable")
     return user
@@ -72,6 +74,6 @@ def login(user_in: LoginRequest, db: Session = Depends(get_db)):
         raise
 
 @auth_router.get("/me", response_model=UserResponse)
-def get_me(request: Request, db: Session = Depends(get_db)):
+async def get_me(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Profil utilisateur"""
-    return get_current_user(request, db)
+    return await get_current_user(request, db)
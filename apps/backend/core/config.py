@@ -56,6 +56,50 @@ class Settings:
         self.MEILI_HOST: str = os.getenv("MEILI_HOST", "http://localhost:7700")
         self.MEILI_INDEX: str = os.getenv("MEILI_INDEX", "posts")
         self.MEILI_MASTER_KEY: Optional[str] = os.getenv("MEILI_MASTER_KEY")
+        # Client asyncio : timeouts (secondes) et limites du pool keep-alive
+        self.MEILI_TIMEOUT: float = float(os.getenv("MEILI_TIMEOUT", "5.0"))
+        self.MEILI_CONNECT_TIMEOUT: float = float(os.getenv("MEILI_CONNECT_TIMEOUT", "2.0"))
+        self.MEILI_MAX_CONNECTIONS: int = int(os.getenv("MEILI_MAX_CONNECTIONS", "50"))
+        self.MEILI_MAX_KEEPALIVE: int = int(os.getenv("MEILI_MAX_KEEPALIVE", "20"))
+        self.MEILI_KEEPALIVE_EXPIRY: float = float(os.getenv("MEILI_KEEPALIVE_EXPIRY", "30.0"))
+        # Disjoncteur : échecs consécutifs avant ouverture, délai avant sonde (s), SLO de latence des recherches (s)
+        self.MEILI_BREAKER_FAILURES: int = int(os.getenv("MEILI_BREAKER_FAILURES", "5"))
+        self.MEILI_BREAKER_RESET: float = float(os.getenv("MEILI_BREAKER_RESET", "30.0"))
+        self.MEILI_LATENCY_SLO: float = float(os.getenv("MEILI_LATENCY_SLO", "0.5"))
+        # Hedging : recherche de secours lancée en parallèle après le p95 observé (délai minimum en s)
+        self.MEILI_HEDGE_ENABLED: bool = os.getenv("MEILI_HEDGE_ENABLED", "true").lower() == "true"
+        self.MEILI_HEDGE_MIN_DELAY: float = float(os.getenv("MEILI_HEDGE_MIN_DELAY", "0.05"))
+        # Indexation en masse : taille des chunks (docs / octets), chunks en vol, retries
+        self.MEILI_INDEX_CHUNK_DOCS: int = int(os.getenv("MEILI_INDEX_CHUNK_DOCS", "1000"))
+        self.MEILI_INDEX_CHUNK_BYTES: int = int(os.getenv("MEILI_INDEX_CHUNK_BYTES", str(5 * 1024 * 1024)))
+        self.MEILI_INDEX_CONCURRENCY: int = int(os.getenv("MEILI_INDEX_CONCURRENCY", "4"))
+        self.MEILI_INDEX_MAX_RETRIES: int = int(os.getenv("MEILI_INDEX_MAX_RETRIES", "3"))
+        self.MEILI_TASK_TIMEOUT: float = float(os.getenv("MEILI_TASK_TIMEOUT", "120.0"))
+        # Cache des résultats de recherche (secondes)
+        self.SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", "60"))
+        # Nombre maximum de requêtes par appel /api/v1/posts/search/batch
+        self.SEARCH_BATCH_MAX_QUERIES: int = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "20"))
+        # Cache read-through des endpoints analytics (s) ; servi périmé autant de temps pendant le recalcul
+        self.ANALYTICS_CACHE_TTL: int = int(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+        # Index inversé en mémoire (recherche de secours) : nombre de posts récents gardés, 0 = désactivé
+        self.FALLBACK_INDEX_MAX_POSTS: int = int(os.getenv("FALLBACK_INDEX_MAX_POSTS", "50000"))
+        # Retard max de l'index de secours sur la base (s) : au-delà, la recherche dégradée passe par la base
+        self.FALLBACK_INDEX_MAX_STALENESS: float = float(os.getenv("FALLBACK_INDEX_MAX_STALENESS", "30"))
+        # Index "posts similaires" : répertoire des fichiers memmap, dimension du hachage TF-IDF
+        self.SIMILAR_INDEX_DIR: str = os.getenv("SIMILAR_INDEX_DIR", "data/similar_index")
+        self.SIMILAR_INDEX_DIM: int = int(os.getenv("SIMILAR_INDEX_DIM", "512"))
+        # Classements tendance Redis (global / plateforme / hashtag / langue) : posts gardés par classement
+        self.TRENDING_LEADERBOARD_SIZE: int = int(os.getenv("TRENDING_LEADERBOARD_SIZE", "1000"))
+        # Outbox de synchronisation posts -> Meilisearch : intervalle de drain (s) et taille de lot
+        self.SEARCH_OUTBOX_INTERVAL: float = float(os.getenv("SEARCH_OUTBOX_INTERVAL", "1.0"))
+        self.SEARCH_OUTBOX_BATCH: int = int(os.getenv("SEARCH_OUTBOX_BATCH", "500"))
+        # Entrées traitées gardées (h) pour le rattrapage d'un reindex : doit couvrir la durée d'un reindex complet
+        self.SEARCH_OUTBOX_RETENTION_HOURS: int = int(os.getenv("SEARCH_OUTBOX_RETENTION_HOURS", "24"))
+        # Historique des métriques (post_metric_snapshots) : rétention (jours, 0 = illimitée),
+        # partitions quotidiennes créées d'avance (PostgreSQL), fenêtre des taux de croissance (h)
+        self.METRIC_SNAPSHOT_RETENTION_DAYS: int = int(os.getenv("METRIC_SNAPSHOT_RETENTION_DAYS", "90"))
+        self.METRIC_SNAPSHOT_PARTITIONS_AHEAD: int = int(os.getenv("METRIC_SNAPSHOT_PARTITIONS_AHEAD", "7"))
+        self.METRIC_GROWTH_WINDOW_HOURS: int = int(os.getenv("METRIC_GROWTH_WINDOW_HOURS", "24"))
         
         # Configuration Google OAuth - OBLIGATOIRE
         self.GOOGLE_CLIENT_ID: Optional[str] = os.getenv("GOOGLE_CLIENT_ID")
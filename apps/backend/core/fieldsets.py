@@ -0,0 +1,41 @@
+# core/fieldsets.py
+# Sparse fieldsets : paramètre fields=a,b,c -> colonnes sélectionnées et champs renvoyés
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException  # type: ignore
+
+FIELDS_DESCRIPTION = "Champs à renvoyer, séparés par des virgules (id toujours inclus)"
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    always: Sequence[str] = ('id',)
+) -> Optional[List[str]]:
+    """Champs demandés, dans l'ordre du schéma de réponse ; None = tous les champs.
+
+    400 si un champ n'existe pas dans le schéma.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Champs inconnus: {', '.join(sorted(unknown))} (disponibles: {', '.join(allowed)})"
+        )
+    requested.update(always)
+    return [field for field in allowed if field in requested]
+
+def select_columns(model: Any, fields: Sequence[str], extra: Sequence[str] = ()) -> List[Any]:
+    """Colonnes à sélectionner : les champs demandés d'abord (dans l'ordre), puis les
+    colonnes nécessaires au tri / à la pagination qui ne seront pas renvoyées"""
+    names = list(fields) + [name for name in extra if name not in fields]
+    return [getattr(model, name) for name in names]
+
+def pick_fields(data: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Restreint un dict déjà sérialisé aux champs demandés"""
+    if fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
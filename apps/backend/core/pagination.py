@@ -0,0 +1,109 @@
+# core/pagination.py
+# Pagination par curseur opaque : keyset (clé de tri, id) en base, offset pour la recherche
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response  # type: ignore
+from sqlalchemy import Select, tuple_  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+def encode_cursor(kind: str, **values: Any) -> str:
+    """Curseur opaque (base64 url-safe) pour un type de pagination donné"""
+    payload = {'k': kind, **{key: _encode_value(value) for key, value in values.items()}}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str, kind: str) -> Dict[str, Any]:
+    """Décode un curseur ; 400 s'il est invalide ou émis pour une autre liste"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    if not isinstance(payload, dict) or payload.pop('k', None) != kind:
+        raise HTTPException(status_code=400, detail="Curseur invalide pour cette liste")
+    return {key: _decode_value(value) for key, value in payload.items()}
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    """Expose le curseur de la page suivante dans l'en-tête X-Next-Cursor"""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column: Any,
+    id_column: Any,
+    kind: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List[Any], Optional[str]]:
+    """Page triée par (sort_column DESC NULLS LAST, id DESC) reprenant après le curseur.
+
+    Le filtre porte sur la dernière clé vue : une page profonde coûte autant que
+    la première (parcours d'index) et reste stable pendant les insertions.
+    La reprise est une comparaison de lignes (sort, id) < (v, id), condition d'index :
+    un OR avec "sort IS NULL" ne l'est pas et parcourait l'index depuis le début.
+    La zone NULL (fin de tri) est lue par une seconde requête quand la page n'est pas pleine.
+    offset n'est gardé que pour les anciens appels skip= sans curseur.
+    stmt est un select() déjà filtré, exécuté sur la session asynchrone.
+    """
+    async def fetch(page_stmt: Select, count: int, page_offset: int = 0) -> List[Any]:
+        result = await db.execute(
+            page_stmt.order_by(sort_column.desc().nulls_last(), id_column.desc())
+            .offset(page_offset)
+            .limit(count)
+        )
+        return list(result.all())
+
+    if not cursor:
+        rows = await fetch(stmt, limit + 1, offset)
+    else:
+        last = decode_cursor(cursor, kind)
+        if last.get('id') is None:
+            raise HTTPException(status_code=400, detail="Curseur invalide")
+        value, last_id = last.get('v'), last['id']
+        if value is None:
+            # Déjà dans la zone des valeurs NULL (en fin de tri)
+            rows = await fetch(stmt.where(sort_column.is_(None), id_column < last_id), limit + 1)
+        else:
+            rows = await fetch(stmt.where(tuple_(sort_column, id_column) < tuple_(value, last_id)), limit + 1)
+            if len(rows) <= limit:
+                rows += await fetch(stmt.where(sort_column.is_(None)), limit + 1 - len(rows))
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last_row = rows[-1]
+    next_cursor = encode_cursor(
+        kind,
+        v=getattr(last_row, sort_column.key),
+        id=getattr(last_row, id_column.key),
+    )
+    return rows, next_cursor
+
+def offset_cursor(kind: str, offset: int, fingerprint: str) -> str:
+    """Curseur opaque d'offset (recherche classée par pertinence, pas de clé de tri stable)"""
+    return encode_cursor(kind, o=offset, f=fingerprint)
+
+def decode_offset_cursor(token: str, kind: str, fingerprint: str) -> int:
+    values = decode_cursor(token, kind)
+    if values.get('f') != fingerprint or not isinstance(values.get('o'), int) or values['o'] < 0:
+        raise HTTPException(status_code=400, detail="Curseur invalide pour cette recherche")
+    return values['o']
@@ -1,7 +1,10 @@
 # db/base.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # PRODUCTION: Utiliser DATABASE_URL ou échouer
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -14,6 +17,35 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Moteur asynchrone des routers (asyncpg en production, aiosqlite en local)
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def _async_engine_args(url: str):
+    """URL asynchrone dérivée de DATABASE_URL (même base, driver asyncio) + connect_args"""
+    parsed = make_url(url)
+    backend = parsed.drivername.split('+')[0]
+    parsed = parsed.set(drivername=ASYNC_DRIVERS.get(backend, parsed.drivername))
+    connect_args = {}
+    options = {}
+    if backend in ('postgresql', 'postgres'):
+        # asyncpg ne comprend pas sslmode dans l'URL : passé en argument de connexion
+        sslmode = parsed.query.get('sslmode')
+        if sslmode:
+            parsed = parsed.difference_update_query(['sslmode'])
+            connect_args['ssl'] = sslmode
+        options['pool_size'] = int(os.getenv("DB_POOL_SIZE", "10"))
+        options['max_overflow'] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        options['pool_pre_ping'] = True
+    elif backend == 'sqlite' and parsed.database not in (None, '', ':memory:'):
+        # Fichier SQLite : connexions aiosqlite réutilisées (NullPool par défaut)
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return parsed, connect_args, options
+
+_async_url, _async_connect_args, _async_options = _async_engine_args(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL)
+async_engine = create_async_engine(_async_url, echo=False, connect_args=_async_connect_args, **_async_options)
+# expire_on_commit=False : les objets restent lisibles après commit (pas de lazy load implicite en async)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency pour FastAPI
@@ -24,3 +56,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency pour obtenir une session asynchrone (routers async def)"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,225 @@
+# db/fulltext.py
+# Recherche plein texte côté base : tsvector + GIN sur PostgreSQL, FTS5 sur SQLite (dev / tests)
+
+import logging
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import column, false, func, literal_column, select, table, text  # type: ignore
+from sqlalchemy.sql.elements import ColumnElement  # type: ignore
+from sqlalchemy.engine import Connection, Engine  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
+
+from db.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Configuration 'simple' : pas de stemming, les posts sont multilingues
+TS_CONFIG = 'simple'
+
+# --- PostgreSQL : colonne générée + index GIN ---
+# hashtags : Text (JSON) avant la migration posts_native_json_columns, TEXT[] après.
+# array_to_string n'est pas IMMUTABLE (interdit dans une colonne générée) : fonction
+# enveloppe déclarée IMMUTABLE, surchargée pour les deux types de colonne.
+PG_HASHTAGS_TEXT_FUNCTIONS = [
+    "CREATE OR REPLACE FUNCTION posts_hashtags_text(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT coalesce($1, '') $$",
+    "CREATE OR REPLACE FUNCTION posts_hashtags_text(text[]) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT coalesce(array_to_string($1, ' '), '') $$",
+]
+PG_SEARCH_VECTOR_EXPR = (
+    f"to_tsvector('{TS_CONFIG}', "
+    "coalesce(caption, '') || ' ' || coalesce(author, '') || ' ' || posts_hashtags_text(hashtags))"
+)
+PG_DDL = [
+    *PG_HASHTAGS_TEXT_FUNCTIONS,
+    f"ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({PG_SEARCH_VECTOR_EXPR}) STORED",
+]
+# Hors transaction (autocommit_block de la migration) : posts reste accessible en écriture
+PG_INDEX_DDL = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+PG_DROP_DDL = [
+    "DROP INDEX IF EXISTS ix_posts_search_vector",
+    "ALTER TABLE posts DROP COLUMN IF EXISTS search_vector",
+    "DROP FUNCTION IF EXISTS posts_hashtags_text(text)",
+    "DROP FUNCTION IF EXISTS posts_hashtags_text(text[])",
+]
+
+# --- SQLite : table FTS5 synchronisée par triggers ---
+# posts a une clé primaire TEXT : son rowid implicite peut changer au VACUUM et ne peut
+# pas servir de content_rowid. posts_fts_rowids attribue à chaque post un entier stable
+# (INTEGER PRIMARY KEY), rowid de sa ligne dans posts_fts, qui stocke son propre contenu.
+_SQLITE_FTS_ROWID = "(SELECT rowid FROM posts_fts_rowids WHERE post_id = {}.id)"
+SQLITE_DDL = [
+    "CREATE TABLE IF NOT EXISTS posts_fts_rowids ("
+    "rowid INTEGER PRIMARY KEY, post_id TEXT NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "caption, author, hashtags, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts_rowids(post_id) VALUES (new.id); "
+    "INSERT INTO posts_fts(rowid, caption, author, hashtags) "
+    f"VALUES ({_SQLITE_FTS_ROWID.format('new')}, new.caption, new.author, new.hashtags); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN "
+    f"DELETE FROM posts_fts WHERE rowid = {_SQLITE_FTS_ROWID.format('old')}; "
+    "DELETE FROM posts_fts_rowids WHERE post_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE ON posts BEGIN "
+    "UPDATE posts_fts_rowids SET post_id = new.id WHERE post_id = old.id; "
+    "UPDATE posts_fts SET caption = new.caption, author = new.author, hashtags = new.hashtags "
+    f"WHERE rowid = {_SQLITE_FTS_ROWID.format('new')}; END",
+]
+# Remplissage depuis les posts existants (table FTS créée après coup)
+SQLITE_POPULATE = [
+    "INSERT OR IGNORE INTO posts_fts_rowids(post_id) SELECT id FROM posts",
+    "INSERT INTO posts_fts(rowid, caption, author, hashtags) "
+    "SELECT r.rowid, p.caption, p.author, p.hashtags FROM posts p JOIN posts_fts_rowids r ON r.post_id = p.id",
+]
+SQLITE_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS posts_fts_au",
+    "DROP TRIGGER IF EXISTS posts_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_fts_ai",
+    "DROP TABLE IF EXISTS posts_fts",
+    "DROP TABLE IF EXISTS posts_fts_rowids",
+]
+# Correspondance FTS -> posts pour les requêtes
+_posts_fts = table('posts_fts', column('rowid'), column('posts_fts'))
+_posts_fts_rowids = table('posts_fts_rowids', column('rowid'), column('post_id'))
+
+def fulltext_ddl(dialect: str) -> List[str]:
+    """DDL de création du plein texte pour un dialecte ('postgresql' / 'sqlite')"""
+    return {'postgresql': PG_DDL, 'sqlite': SQLITE_DDL}.get(dialect, [])
+
+def fulltext_index_ddl(dialect: str) -> List[str]:
+    """Index à créer hors transaction (PostgreSQL : CONCURRENTLY ; SQLite : déjà dans fulltext_ddl)"""
+    return PG_INDEX_DDL if dialect == 'postgresql' else []
+
+def fulltext_drop_ddl(dialect: str) -> List[str]:
+    return {'postgresql': PG_DROP_DDL, 'sqlite': SQLITE_DROP_DDL}.get(dialect, [])
+
+def fulltext_populate_ddl(dialect: str) -> List[str]:
+    """Remplissage de l'index après création (SQLite : la colonne générée PostgreSQL se remplit seule)"""
+    return SQLITE_POPULATE if dialect == 'sqlite' else []
+
+def _sqlite_table_exists(conn: Connection, name: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': name}
+    ).first() is not None
+
+def ensure_fulltext_schema(engine: Engine) -> bool:
+    """Crée la table FTS5 et ses triggers s'ils manquent (SQLite, idempotent, au démarrage).
+
+    Une table FTS5 créée après coup est remplie avec les posts existants ; l'ancienne
+    table à contenu externe (content_rowid sur le rowid de posts) est recréée.
+    Sur PostgreSQL rien n'est fait : colonne générée et index GIN (CONCURRENTLY) viennent
+    de la migration add_posts_search_vector, pas du démarrage. Retourne False hors SQLite.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.begin() as conn:
+        populate = not _sqlite_table_exists(conn, 'posts_fts_rowids')
+        if populate:
+            for statement in SQLITE_DROP_DDL:
+                conn.execute(text(statement))
+        for statement in SQLITE_DDL:
+            conn.execute(text(statement))
+        if populate:
+            for statement in SQLITE_POPULATE:
+                conn.execute(text(statement))
+    return True
+
+_FTS5_TERM_RE = re.compile(r'(-?)"([^"]*)"|(-?)(\S+)')
+_FTS5_WORD_RE = re.compile(r'\w+')
+
+def websearch_to_fts5(query: str) -> Optional[str]:
+    """Traduit la syntaxe websearch_to_tsquery ("phrase", -exclu, OR) en requête FTS5 sûre.
+
+    Chaque terme est mis entre guillemets : aucun opérateur FTS5 ne passe depuis l'entrée.
+    """
+    positives: List[str] = []
+    negatives: List[str] = []
+    pending_or = False
+    for match in _FTS5_TERM_RE.finditer(query or ''):
+        negate = bool(match.group(1) or match.group(3))
+        raw = match.group(2) if match.group(2) is not None else match.group(4)
+        if not negate and raw.lower() == 'or' and match.group(4) is not None:
+            pending_or = bool(positives)
+            continue
+        words = _FTS5_WORD_RE.findall(raw)
+        if not words:
+            continue
+        term = '"' + ' '.join(words) + '"'
+        if negate:
+            negatives.append(term)
+        elif pending_or:
+            positives[-1] = f"({positives[-1]} OR {term})"
+            pending_or = False
+        else:
+            positives.append(term)
+    if not positives:
+        return None
+    expression = ' AND '.join(positives)
+    for term in negatives:
+        expression = f"{expression} NOT {term}"
+    return expression
+
+def fulltext_condition(dialect: str, q: str) -> Optional[ColumnElement]:
+    """Condition WHERE "posts correspond à q" (à combiner avec d'autres filtres ORM).
+
+    None si le dialecte n'a pas de plein texte : l'appelant se rabat sur ILIKE.
+    """
+    if dialect == 'postgresql':
+        return text(
+            f"posts.search_vector @@ websearch_to_tsquery('{TS_CONFIG}', :fts_q)"
+        ).bindparams(fts_q=q)
+    if dialect == 'sqlite':
+        match = websearch_to_fts5(q)
+        if match is None:
+            return false()
+        return text(
+            "posts.id IN (SELECT r.post_id FROM posts_fts JOIN posts_fts_rowids r "
+            "ON r.rowid = posts_fts.rowid WHERE posts_fts MATCH :fts_q)"
+        ).bindparams(fts_q=match)
+    return None
+
+async def fulltext_search(
+    db: AsyncSession,
+    q: str,
+    conditions: Sequence[ColumnElement] = (),
+    limit: int = 20,
+    offset: int = 0
+) -> List[Post]:
+    """Recherche plein texte classée (ts_rank sur PostgreSQL, bm25 sur SQLite).
+
+    conditions : filtres ORM sur Post (posts.export.post_filter_conditions), combinés en ET.
+    """
+    dialect = db.get_bind().dialect.name
+    stmt = select(Post.id)
+    if dialect == 'postgresql':
+        search_vector = literal_column('posts.search_vector')
+        query = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'"), q)
+        stmt = stmt.where(search_vector.op('@@')(query)).order_by(func.ts_rank(search_vector, query).desc())
+    elif dialect == 'sqlite':
+        match = websearch_to_fts5(q)
+        if match is None:
+            return []
+        stmt = (
+            stmt.join(_posts_fts_rowids, _posts_fts_rowids.c.post_id == Post.id)
+            .join(_posts_fts, _posts_fts.c.rowid == _posts_fts_rowids.c.rowid)
+            .where(_posts_fts.c.posts_fts.op('MATCH')(match))
+            .order_by(func.bm25(literal_column('posts_fts')))
+        )
+    else:
+        raise NotImplementedError(f"Plein texte non supporté sur {dialect}")
+    stmt = (
+        stmt.where(*conditions)
+        .order_by(Post.score_trend.desc(), Post.posted_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+    ids = list((await db.scalars(stmt)).all())
+    if not ids:
+        return []
+    posts = {post.id: post for post in (await db.scalars(select(Post).where(Post.id.in_(ids)))).all()}
+    return [posts[pid] for pid in ids if pid in posts]
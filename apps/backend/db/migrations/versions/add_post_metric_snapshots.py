@@ -0,0 +1,46 @@
+"""add post_metric_snapshots time series (daily partitions on PostgreSQL)
+
+Revision ID: add_post_metric_snapshots
+Revises: posts_native_json_columns
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.partitions import snapshot_partition_ddl
+
+# revision identifiers, used by Alembic.
+revision = 'add_post_metric_snapshots'
+down_revision = 'posts_native_json_columns'
+branch_labels = None
+depends_on = None
+
+# Partitions créées d'avance ; la boucle de maintenance (services.metric_snapshots) prend le relais
+INITIAL_PARTITION_DAYS = 7
+
+
+def upgrade() -> None:
+    # Append-only : un relevé par post et par synchronisation, pas de FK vers posts
+    op.create_table(
+        'post_metric_snapshots',
+        sa.Column('post_id', sa.Text(), nullable=False),
+        sa.Column('captured_at', sa.DateTime(), nullable=False),
+        sa.Column('likes', sa.BigInteger(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False),
+        sa.Column('shares', sa.Integer(), nullable=False),
+        sa.Column('views', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('post_id', 'captured_at', name='pk_post_metric_snapshots'),
+        postgresql_partition_by='RANGE (captured_at)',
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        today = datetime.utcnow().date()
+        for offset in range(INITIAL_PARTITION_DAYS + 1):
+            op.execute(snapshot_partition_ddl(today + timedelta(days=offset)))
+
+
+def downgrade() -> None:
+    # Les partitions sont supprimées avec la table parente
+    op.drop_table('post_metric_snapshots')
@@ -0,0 +1,53 @@
+"""add composite / partial indexes for post listings (CONCURRENTLY)
+
+Revision ID: add_posts_listing_indexes
+Revises: add_posts_search_vector
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_posts_listing_indexes'
+down_revision = 'add_posts_search_vector'
+branch_labels = None
+depends_on = None
+
+# (nom, colonnes, condition partielle) : mêmes formes que les requêtes de posts_endpoints
+INDEXES = [
+    # GET /posts : ORDER BY posted_at DESC NULLS LAST, id DESC
+    ('ix_posts_recent', ['posted_at DESC NULLS LAST', 'id DESC'], None),
+    # GET /posts?platform= : filtre plateforme + même tri
+    ('ix_posts_platform_recent', ['platform_id', 'posted_at DESC NULLS LAST', 'id DESC'], None),
+    # GET /posts?trending=true, /trending/global : score_trend > 0 ORDER BY score_trend DESC NULLS LAST, id DESC
+    ('ix_posts_trending', ['score_trend DESC NULLS LAST', 'id DESC'], 'score_trend > 0'),
+    # /trending/{platform_name}
+    ('ix_posts_platform_trending', ['platform_id', 'score_trend DESC NULLS LAST', 'id DESC'], 'score_trend > 0'),
+    # Rattrapage du reindex Meilisearch : fetched_at >= début du reindex
+    ('ix_posts_fetched_at', ['fetched_at'], None),
+]
+
+
+def upgrade() -> None:
+    # SQLite (dev) : DESC place déjà les NULL en fin et NULLS LAST est refusé dans un index
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    # CREATE INDEX CONCURRENTLY ne peut pas tourner dans une transaction
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'posts',
+                [sa.text(column.replace(' NULLS LAST', '') if sqlite else column) for column in columns],
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='posts', if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""add posts full-text search (tsvector + GIN, FTS5 on SQLite)
+
+Revision ID: add_posts_search_vector
+Revises: add_search_outbox
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+from db.fulltext import fulltext_ddl, fulltext_drop_ddl, fulltext_index_ddl, fulltext_populate_ddl
+
+# revision identifiers, used by Alembic.
+revision = 'add_posts_search_vector'
+down_revision = 'add_search_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Colonne tsvector générée (caption + author + hashtags) indexée en GIN
+    dialect = op.get_bind().dialect.name
+    for statement in fulltext_ddl(dialect):
+        op.execute(statement)
+    for statement in fulltext_populate_ddl(dialect):
+        op.execute(statement)
+    # Index GIN en CONCURRENTLY, hors transaction
+    index_statements = fulltext_index_ddl(dialect)
+    if index_statements:
+        with op.get_context().autocommit_block():
+            for statement in index_statements:
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in fulltext_drop_ddl(op.get_bind().dialect.name):
+        op.execute(statement)
@@ -0,0 +1,35 @@
+"""add search_outbox table for post -> Meilisearch sync
+
+Revision ID: add_search_outbox
+Revises: add_projects
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_outbox'
+down_revision = 'add_projects'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Outbox écrite dans la même transaction que les mutations de posts
+    op.create_table(
+        'search_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Text(), nullable=False),
+        sa.Column('operation', sa.String(length=10), nullable=False),  # 'upsert' / 'delete'
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_search_outbox_id'), 'search_outbox', ['id'], unique=False)
+    op.create_index(op.f('ix_search_outbox_post_id'), 'search_outbox', ['post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_search_outbox_post_id'), table_name='search_outbox')
+    op.drop_index(op.f('ix_search_outbox_id'), table_name='search_outbox')
+    op.drop_table('search_outbox')
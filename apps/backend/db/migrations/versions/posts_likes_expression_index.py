@@ -0,0 +1,41 @@
+"""add btree expression index on the integer value of metrics->>'likes' (CONCURRENTLY)
+
+Revision ID: posts_likes_expression_index
+Revises: search_outbox_processed_at
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from db.types import metric_bigint
+
+# revision identifiers, used by Alembic.
+revision = 'posts_likes_expression_index'
+down_revision = 'search_outbox_processed_at'
+branch_labels = None
+depends_on = None
+
+# Le GIN jsonb_path_ops de posts_native_json_columns ne sert que @> / jsonpath d'égalité :
+# min_likes (>=) et un tri par likes ont besoin d'un btree sur la même expression que
+# db.types.metric_bigint. Le cast y est gardé par un motif : une valeur non numérique
+# donne NULL au lieu de faire échouer la création de l'index, aucune donnée n'est modifiée.
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite (dev) : json_extract, pas d'index d'expression
+        return
+    # CREATE INDEX CONCURRENTLY ne peut pas tourner dans une transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_likes', 'posts', [metric_bigint(sa.column('metrics'), 'likes')],
+            if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_likes', table_name='posts', if_exists=True, postgresql_concurrently=True)
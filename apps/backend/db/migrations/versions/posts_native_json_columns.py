@@ -0,0 +1,114 @@
+"""store posts.hashtags as TEXT[] and posts.metrics as JSONB, with GIN indexes
+
+Revision ID: posts_native_json_columns
+Revises: add_posts_listing_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+from db.fulltext import fulltext_ddl, fulltext_drop_ddl, fulltext_index_ddl
+
+# revision identifiers, used by Alembic.
+revision = 'posts_native_json_columns'
+down_revision = 'add_posts_listing_indexes'
+branch_labels = None
+depends_on = None
+
+# Conversion des valeurs JSON texte : le texte non JSON est gardé (un tag / une chaîne JSON)
+PG_CONVERSION_FUNCTIONS = [
+    """
+    CREATE FUNCTION pg_temp.json_text_to_array(value text) RETURNS text[]
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    DECLARE
+        document jsonb;
+    BEGIN
+        IF value IS NULL OR btrim(value) = '' THEN
+            RETURN NULL;
+        END IF;
+        BEGIN
+            document := value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN ARRAY[value];
+        END;
+        IF jsonb_typeof(document) = 'null' THEN
+            RETURN NULL;
+        ELSIF jsonb_typeof(document) = 'array' THEN
+            RETURN ARRAY(SELECT jsonb_array_elements_text(document));
+        END IF;
+        RETURN ARRAY[document #>> '{}'];
+    END $$
+    """,
+    """
+    CREATE FUNCTION pg_temp.json_text_to_jsonb(value text) RETURNS jsonb
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    BEGIN
+        IF value IS NULL OR btrim(value) = '' THEN
+            RETURN NULL;
+        END IF;
+        RETURN value::jsonb;
+    EXCEPTION WHEN others THEN
+        RETURN to_jsonb(value);
+    END $$
+    """,
+]
+
+# (nom, définition) : mêmes index que Post.__table_args__
+GIN_INDEXES = [
+    # hashtags @> ARRAY[...] (tous) / && ARRAY[...] (au moins un)
+    ('ix_posts_hashtags_gin', 'ON posts USING GIN (hashtags)'),
+    # metrics @> '{"likes": ...}' et jsonpath d'égalité (@@ '$.likes == 1000') ; les intervalles
+    # (min_likes) passent par le btree de la migration posts_likes_expression_index
+    ('ix_posts_metrics_gin', 'ON posts USING GIN (metrics jsonb_path_ops)'),
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # SQLite garde du JSON texte : normaliser les valeurs vides ou non JSON
+        op.execute("UPDATE posts SET hashtags = NULL WHERE trim(hashtags) = ''")
+        op.execute("UPDATE posts SET hashtags = json_array(hashtags) WHERE hashtags IS NOT NULL AND NOT json_valid(hashtags)")
+        op.execute("UPDATE posts SET metrics = NULL WHERE trim(metrics) = ''")
+        op.execute("UPDATE posts SET metrics = json_quote(metrics) WHERE metrics IS NOT NULL AND NOT json_valid(metrics)")
+        return
+    if dialect != 'postgresql':
+        return
+
+    # La colonne générée search_vector dépend de hashtags : supprimée puis recréée.
+    # ALTER TYPE réécrit la table (verrou exclusif le temps de la conversion).
+    for statement in PG_CONVERSION_FUNCTIONS:
+        op.execute(statement)
+    for statement in fulltext_drop_ddl(dialect):
+        op.execute(statement)
+    op.execute("ALTER TABLE posts ALTER COLUMN hashtags TYPE text[] USING pg_temp.json_text_to_array(hashtags)")
+    op.execute("ALTER TABLE posts ALTER COLUMN metrics TYPE jsonb USING pg_temp.json_text_to_jsonb(metrics)")
+    for statement in fulltext_ddl(dialect):
+        op.execute(statement)
+
+    # CREATE INDEX CONCURRENTLY ne peut pas tourner dans une transaction
+    with op.get_context().autocommit_block():
+        for statement in fulltext_index_ddl(dialect):
+            op.execute(statement)
+        for name, definition in GIN_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(GIN_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    for statement in fulltext_drop_ddl(dialect):
+        op.execute(statement)
+    op.execute("ALTER TABLE posts ALTER COLUMN hashtags TYPE text USING array_to_json(hashtags)::text")
+    op.execute("ALTER TABLE posts ALTER COLUMN metrics TYPE text USING metrics::text")
+    for statement in fulltext_ddl(dialect):
+        op.execute(statement)
+    with op.get_context().autocommit_block():
+        for statement in fulltext_index_ddl(dialect):
+            op.execute(statement)
@@ -0,0 +1,37 @@
+"""keep processed search_outbox rows (processed_at) for reindex catch-up
+
+Revision ID: search_outbox_processed_at
+Revises: add_post_metric_snapshots
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'search_outbox_processed_at'
+down_revision = 'add_post_metric_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Le drainer marque les entrées au lieu de les supprimer ; purge après SEARCH_OUTBOX_RETENTION_HOURS
+    op.add_column('search_outbox', sa.Column('processed_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_search_outbox_pending',
+        'search_outbox',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('processed_at IS NULL'),
+        sqlite_where=sa.text('processed_at IS NULL'),
+    )
+    op.create_index('ix_search_outbox_processed_at', 'search_outbox', ['processed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_outbox_processed_at', table_name='search_outbox')
+    op.drop_index('ix_search_outbox_pending', table_name='search_outbox')
+    # Entrées déjà traitées : l'ancien drainer les renverrait
+    op.execute("DELETE FROM search_outbox WHERE processed_at IS NOT NULL")
+    op.drop_column('search_outbox', 'processed_at')
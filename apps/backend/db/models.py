@@ -2,13 +2,15 @@
 # Modèles SQLAlchemy pour Insider Trends MVP - VERSION SIMPLIFIÉE PROD
 # Architecture minimale et fonctionnelle
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, ForeignKey, UniqueConstraint, Float, Index, PrimaryKeyConstraint
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY
 from sqlalchemy.orm import relationship
 from db.base import Base
+from db.types import JSONDocument, StringArray, metric_bigint
 import datetime as dt
 
 # Utiliser Text pour SQLite (compatible avec PostgreSQL aussi)
+# Post.hashtags / Post.metrics : types natifs sur PostgreSQL (db.types)
 JSONType = Text
 ArrayType = Text
 
@@ -101,6 +103,18 @@ class PostHashtag(Base):
         UniqueConstraint('post_id', 'hashtag_id', name='uq_post_hashtags'),
     )
 
+def _keyset_indexes(name, prefix, sort_column, id_column, where=None):
+    """Index (prefix..., sort_column DESC NULLS LAST, id DESC) pour core.pagination.keyset_page.
+
+    PostgreSQL met les NULL en tête d'un DESC : NULLS LAST doit figurer dans l'index.
+    SQLite les met déjà en fin (et refuse NULLS LAST dans un index).
+    """
+    options = {'postgresql_where': where, 'sqlite_where': where} if where is not None else {}
+    return (
+        Index(name, *prefix, sort_column.desc().nulls_last(), id_column.desc(), **options).ddl_if(dialect='postgresql'),
+        Index(name, *prefix, sort_column.desc(), id_column.desc(), **options).ddl_if(dialect='sqlite'),
+    )
+
 class Post(Base):
     """Posts des réseaux sociaux - TOUTE LA LOGIQUE ICI"""
     __tablename__ = "posts"
@@ -109,8 +123,8 @@ class Post(Base):
     platform_id = Column(Integer, ForeignKey("platforms.id"), nullable=False)
     author = Column(String(255))
     caption = Column(Text)
-    hashtags = Column(ArrayType)
-    metrics = Column(JSONType)  # likes, comments, shares, views
+    hashtags = Column(StringArray)  # TEXT[] (PostgreSQL) / JSON (SQLite)
+    metrics = Column(JSONDocument)  # JSONB : likes, comments, shares, views
     posted_at = Column(DateTime)
     fetched_at = Column(DateTime, default=dt.datetime.utcnow)
     language = Column(String(10))
@@ -122,9 +136,63 @@ class Post(Base):
     # Relations
     platform = relationship("Platform")
     
-    # Contraintes
+    # Contraintes + index des listings (même ordre que la pagination keyset)
+    # Créés CONCURRENTLY en production par la migration add_posts_listing_indexes
     __table_args__ = (
         UniqueConstraint('platform_id', 'id', name='posts_platform_id_unique'),
+        *_keyset_indexes('ix_posts_recent', [], posted_at, id),
+        *_keyset_indexes('ix_posts_platform_recent', [platform_id], posted_at, id),
+        *_keyset_indexes('ix_posts_trending', [], score_trend, id, where=score_trend > 0),
+        *_keyset_indexes('ix_posts_platform_trending', [platform_id], score_trend, id, where=score_trend > 0),
+        Index('ix_posts_fetched_at', fetched_at),
+        # hashtags @> / && ARRAY[...] et égalités metrics @> '{"likes": n}' (migration posts_native_json_columns)
+        Index('ix_posts_hashtags_gin', hashtags, postgresql_using='gin').ddl_if(dialect='postgresql'),
+        Index(
+            'ix_posts_metrics_gin', metrics,
+            postgresql_using='gin', postgresql_ops={'metrics': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+        # min_likes (intervalle) et tri par likes : btree d'expression (migration posts_likes_expression_index)
+        Index('ix_posts_likes', metric_bigint(metrics, 'likes')).ddl_if(dialect='postgresql'),
+    )
+
+class PostMetricSnapshot(Base):
+    """Relevé des métriques d'un post à chaque synchronisation (append-only, base des vitesses de tendance)
+
+    Partitionnée par jour sur captured_at en PostgreSQL (services.metric_snapshots) :
+    la rétention supprime des partitions entières. Pas de FK vers posts pour la même raison.
+    """
+    __tablename__ = "post_metric_snapshots"
+    
+    post_id = Column(Text, nullable=False)
+    captured_at = Column(DateTime, nullable=False)
+    likes = Column(BigInteger, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    views = Column(BigInteger, nullable=False, default=0)
+    
+    # La clé de partition doit figurer dans la clé primaire ; (post_id, captured_at) sert aussi
+    # la lecture "historique d'un post" utilisée pour les taux de croissance
+    __table_args__ = (
+        PrimaryKeyConstraint('post_id', 'captured_at', name='pk_post_metric_snapshots'),
+        {'postgresql_partition_by': 'RANGE (captured_at)'},
+    )
+
+class SearchOutbox(Base):
+    """Outbox des changements de posts à propager vers Meilisearch (même transaction que le post)"""
+    __tablename__ = "search_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Text, nullable=False, index=True)
+    operation = Column(String(10), nullable=False)  # 'upsert' / 'delete'
+    created_at = Column(DateTime, default=dt.datetime.utcnow)
+    # Marquée traitée par le drainer puis purgée après SEARCH_OUTBOX_RETENTION_HOURS :
+    # le reindex rejoue les entrées écrites pendant la reconstruction
+    processed_at = Column(DateTime)
+    
+    __table_args__ = (
+        # Entrées à traiter, par ordre d'id (migration search_outbox_processed_at)
+        Index('ix_search_outbox_pending', id, postgresql_where=processed_at.is_(None), sqlite_where=processed_at.is_(None)),
+        Index('ix_search_outbox_processed_at', processed_at),
     )
 
 class Subscription(Base):
@@ -0,0 +1,91 @@
+# db/partitions.py
+# Partitions quotidiennes de post_metric_snapshots (PostgreSQL) et rétention de l'historique
+
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, text  # type: ignore
+from sqlalchemy.engine import Engine  # type: ignore
+
+from db.models import PostMetricSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLE = PostMetricSnapshot.__tablename__
+# Une partition par jour UTC : post_metric_snapshots_p20261018 = [2026-10-18, 2026-10-19)
+_PARTITION_RE = re.compile(rf'^{SNAPSHOT_TABLE}_p(\d{{8}})$')
+
+# Dernier jour couvert par moteur (évite le DDL à chaque synchronisation)
+_ensured_through: Dict[str, date] = {}
+
+PG_LIST_PARTITIONS = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = :table
+"""
+
+def snapshot_partition_name(day: date) -> str:
+    return f"{SNAPSHOT_TABLE}_p{day:%Y%m%d}"
+
+def snapshot_partition_ddl(day: date) -> str:
+    """CREATE TABLE ... PARTITION OF pour le jour day (idempotent)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {snapshot_partition_name(day)} PARTITION OF {SNAPSHOT_TABLE} "
+        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+    )
+
+def ensure_snapshot_partitions(engine: Engine, days_ahead: int, today: Optional[date] = None) -> int:
+    """Crée les partitions d'aujourd'hui à today + days_ahead (PostgreSQL uniquement).
+
+    Le DDL verrouille la table parente : à appeler hors de toute transaction qui a lu
+    l'historique (sinon attente sur soi-même). Retourne le nombre de jours couverts,
+    0 si le dialecte ne partitionne pas.
+    """
+    if engine.dialect.name != 'postgresql':
+        return 0
+    today = today or datetime.utcnow().date()
+    days = [today + timedelta(days=offset) for offset in range(max(days_ahead, 0) + 1)]
+    engine_key = str(engine.url)
+    if _ensured_through.get(engine_key, date.min) >= days[-1]:
+        return len(days)
+    with engine.begin() as conn:
+        for day in days:
+            conn.execute(text(snapshot_partition_ddl(day)))
+    _ensured_through[engine_key] = days[-1]
+    return len(days)
+
+def _partition_days(engine: Engine) -> List[date]:
+    with engine.connect() as conn:
+        names = conn.execute(text(PG_LIST_PARTITIONS), {'table': SNAPSHOT_TABLE}).scalars().all()
+    days = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            days.append(datetime.strptime(match.group(1), '%Y%m%d').date())
+    return sorted(days)
+
+def prune_snapshots(engine: Engine, retention_days: int, today: Optional[date] = None) -> int:
+    """Supprime l'historique plus ancien que retention_days.
+
+    PostgreSQL : DROP des partitions entièrement expirées (pas de DELETE ni de VACUUM).
+    Ailleurs : DELETE des lignes. Retourne le nombre de partitions / lignes supprimées.
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+    if engine.dialect.name != 'postgresql':
+        cutoff_at = datetime.combine(cutoff, datetime.min.time())
+        with engine.begin() as conn:
+            result = conn.execute(delete(PostMetricSnapshot).where(PostMetricSnapshot.captured_at < cutoff_at))
+        return result.rowcount or 0
+
+    expired = [day for day in _partition_days(engine) if day < cutoff]
+    for day in expired:
+        # Une transaction par partition : le verrou sur la table parente reste bref
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {snapshot_partition_name(day)}"))
+    return len(expired)
@@ -0,0 +1,118 @@
+# db/types.py
+# Types de colonnes selon le dialecte : TEXT[] / JSONB natifs sur PostgreSQL, JSON texte sur SQLite
+
+import json
+import re
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import BigInteger, Float, Numeric, Text, case, cast, func, literal, literal_column, select, type_coerce  # type: ignore
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB  # type: ignore
+from sqlalchemy.sql.elements import ColumnElement, Grouping  # type: ignore
+from sqlalchemy.types import TypeDecorator  # type: ignore
+
+def _loads(value: str, fallback: Any) -> Any:
+    if not value.strip():
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return fallback
+
+class _DialectJSON(TypeDecorator):
+    """Valeur Python (list / dict) stockée dans le type natif PostgreSQL (pg_type),
+    en JSON texte ailleurs.
+
+    Une chaîne JSON déjà encodée (ancien format des colonnes Text) est acceptée en écriture ;
+    une chaîne qui n'est pas du JSON est gardée telle quelle (un tag, une chaîne JSON).
+    """
+    impl = Text
+    cache_ok = True
+    pg_type: Any = None
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(self.pg_type)
+        return dialect.type_descriptor(Text())
+
+    def coerce(self, value: Any) -> Any:
+        return value
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            value = _loads(value, value)
+        value = self.coerce(value)
+        if value is None or dialect.name == 'postgresql':
+            return value
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str) and dialect.name != 'postgresql':
+            value = _loads(value, value)
+        return self.coerce(value)
+
+class StringArray(_DialectJSON):
+    """Liste de chaînes : TEXT[] sur PostgreSQL (GIN, @> / &&), tableau JSON sur SQLite"""
+    pg_type = ARRAY(Text)
+    cache_ok = True
+
+    def coerce(self, value: Any) -> Optional[List[str]]:
+        if value is None:
+            return None
+        if isinstance(value, (list, tuple, set)):
+            return [str(item) for item in value]
+        return [str(value)]
+
+class JSONDocument(_DialectJSON):
+    """Document JSON : JSONB sur PostgreSQL (GIN jsonb_path_ops, @> / @@), JSON texte sur SQLite"""
+    pg_type = JSONB()
+    cache_ok = True
+
+# --- Conditions servies par les index GIN (PostgreSQL) ou json_each / json_extract (SQLite) ---
+
+_METRIC_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# Métriques avec un index btree d'expression (metric_bigint) sur PostgreSQL
+INDEXED_METRICS = ('likes',)
+# Texte numérique convertible en bigint (18 chiffres au plus, décimales tronquées)
+_NUMERIC_TEXT_PATTERN = "'^-?[0-9]{1,18}([.][0-9]+)?$'"
+
+def array_condition(dialect: str, column: Any, values: Sequence[str], match_all: bool = False) -> ColumnElement:
+    """Au moins une des valeurs dans le tableau (&&), ou toutes (@>) si match_all"""
+    values = [str(value) for value in values]
+    if dialect == 'postgresql':
+        array = type_coerce(column, ARRAY(Text))
+        return array.contains(values) if match_all else array.overlap(values)
+    elements = func.json_each(column).table_valued('value')
+    matches = select(func.count(func.distinct(elements.c.value))).where(elements.c.value.in_(values))
+    if match_all:
+        return matches.scalar_subquery() == len(set(values))
+    return select(literal(1)).select_from(elements).where(elements.c.value.in_(values)).exists()
+
+def metric_bigint(column: Any, metric: str) -> ColumnElement:
+    """Valeur entière de metrics.<metric>, NULL si elle n'est pas numérique.
+
+    CASE WHEN metrics->>'<metric>' ~ nombre THEN trunc(...::numeric)::bigint END : un
+    cast direct ferait échouer l'index et les requêtes sur une ancienne valeur non
+    numérique, qui est seulement ignorée. Clé et motif en littéraux : même expression que
+    l'index (un paramètre lié, préparé côté serveur par asyncpg, ne lui correspondrait pas).
+    """
+    if not _METRIC_NAME_RE.match(metric):
+        raise ValueError(f"Nom de métrique invalide: {metric}")
+    value = type_coerce(column, JSONB).op('->>')(literal_column(f"'{metric}'"))
+    # Entre parenthèses : une expression d'index qui n'est pas un appel de fonction doit l'être
+    return Grouping(case(
+        (value.op('~')(literal_column(_NUMERIC_TEXT_PATTERN)), cast(func.trunc(cast(value, Numeric)), BigInteger))
+    ))
+
+def metric_at_least(dialect: str, column: Any, metric: str, minimum: float) -> ColumnElement:
+    """metrics.<metric> >= minimum.
+
+    PostgreSQL : comparaison btree sur metric_bigint pour INDEXED_METRICS
+    (un GIN jsonb_path_ops ne sert que l'égalité, pas un intervalle), jsonpath sinon.
+    """
+    if not _METRIC_NAME_RE.match(metric):
+        raise ValueError(f"Nom de métrique invalide: {metric}")
+    if dialect == 'postgresql':
+        if metric in INDEXED_METRICS:
+            return metric_bigint(column, metric) >= int(minimum)
+        return type_coerce(column, JSONB).path_match(f'$.{metric} >= {float(minimum)!r}')
+    return cast(func.json_extract(column, f'$.{metric}'), Float) >= minimum
@@ -1,78 +1,95 @@
 # hashtags/hashtags_endpoints.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from db.base import get_db
+from core.fieldsets import FIELDS_DESCRIPTION, parse_fields, select_columns
+from db.base import get_async_db
 from db.models import Hashtag, Platform, User
 from auth_unified.auth_endpoints import get_current_user
 from .schemas import HashtagCreate, HashtagResponse, HashtagUpdate
 
 hashtags_router = APIRouter(prefix="/api/v1/hashtags", tags=["hashtags"])
 
+HASHTAG_RESPONSE_FIELDS = list(HashtagResponse.model_fields)
+
+def _rows_response(rows, fields: List[str]) -> JSONResponse:
+    """Réponse limitée aux champs demandés (hors validation du response_model)"""
+    return JSONResponse(jsonable_encoder([dict(zip(fields, row)) for row in rows]))
+
 @hashtags_router.get("/", response_model=List[HashtagResponse])
-def get_hashtags(
+async def get_hashtags(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     platform: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer les hashtags avec filtres"""
-    query = db.query(Hashtag)
+    selected = parse_fields(fields, HASHTAG_RESPONSE_FIELDS)
+    stmt = select(*select_columns(Hashtag, selected)) if selected else select(Hashtag)
     
     if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
+        stmt = stmt.join(Platform).where(Platform.name == platform)
     
-    hashtags = query.offset(skip).limit(limit).all()
-    return hashtags
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    hashtags = result.all() if selected else result.scalars().all()
+    return _rows_response(hashtags, selected) if selected else hashtags
 
 @hashtags_router.get("/{hashtag_id}", response_model=HashtagResponse)
-def get_hashtag(
+async def get_hashtag(
     hashtag_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer un hashtag par ID"""
-    hashtag = db.query(Hashtag).filter(Hashtag.id == hashtag_id).first()
+    selected = parse_fields(fields, HASHTAG_RESPONSE_FIELDS)
+    stmt = select(*select_columns(Hashtag, selected)) if selected else select(Hashtag)
+    result = await db.execute(stmt.where(Hashtag.id == hashtag_id))
+    hashtag = result.first() if selected else result.scalars().first()
     if not hashtag:
         raise HTTPException(status_code=404, detail="Hashtag non trouvé")
-    return hashtag
+    return JSONResponse(jsonable_encoder(dict(zip(selected, hashtag)))) if selected else hashtag
 
 @hashtags_router.post("/", response_model=HashtagResponse)
-def create_hashtag(
+async def create_hashtag(
     hashtag_in: HashtagCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Créer un nouveau hashtag"""
     # Vérifier que la plateforme existe
-    platform = db.query(Platform).filter(Platform.id == hashtag_in.platform_id).first()
+    platform = await db.get(Platform, hashtag_in.platform_id)
     if not platform:
         raise HTTPException(status_code=400, detail="Plateforme non trouvée")
     
     # Vérifier que le hashtag n'existe pas déjà
-    existing = db.query(Hashtag).filter(
+    existing = await db.scalar(select(Hashtag).where(
         Hashtag.name == hashtag_in.name,
         Hashtag.platform_id == hashtag_in.platform_id
-    ).first()
+    ))
     if existing:
         raise HTTPException(status_code=400, detail="Hashtag déjà existant")
     
     hashtag = Hashtag(**hashtag_in.dict())
     db.add(hashtag)
-    db.commit()
-    db.refresh(hashtag)
+    await db.commit()
+    await db.refresh(hashtag)
     return hashtag
 
 @hashtags_router.put("/{hashtag_id}", response_model=HashtagResponse)
-def update_hashtag(
+async def update_hashtag(
     hashtag_id: int,
     hashtag_in: HashtagUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mettre à jour un hashtag"""
-    hashtag = db.query(Hashtag).filter(Hashtag.id == hashtag_id).first()
+    hashtag = await db.get(Hashtag, hashtag_id)
     if not hashtag:
         raise HTTPException(status_code=404, detail="Hashtag non trouvé")
     
@@ -80,38 +97,40 @@ def update_hashtag(
     for field, value in update_data.items():
         setattr(hashtag, field, value)
     
-    db.commit()
-    db.refresh(hashtag)
+    await db.commit()
+    await db.refresh(hashtag)
     return hashtag
 
 @hashtags_router.delete("/{hashtag_id}")
-def delete_hashtag(
+async def delete_hashtag(
     hashtag_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Supprimer un hashtag"""
-    hashtag = db.query(Hashtag).filter(Hashtag.id == hashtag_id).first()
+    hashtag = await db.get(Hashtag, hashtag_id)
     if not hashtag:
         raise HTTPException(status_code=404, detail="Hashtag non trouvé")
     
-    db.delete(hashtag)
-    db.commit()
+    await db.delete(hashtag)
+    await db.commit()
     return {"message": "Hashtag supprimé"}
 
 @hashtags_router.get("/stats/{hashtag_id}")
-def get_hashtag_stats(
+async def get_hashtag_stats(
     hashtag_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer les statistiques d'un hashtag"""
-    hashtag = db.query(Hashtag).filter(Hashtag.id == hashtag_id).first()
+    hashtag = await db.get(Hashtag, hashtag_id)
     if not hashtag:
         raise HTTPException(status_code=404, detail="Hashtag non trouvé")
     
     # Utiliser la vue hashtags_with_stats
-    result = db.execute(f"SELECT * FROM hashtags_with_stats WHERE id = {hashtag_id}")
+    result = await db.execute(
+        text("SELECT * FROM hashtags_with_stats WHERE id = :hashtag_id"), {'hashtag_id': hashtag_id}
+    )
     stats = result.fetchone()
     
     if not stats:
@@ -10,6 +10,9 @@ from db.base import get_db
 from db.models import User
 from auth_unified.auth_endpoints import get_current_user
 from jobs.tiktok_sync_job import TikTokSyncJob, run_sync_job
+from jobs import meilisearch_reindex_job
+from services.similarity_index import rebuild_similar_posts_index
+from services.leaderboards import rebuild_trending_leaderboards
 import asyncio
 
 jobs_router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
@@ -64,6 +67,84 @@ async def sync_tiktok_trending(
         "status": "processing"
     }
 
+@jobs_router.post("/reindex/meilisearch")
+async def reindex_meilisearch(
+    background_tasks: BackgroundTasks,
+    batch_size: int = 1000,
+    current_user: User = Depends(get_current_user)
+):
+    """Reconstruit l'index Meilisearch depuis PostgreSQL (index fantôme + swap atomique)"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Seul un admin peut reconstruire l'index de recherche"
+        )
+    
+    if meilisearch_reindex_job.last_reindex_status.get("status") == "running":
+        return {
+            "message": "Reindex déjà en cours",
+            "status": "running"
+        }
+    
+    background_tasks.add_task(meilisearch_reindex_job.run_reindex_job, batch_size=batch_size)
+    
+    return {
+        "message": "Reindex Meilisearch démarré en arrière-plan",
+        "status": "processing"
+    }
+
+@jobs_router.get("/reindex/meilisearch")
+async def reindex_meilisearch_status(
+    current_user: User = Depends(get_current_user)
+):
+    """État du dernier reindex Meilisearch"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Seul un admin peut consulter l'état du reindex"
+        )
+    
+    return meilisearch_reindex_job.last_reindex_status
+
+@jobs_router.post("/reindex/similar")
+async def reindex_similar_posts(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Reconstruit l'index "posts similaires" (IDF recalculée), bascule sans interruption"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Seul un admin peut reconstruire l'index de similarité"
+        )
+    
+    # Fonction synchrone : exécutée dans le threadpool par BackgroundTasks
+    background_tasks.add_task(rebuild_similar_posts_index)
+    
+    return {
+        "message": "Reconstruction de l'index de similarité démarrée en arrière-plan",
+        "status": "processing"
+    }
+
+@jobs_router.post("/reindex/leaderboards")
+async def reindex_trending_leaderboards(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Reconstruit les classements tendance Redis depuis PostgreSQL"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="Seul un admin peut reconstruire les classements tendance"
+        )
+    
+    background_tasks.add_task(rebuild_trending_leaderboards)
+    
+    return {
+        "message": "Reconstruction des classements tendance démarrée en arrière-plan",
+        "status": "processing"
+    }
+
 @jobs_router.post("/clean/seeded-posts")
 def clean_seeded_posts(
     db: Session = Depends(get_db),
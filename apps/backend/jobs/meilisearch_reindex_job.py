@@ -0,0 +1,210 @@
+# jobs/meilisearch_reindex_job.py
+# Job de reconstruction complète de l'index Meilisearch depuis PostgreSQL (index fantôme + swap)
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from sqlalchemy import func, select  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from db.base import SessionLocal
+from db.models import Post, Platform, SearchOutbox
+from services.index_refresh import DocumentHashCache
+from services.meilisearch_async import async_meilisearch_service
+from services.meilisearch_client import meilisearch_service, post_to_index_data
+from services.meilisearch_indexer import BulkIndexer
+from services.meilisearch_settings import meilisearch_settings_manager
+from services.search_cache import bump_index_version
+from services.search_outbox import OUTBOX_DELETE
+
+logger = logging.getLogger(__name__)
+
+# Un seul reindex à la fois par process
+_reindex_lock = asyncio.Lock()
+last_reindex_status: Dict[str, Any] = {"status": "never_run"}
+
+class MeilisearchReindexJob:
+    """Reconstruit l'index live dans un index fantôme puis les échange atomiquement.
+
+    L'index live continue de servir les lectures pendant toute la reconstruction.
+    Les posts sont lus via un curseur serveur (yield_per) : mémoire constante.
+    Après le swap, les écritures faites pendant la reconstruction sont rejouées :
+    entrées de l'outbox (modifications et suppressions de l'API) et posts synchronisés.
+    """
+
+    def __init__(self, batch_size: int = 1000, max_failed: int = 0):
+        self.db: Session = SessionLocal()
+        self.batch_size = batch_size
+        self.max_failed = max_failed
+        self.live_index = async_meilisearch_service.index_name
+
+    async def _stream_posts(self, since: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Lit les posts par ordre de clé primaire, un lot yield_per à la fois"""
+        stmt = (
+            select(Post, Platform.name)
+            .outerjoin(Platform, Post.platform_id == Platform.id)
+            .order_by(Post.id)
+            .execution_options(stream_results=True, yield_per=self.batch_size)
+        )
+        if since is not None:
+            stmt = stmt.where(Post.fetched_at >= since)
+
+        result = await asyncio.to_thread(self.db.execute, stmt)
+        partitions = result.partitions()
+        try:
+            while True:
+                rows = await asyncio.to_thread(next, partitions, None)
+                if not rows:
+                    break
+                # L'identity map est faible : les lots déjà envoyés sont libérés
+                for post, platform_name in rows:
+                    yield post_to_index_data(post, platform_name)
+        finally:
+            result.close()
+
+    async def _wait(self, task: Dict[str, Any], action: str):
+        result = await async_meilisearch_service.wait_for_task(task['taskUid'], timeout=600.0)
+        if result.get('status') != 'succeeded':
+            raise RuntimeError(f"{action} échoué: {result.get('error')}")
+
+    def _outbox_mark(self) -> int:
+        """Dernier id de l'outbox : les entrées suivantes seront rejouées après le swap"""
+        return self.db.execute(select(func.max(SearchOutbox.id))).scalar() or 0
+
+    def _outbox_changes(self, after_id: int) -> Dict[str, str]:
+        """Entrées écrites après after_id, traitées ou non : {post_id: opération}, la dernière gagne"""
+        rows = self.db.execute(
+            select(SearchOutbox.post_id, SearchOutbox.operation)
+            .where(SearchOutbox.id > after_id)
+            .order_by(SearchOutbox.id)
+        ).all()
+        return {post_id: operation for post_id, operation in rows}
+
+    def _load_documents(self, post_ids: List[str]) -> List[Dict[str, Any]]:
+        """État courant des posts (absents = supprimés depuis)"""
+        documents = []
+        for start in range(0, len(post_ids), self.batch_size):
+            rows = self.db.execute(
+                select(Post, Platform.name)
+                .outerjoin(Platform, Post.platform_id == Platform.id)
+                .where(Post.id.in_(post_ids[start:start + self.batch_size]))
+            ).all()
+            documents.extend(post_to_index_data(post, platform_name) for post, platform_name in rows)
+        return documents
+
+    async def _catch_up(self, outbox_mark: int, started_at: datetime) -> Dict[str, int]:
+        """Rejoue sur l'index live les écritures faites pendant la reconstruction.
+
+        L'outbox couvre l'API (le drainer les a appliquées à l'ancien index, perdu au swap),
+        fetched_at couvre le job de sync qui indexe sans passer par l'outbox.
+        """
+        changes = await asyncio.to_thread(self._outbox_changes, outbox_mark)
+        upsert_ids = [post_id for post_id, operation in changes.items() if operation != OUTBOX_DELETE]
+        documents = await asyncio.to_thread(self._load_documents, upsert_ids) if upsert_ids else []
+        found = {str(document['id']) for document in documents}
+        delete_ids = [post_id for post_id in changes if post_id not in found]
+
+        indexer = BulkIndexer(index_uid=self.live_index)
+        replayed = await indexer.run(documents)
+        synced = await indexer.run(self._stream_posts(since=started_at))
+        if delete_ids:
+            await self._wait(
+                await async_meilisearch_service.delete_documents(delete_ids, index_uid=self.live_index),
+                "Suppression des posts supprimés pendant le reindex",
+            )
+            await bump_index_version()
+        return {
+            "indexed": replayed.indexed + synced.indexed,
+            "deleted": len(delete_ids),
+            "failed": len(replayed.failed_ids) + len(synced.failed_ids),
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        """Exécute la reconstruction complète"""
+        started_at = datetime.utcnow()
+        outbox_mark = await asyncio.to_thread(self._outbox_mark)
+        shadow_index = f"{self.live_index}_{started_at.strftime('%Y%m%d%H%M%S')}"
+        logger.info(f"🔄 Reindex '{self.live_index}' via l'index fantôme '{shadow_index}'...")
+
+        # 1. Index fantôme + configuration appliquée une seule fois
+        await self._wait(await async_meilisearch_service.create_index(shadow_index), "Création index fantôme")
+        try:
+            if not await asyncio.to_thread(meilisearch_service.apply_settings, shadow_index):
+                raise RuntimeError("Configuration de l'index fantôme échouée")
+
+            # 2. Remplissage en flux depuis PostgreSQL
+            report = await BulkIndexer(index_uid=shadow_index).run(self._stream_posts())
+            if len(report.failed_ids) > self.max_failed:
+                raise RuntimeError(
+                    f"{len(report.failed_ids)} documents en échec (max {self.max_failed}), index live conservé"
+                )
+
+            # 3. Swap atomique (l'index live doit exister pour être échangé)
+            await asyncio.to_thread(meilisearch_service.ensure_index, self.live_index)
+            await self._wait(
+                await async_meilisearch_service.swap_indexes(self.live_index, shadow_index),
+                "Swap des index",
+            )
+            await meilisearch_settings_manager.mark_applied(self.live_index)
+            await bump_index_version()
+            # Hash de l'ancien contenu : sans ça, un post absent du nouvel index serait sauté
+            # (inchangé) ou envoyé en partiel (document réduit à id + métriques)
+            try:
+                await DocumentHashCache(self.live_index).clear()
+            except Exception as e:
+                logger.warning(f"⚠️ Hash de documents non effacés: {e}")
+
+            # 4. Rattrapage des écritures faites pendant la reconstruction
+            catch_up = await self._catch_up(outbox_mark, started_at)
+        finally:
+            # Avant le swap : index partiel ; après : ancien contenu de l'index live
+            await self._drop(shadow_index)
+
+        result = {
+            "status": "completed",
+            "index": self.live_index,
+            "shadow_index": shadow_index,
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "report": report.as_dict(),
+            "catch_up": catch_up,
+        }
+        logger.info(f"✅ Reindex terminé: {report.indexed} posts, {report.docs_per_second:.0f} docs/s")
+        return result
+
+    async def _drop(self, index_uid: str):
+        try:
+            await async_meilisearch_service.delete_index(index_uid)
+        except Exception as e:
+            logger.warning(f"⚠️ Suppression de l'index '{index_uid}' impossible: {e}")
+
+    def close(self):
+        """Ferme la session DB"""
+        if self.db:
+            self.db.close()
+
+async def run_reindex_job(batch_size: int = 1000, max_failed: int = 0) -> Dict[str, Any]:
+    """Fonction utilitaire pour exécuter le reindex (un seul à la fois)"""
+    global last_reindex_status
+
+    if _reindex_lock.locked():
+        return {"status": "already_running"}
+
+    async with _reindex_lock:
+        last_reindex_status = {"status": "running", "started_at": datetime.utcnow().isoformat()}
+        job = MeilisearchReindexJob(batch_size=batch_size, max_failed=max_failed)
+        try:
+            last_reindex_status = await job.run()
+        except Exception as e:
+            logger.error(f"❌ Erreur reindex Meilisearch: {e}")
+            last_reindex_status = {"status": "failed", "error": str(e)}
+        finally:
+            job.close()
+        return last_reindex_status
+
+if __name__ == "__main__":
+    # Usage: python -m jobs.meilisearch_reindex_job [batch_size]
+    import sys
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(asyncio.run(run_reindex_job(batch_size=batch_size)))
@@ -0,0 +1,179 @@
+# jobs/search_outbox_drainer.py
+# Drainer de l'outbox : pousse les changements de posts vers Meilisearch (s'il est configuré),
+# les classements tendance et l'index de similarité, par lots
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session  # type: ignore
+
+from core.config import settings
+from db.base import SessionLocal
+from db.models import Post, Platform, SearchOutbox
+from services.index_refresh import document_hash_cache
+from services.leaderboards import trending_leaderboards
+from services.meilisearch_async import async_meilisearch_service
+from services.meilisearch_client import post_to_index_data
+from services.meilisearch_indexer import BulkIndexer
+from services.search_cache import bump_index_version
+from services.similarity_index import similar_posts_index
+from services.search_outbox import OUTBOX_DELETE, OUTBOX_UPSERT
+
+logger = logging.getLogger(__name__)
+
+class SearchOutboxDrainer:
+    """Lit l'outbox par ordre d'id, fusionne les changements d'un même post
+    (le dernier gagne), puis envoie upserts et suppressions en lots.
+
+    Les lignes sont verrouillées (FOR UPDATE SKIP LOCKED sur PostgreSQL) pendant
+    l'envoi et marquées traitées seulement une fois les tâches Meilisearch réussies ;
+    elles restent SEARCH_OUTBOX_RETENTION_HOURS pour le rattrapage du reindex.
+    Sans Meilisearch, la boucle tourne quand même : classements et index de
+    similarité restent à jour et l'outbox est purgée. L'index de secours en mémoire
+    suit l'outbox dans chaque worker (services.fallback_index), pas ici.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, interval: Optional[float] = None):
+        self.batch_size = batch_size or settings.SEARCH_OUTBOX_BATCH
+        self.interval = interval or settings.SEARCH_OUTBOX_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+    def _claim(self, db: Session) -> Tuple[List[int], Dict[str, str]]:
+        """Verrouille un lot d'entrées et fusionne les opérations par post"""
+        rows = (
+            db.query(SearchOutbox)
+            .filter(SearchOutbox.processed_at.is_(None))
+            .order_by(SearchOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        operations: Dict[str, str] = {}
+        for row in rows:
+            operations[row.post_id] = row.operation
+        return [row.id for row in rows], operations
+
+    def _load_documents(self, db: Session, post_ids: List[str]) -> List[dict]:
+        """Charge l'état courant des posts à upserter"""
+        rows = (
+            db.query(Post, Platform.name)
+            .outerjoin(Platform, Post.platform_id == Platform.id)
+            .filter(Post.id.in_(post_ids))
+            .all()
+        )
+        return [post_to_index_data(post, platform_name) for post, platform_name in rows]
+
+    def _acknowledge(self, db: Session, outbox_ids: List[int], keep_post_ids: List[str]):
+        """Marque les entrées traitées (sauf celles des posts en échec), purge celles qui ont
+        dépassé la rétention et libère les verrous"""
+        now = datetime.utcnow()
+        query = db.query(SearchOutbox).filter(SearchOutbox.id.in_(outbox_ids))
+        if keep_post_ids:
+            query = query.filter(SearchOutbox.post_id.notin_(keep_post_ids))
+        query.update({SearchOutbox.processed_at: now}, synchronize_session=False)
+        db.query(SearchOutbox).filter(
+            SearchOutbox.processed_at < now - timedelta(hours=settings.SEARCH_OUTBOX_RETENTION_HOURS)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    async def drain_once(self) -> int:
+        """Traite un lot. Retourne le nombre d'entrées consommées"""
+        db: Session = SessionLocal()
+        try:
+            outbox_ids, operations = await asyncio.to_thread(self._claim, db)
+            if not outbox_ids:
+                await asyncio.to_thread(db.rollback)
+                await self._heartbeat()
+                return 0
+
+            upsert_ids = [pid for pid, op in operations.items() if op == OUTBOX_UPSERT]
+            delete_ids = [pid for pid, op in operations.items() if op == OUTBOX_DELETE]
+
+            failed: List[str] = []
+            if upsert_ids:
+                documents = await asyncio.to_thread(self._load_documents, db, upsert_ids)
+                # Un post supprimé entre-temps devient une suppression
+                found = {doc['id'] for doc in documents}
+                delete_ids.extend(pid for pid in upsert_ids if pid not in found)
+                await asyncio.to_thread(similar_posts_index.append_many, documents)
+                if async_meilisearch_service.enabled:
+                    report = await BulkIndexer().run(documents)
+                    failed.extend(report.failed_ids)
+
+            if delete_ids:
+                await asyncio.to_thread(similar_posts_index.delete_many, delete_ids)
+                if async_meilisearch_service.enabled:
+                    task = await async_meilisearch_service.delete_documents(delete_ids)
+                    result = await async_meilisearch_service.wait_for_task(task['taskUid'])
+                    if result.get('status') != 'succeeded':
+                        failed.extend(delete_ids)
+                    else:
+                        await bump_index_version()
+
+            # Modifiés hors sync : le prochain rafraîchissement les renverra en complet
+            if async_meilisearch_service.enabled:
+                try:
+                    await document_hash_cache.forget(list(operations))
+                except Exception as e:
+                    logger.warning(f"⚠️ Hash de documents non invalidés: {e}")
+            
+            # Classements tendance : nouveaux scores / plateforme / hashtags, posts supprimés retirés
+            try:
+                if upsert_ids:
+                    await trending_leaderboards.update_many(documents)
+                await trending_leaderboards.remove_many(delete_ids)
+                await trending_leaderboards.heartbeat()
+            except Exception as e:
+                logger.warning(f"⚠️ Classements tendance non mis à jour: {e}")
+
+            await asyncio.to_thread(self._acknowledge, db, outbox_ids, failed)
+            logger.info(
+                f"✅ Outbox: {len(outbox_ids)} entrées -> {len(upsert_ids)} upserts, "
+                f"{len(delete_ids)} suppressions, {len(failed)} en échec"
+            )
+            return len(outbox_ids)
+        except Exception as e:
+            logger.error(f"❌ Erreur drain outbox: {e}")
+            await asyncio.to_thread(db.rollback)
+            return 0
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def _heartbeat(self):
+        """Outbox vide : les classements restent à jour"""
+        try:
+            await trending_leaderboards.heartbeat()
+        except Exception as e:
+            logger.warning(f"⚠️ Battement des classements non écrit: {e}")
+
+    async def run_forever(self):
+        """Boucle de drain : enchaîne les lots tant que l'outbox est pleine, sinon attend"""
+        while True:
+            try:
+                consumed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur boucle outbox: {e}")
+                consumed = 0
+            if consumed < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Démarre la boucle en tâche de fond (avec ou sans Meilisearch)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Arrête la boucle de drain"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Instance globale
+search_outbox_drainer = SearchOutboxDrainer()
@@ -7,10 +7,14 @@ from datetime import datetime
 from typing import List
 from sqlalchemy.orm import Session  # type: ignore
 
-from db.base import SessionLocal
+from db.base import SessionLocal, engine
 from db.models import Post, Platform, Hashtag
+from db.partitions import ensure_snapshot_partitions
 from services.tiktok_service import tiktok_service
-from services.meilisearch_client import meilisearch_service
+from services.index_refresh import refresh_posts
+from services.leaderboards import trending_leaderboards
+from services.metric_snapshots import apply_growth_rates, record_snapshots
+from services.similarity_index import similar_posts_index
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -67,8 +71,20 @@ class TikTokSyncJob:
             # Sauvegarder dans PostgreSQL
             saved_count = self._save_posts_to_db(posts_data)
             
-            # Indexer dans Meilisearch
-            indexed_count = meilisearch_service.batch_index_posts(posts_data)
+            # Index de similarité (l'index de secours de chaque worker suit fetched_at)
+            await asyncio.to_thread(similar_posts_index.append_many, posts_data)
+            
+            # Classements tendance Redis (ZADD + troncature)
+            try:
+                await trending_leaderboards.update_many(posts_data)
+            except Exception as e:
+                logger.warning(f"⚠️ Classements tendance non mis à jour: {e}")
+            
+            # Indexer dans Meilisearch : seulement les posts modifiés, métriques seules en partiel
+            report = await refresh_posts(posts_data)
+            indexed_count = report.indexed
+            if report.failed_ids:
+                logger.warning(f"⚠️ #{hashtag_name}: {len(report.failed_ids)} posts non indexés: {report.failed_ids[:10]}")
             
             # Mettre à jour last_scraped
             hashtag.last_scraped = datetime.utcnow()
@@ -83,8 +99,23 @@ class TikTokSyncJob:
             return 0
     
     def _save_posts_to_db(self, posts_data: List[dict]) -> int:
-        """Sauvegarde les posts dans PostgreSQL"""
+        """Sauvegarde les posts dans PostgreSQL, avec un relevé de leurs métriques (même transaction)"""
         saved_count = 0
+        now = datetime.utcnow()
+        
+        # Partitions du jour même sans l'API (job lancé seul) : avant toute lecture de l'historique
+        # dans self.db, le DDL verrouille la table parente. Mis en cache par process.
+        try:
+            ensure_snapshot_partitions(engine, settings.METRIC_SNAPSHOT_PARTITIONS_AHEAD)
+        except Exception as e:
+            logger.error(f"❌ Partitions de l'historique des métriques non créées: {e}")
+        
+        # score_trend = croissance depuis les relevés précédents (avant l'upsert : repris par les classements)
+        try:
+            with self.db.begin_nested():
+                apply_growth_rates(self.db, posts_data, now)
+        except Exception as e:
+            logger.warning(f"⚠️ Taux de croissance non calculés: {e}")
         
         for post_data in posts_data:
             try:
@@ -111,6 +142,14 @@ class TikTokSyncJob:
                 logger.error(f"❌ Erreur sauvegarde post {post_data.get('id')}: {e}")
                 continue
         
+        # Historique append-only : un INSERT multi-lignes ; un échec (partition absente) ne perd pas les posts
+        self.db.flush()
+        try:
+            with self.db.begin_nested():
+                record_snapshots(self.db, posts_data, now)
+        except Exception as e:
+            logger.error(f"❌ Relevé des métriques non enregistré: {e}")
+        
         self.db.commit()
         return saved_count
     
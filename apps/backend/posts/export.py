@@ -0,0 +1,158 @@
+# posts/export.py
+# Export des posts en flux (NDJSON / CSV, gzip à la volée) depuis un curseur serveur
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson  # type: ignore
+from sqlalchemy import func, select  # type: ignore
+from sqlalchemy.orm import Query as SAQuery, Session  # type: ignore
+from sqlalchemy.sql.elements import ColumnElement  # type: ignore
+
+from db.base import SessionLocal
+from db.fulltext import fulltext_condition
+from db.models import Platform, Post
+from db.types import array_condition, metric_at_least
+from .projection import ORJSON_OPTIONS, POST_RESPONSE_COLUMNS, POST_RESPONSE_FIELDS, post_row_to_dict
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+EXPORT_BATCH_ROWS = 1000          # lignes lues par aller-retour du curseur serveur (yield_per)
+GZIP_LEVEL = 6
+
+def post_filter_conditions(
+    dialect: str,
+    platform: Optional[str] = None,
+    trending: bool = False,
+    language: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    hashtag: Optional[List[str]] = None,
+    min_likes: Optional[int] = None,
+    posted_after: Optional[datetime] = None,
+    posted_before: Optional[datetime] = None
+) -> List[ColumnElement]:
+    """Filtres de get_posts, de l'export et de la recherche en base (conditions WHERE sur Post).
+
+    Plateforme et langue sont insensibles à la casse, comme les classements Redis
+    et l'index de secours.
+    """
+    conditions = []
+    if platform:
+        conditions.append(Post.platform_id.in_(
+            select(Platform.id).where(func.lower(Platform.name) == platform.strip().lower())
+        ))
+    if trending:
+        conditions.append(Post.score_trend > 0)
+    if language:
+        conditions.append(func.lower(Post.language) == language.strip().lower())
+    if min_score is not None:
+        conditions.append(Post.score >= min_score)
+    if max_score is not None:
+        conditions.append(Post.score <= max_score)
+    if hashtag:
+        # Au moins un des hashtags (&& sur l'index GIN en PostgreSQL)
+        conditions.append(array_condition(dialect, Post.hashtags, hashtag))
+    if min_likes is not None:
+        conditions.append(metric_at_least(dialect, Post.metrics, 'likes', min_likes))
+    if posted_after is not None:
+        conditions.append(Post.posted_at >= posted_after)
+    if posted_before is not None:
+        conditions.append(Post.posted_at <= posted_before)
+    return conditions
+
+def export_query(
+    db: Session,
+    q: Optional[str] = None,
+    platform: Optional[str] = None,
+    trending: bool = False,
+    language: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    hashtag: Optional[List[str]] = None,
+    min_likes: Optional[int] = None,
+    posted_after: Optional[datetime] = None,
+    posted_before: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> SAQuery:
+    """Projection des colonnes de réponse avec les filtres de get_posts et de la recherche"""
+    dialect = db.get_bind().dialect.name
+    query = db.query(*POST_RESPONSE_COLUMNS).filter(*post_filter_conditions(
+        dialect, platform=platform, trending=trending, language=language, min_score=min_score,
+        max_score=max_score, hashtag=hashtag, min_likes=min_likes, posted_after=posted_after,
+        posted_before=posted_before
+    ))
+    if q and q.strip():
+        condition = fulltext_condition(dialect, q)
+        query = query.filter(condition if condition is not None else Post.caption.ilike(f"%{q}%"))
+
+    sort_column = Post.score_trend if trending else Post.posted_at
+    query = query.order_by(sort_column.desc().nulls_last(), Post.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    return b''.join(orjson.dumps(row, option=ORJSON_OPTIONS) + b'\n' for row in rows)
+
+def _encode_csv(rows: List[Dict[str, Any]], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(POST_RESPONSE_FIELDS)
+    for row in rows:
+        writer.writerow([_csv_value(row[field]) for field in POST_RESPONSE_FIELDS])
+    return buffer.getvalue().encode('utf-8')
+
+def stream_export(fmt: str, compress: bool, **filters: Any) -> Iterator[bytes]:
+    """Générateur de l'export : un lot du curseur serveur -> un bloc encodé (et compressé).
+
+    Ouvre sa propre session : la réponse est envoyée après la fermeture de celle de la
+    requête. La mémoire reste bornée par EXPORT_BATCH_ROWS quel que soit le volume.
+    """
+    db = SessionLocal()
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    try:
+        rows = export_query(db, **filters).yield_per(EXPORT_BATCH_ROWS)
+        batch: List[Dict[str, Any]] = []
+        first = True
+
+        def encode(batch: List[Dict[str, Any]], first: bool) -> bytes:
+            chunk = _encode_ndjson(batch) if fmt == 'ndjson' else _encode_csv(batch, header=first)
+            return compressor.compress(chunk) if compressor else chunk
+
+        for row in rows:
+            batch.append(post_row_to_dict(row))
+            if len(batch) >= EXPORT_BATCH_ROWS:
+                chunk = encode(batch, first)
+                batch, first = [], False
+                if chunk:
+                    yield chunk
+        if batch or first:
+            chunk = encode(batch, first)
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+def export_filename(fmt: str, compress: bool) -> str:
+    extension = EXPORT_FORMATS[fmt][1]
+    stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    return f"posts-{stamp}.{extension}" + ('.gz' if compress else '')
@@ -1,77 +1,527 @@
 # posts/posts_endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, Query  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from typing import List, Optional
-from db.base import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response  # type: ignore
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+from fastapi.responses import StreamingResponse  # type: ignore
+from sqlalchemy import func, select  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from db.base import AsyncSessionLocal, get_async_db
+from db.fulltext import fulltext_search
 from db.models import Post, Platform, User
 from auth_unified.auth_endpoints import get_current_user
-from services.meilisearch_client import meilisearch_service
-from .schemas import PostCreate, PostResponse, PostUpdate
+from services.circuit_breaker import hedged
+from services.fallback_index import fallback_post_index
+from services.leaderboards import leaderboard_key, trending_leaderboards
+from services.meilisearch_async import async_meilisearch_service
+from services.meilisearch_client import INDEXED_POST_FIELDS
+from services.search_cache import cached_search, cached_multi_search, search_cache_stats
+from services.similarity_index import feature_similarity, post_features, similar_posts_index
+from services.search_outbox import enqueue_post_change, OUTBOX_UPSERT, OUTBOX_DELETE
+from core.config import settings
+from core.fieldsets import FIELDS_DESCRIPTION, parse_fields
+from core.pagination import (
+    NEXT_CURSOR_HEADER, keyset_page, encode_cursor, decode_cursor, offset_cursor, decode_offset_cursor, set_next_cursor
+)
+from .export import EXPORT_FORMATS, export_filename, post_filter_conditions, stream_export
+from .projection import POST_RESPONSE_FIELDS, post_columns, post_list_response, post_response
+from .schemas import (
+    PostCreate, PostResponse, PostUpdate, SimilarPostResponse, FacetValue, SearchFacetsResponse,
+    SearchBatchRequest, SearchBatchResult
+)
 
 posts_router = APIRouter(prefix="/api/v1/posts", tags=["posts"])
 
+# Facettes exposées -> attribut Meilisearch
+SEARCH_FACETS = {
+    'platform': 'platform_name',
+    'language': 'language',
+    'hashtag': 'hashtags',
+    'score_bucket': 'score_bucket',
+}
+
+# Tri par défaut des recherches (partagé par /search et /search/batch : mêmes clés de cache)
+SEARCH_SORT = ['score_trend:desc', 'posted_at:desc']
+# Posts similaires hors index : candidats partageant un hashtag, classés en Python
+SIMILAR_DB_CANDIDATES = 200
+
+# Champs de PostResponse absents des documents Meilisearch
+_FIELDS_NOT_IN_INDEX = set(POST_RESPONSE_FIELDS) - set(INDEXED_POST_FIELDS)
+
 @posts_router.get("/", response_model=List[PostResponse])
-def get_posts(
-    skip: int = Query(0, ge=0),
+async def get_posts(
+    skip: int = Query(0, ge=0, description="Obsolète : préférer cursor"),
     limit: int = Query(100, ge=1, le=1000),
     platform: Optional[str] = Query(None),
     trending: bool = Query(False),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Curseur de page (en-tête X-Next-Cursor de la page précédente)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts avec filtres"""
-    query = db.query(Post)
+    """Récupérer les posts avec filtres (pagination keyset via X-Next-Cursor).
+
+    Jusqu'à 1000 posts : projection des colonnes de réponse (ou des seules `fields`)
+    et encodage orjson, sans instancier de Post ni valider chaque ligne avec PostResponse.
+    """
+    selected = parse_fields(fields, POST_RESPONSE_FIELDS)
+    if trending:
+        sort_column, kind = Post.score_trend, "posts:trending"
+    else:
+        sort_column, kind = Post.posted_at, "posts:recent"
+    stmt = select(*post_columns(selected, extra=('id', sort_column.key)))
     
     if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
+        stmt = stmt.join(Platform).where(Platform.name == platform)
     
     if trending:
-        query = query.filter(Post.score_trend > 0).order_by(Post.score_trend.desc())
-    else:
-        query = query.order_by(Post.posted_at.desc())
+        stmt = stmt.where(Post.score_trend > 0)
     
-    posts = query.offset(skip).limit(limit).all()
+    rows, next_cursor = await keyset_page(db, stmt, sort_column, Post.id, kind, limit, cursor, offset=skip)
+    return post_list_response(
+        rows, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None, fields=selected
+    )
+
+@posts_router.get("/export")
+async def export_posts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson ou csv"),
+    gzip: bool = Query(True, description="Compresser le flux (fichier .gz)"),
+    q: Optional[str] = Query(None, description="Recherche plein texte"),
+    platform: Optional[str] = Query(None),
+    trending: bool = Query(False),
+    language: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None, ge=0),
+    max_score: Optional[float] = Query(None, ge=0),
+    hashtag: Optional[List[str]] = Query(None, description="Au moins un de ces hashtags"),
+    min_likes: Optional[int] = Query(None, ge=0, description="Likes minimum (metrics.likes)"),
+    posted_after: Optional[datetime] = Query(None),
+    posted_before: Optional[datetime] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, description="Nombre maximum de posts (tous par défaut)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Export en flux de tous les posts filtrés (mêmes filtres que la liste et la recherche).
+
+    Lu par lots depuis un curseur serveur et compressé à la volée : mémoire constante.
+    Le flux reste sur le moteur synchrone (générateur itéré dans un thread par Starlette).
+    """
+    media_type, _ = EXPORT_FORMATS[format]
+    filters = dict(
+        q=q, platform=platform, trending=trending, language=language, min_score=min_score,
+        max_score=max_score, hashtag=hashtag, min_likes=min_likes, posted_after=posted_after,
+        posted_before=posted_before, limit=limit
+    )
+    headers = {"Content-Disposition": f'attachment; filename="{export_filename(format, gzip)}"'}
+    return StreamingResponse(
+        stream_export(format, gzip, **filters),
+        media_type="application/gzip" if gzip else media_type,
+        headers=headers,
+    )
+
+@posts_router.get("/search", response_model=List[PostResponse])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Terme de recherche"),
+    platform: Optional[str] = Query(None, description="Filtrer par plateforme"),
+    min_score: Optional[float] = Query(None, ge=0, description="Score minimum"),
+    max_score: Optional[float] = Query(None, ge=0, description="Score maximum"),
+    language: Optional[str] = Query(None, description="Filtrer par langue"),
+    hashtag: Optional[List[str]] = Query(None, description="Au moins un de ces hashtags"),
+    posted_after: Optional[datetime] = Query(None, description="Publié à partir de cette date"),
+    posted_before: Optional[datetime] = Query(None, description="Publié jusqu'à cette date"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    highlight: bool = Query(False, description="Surligner les termes trouvés dans caption"),
+    crop_length: Optional[int] = Query(None, ge=5, le=200, description="Recadrer caption autour des termes trouvés (en mots)"),
+    hydrate: bool = Query(False, description="Relire les posts depuis PostgreSQL"),
+    engine: str = Query("meili", pattern="^(meili|pg)$", description="Moteur: meili ou pg (plein texte PostgreSQL)"),
+    cursor: Optional[str] = Query(None, description="Curseur de page (en-tête X-Next-Cursor), remplace offset"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recherche de posts avec Meilisearch (fallback PostgreSQL si indisponible)"""
+    # Curseur opaque d'offset : le classement par pertinence n'a pas de clé de tri stable
+    fingerprint = _search_fingerprint(
+        q, platform, min_score, max_score, language, hashtag, posted_after, posted_before, engine
+    )
+    if cursor:
+        offset = decode_offset_cursor(cursor, "search", fingerprint)
+    
+    posts = await _run_search(
+        q, platform, min_score, max_score, language, hashtag, posted_after, posted_before,
+        limit, offset, highlight, crop_length, hydrate, engine, db
+    )
+    if len(posts) == limit:
+        set_next_cursor(response, offset_cursor("search", offset + limit, fingerprint))
     return posts
 
+def _search_fingerprint(*params: Any) -> str:
+    """Empreinte des paramètres d'une recherche (un curseur ne vaut que pour sa recherche)"""
+    raw = json.dumps(params, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+async def _run_search(
+    q: str,
+    platform: Optional[str],
+    min_score: Optional[float],
+    max_score: Optional[float],
+    language: Optional[str],
+    hashtag: Optional[List[str]],
+    posted_after: Optional[datetime],
+    posted_before: Optional[datetime],
+    limit: int,
+    offset: int,
+    highlight: bool,
+    crop_length: Optional[int],
+    hydrate: bool,
+    engine: str,
+    db: AsyncSession
+) -> List[Any]:
+    """Meilisearch avec disjoncteur et hedging, ou plein texte PostgreSQL (engine=pg)"""
+    filters = _search_filters(
+        platform, min_score, language,
+        max_score=max_score, hashtags=hashtag,
+        posted_after=posted_after, posted_before=posted_before
+    )
+    if engine == "pg":
+        return await _search_posts_db(db, q, filters, limit, offset)
+    
+    if not async_meilisearch_service.enabled:
+        posts, _ = await _fallback_search(db, q, filters, limit, offset)
+        return posts
+    
+    async def meilisearch_hits() -> Optional[List[Any]]:
+        """Meilisearch (appel asyncio, ne bloque pas de thread), None si indisponible ou vide"""
+        try:
+            results = await cached_search(
+                query=q,
+                limit=limit,
+                offset=offset,
+                filters=filters,
+                sort=SEARCH_SORT,
+                options=_search_options(highlight, crop_length)
+            )
+        except Exception:
+            return None
+        
+        hits = results.get('hits', [])
+        if not hits:
+            return None
+        # Les documents de l'index contiennent tous les champs de PostResponse :
+        # PostgreSQL n'est relu que sur demande explicite ou pour un champ non indexé
+        if hydrate or _FIELDS_NOT_IN_INDEX:
+            hit_ids = [hit.get('id') for hit in hits]
+            return await _fetch_posts_in_order(db, hit_ids)
+        return [_post_from_hit(hit) for hit in hits]
+    
+    async def fallback_hits() -> List[Any]:
+        # Session dédiée : peut tourner en même temps que meilisearch_hits (hydrate)
+        posts, _ = await _fallback_search(None, q, filters, limit, offset)
+        return posts
+    
+    # Disjoncteur ouvert : cached_search échoue aussitôt et la recherche de secours répond.
+    # Sinon, si Meilisearch dépasse son p95 récent, la recherche de secours part en parallèle.
+    delay = None
+    if settings.MEILI_HEDGE_ENABLED:
+        delay = async_meilisearch_service.breaker.hedge_delay(minimum=settings.MEILI_HEDGE_MIN_DELAY)
+    return await hedged(meilisearch_hits, fallback_hits, delay)
+
+@posts_router.get("/search/facets", response_model=SearchFacetsResponse)
+async def search_posts_facets(
+    q: str = Query("", description="Terme de recherche (vide = tous les posts)"),
+    platform: Optional[str] = Query(None, description="Filtrer par plateforme"),
+    min_score: Optional[float] = Query(None, ge=0, description="Score minimum"),
+    language: Optional[str] = Query(None, description="Filtrer par langue"),
+    hashtag: Optional[List[str]] = Query(None, description="Au moins un de ces hashtags"),
+    posted_after: Optional[datetime] = Query(None, description="Publié à partir de cette date"),
+    posted_before: Optional[datetime] = Query(None, description="Publié jusqu'à cette date"),
+    facets: List[str] = Query(list(SEARCH_FACETS), description="Facettes à calculer"),
+    facet: Optional[str] = Query(None, description="Facette sur laquelle exécuter facet_query"),
+    facet_query: Optional[str] = Query(None, description="Recherche dans les valeurs de la facette"),
+    current_user: User = Depends(get_current_user)
+):
+    """Compteurs par plateforme, langue, hashtag et tranche de score pour une recherche"""
+    unknown = [name for name in facets + ([facet] if facet else []) if name not in SEARCH_FACETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Facettes inconnues: {', '.join(unknown)}")
+    
+    if not async_meilisearch_service.enabled:
+        raise HTTPException(status_code=503, detail="Meilisearch indisponible")
+    
+    filters = _search_filters(
+        platform, min_score, language,
+        hashtags=hashtag, posted_after=posted_after, posted_before=posted_before
+    )
+    
+    # limit=0 : uniquement la distribution des facettes, pas de documents
+    results = await cached_search(
+        query=q,
+        limit=0,
+        filters=filters,
+        options={'facets': [SEARCH_FACETS[name] for name in facets] + ['score']}
+    )
+    distribution = results.get('facetDistribution') or {}
+    
+    response = SearchFacetsResponse(
+        query=q,
+        total_hits=results.get('estimatedTotalHits', results.get('totalHits', 0)),
+        facets={name: distribution.get(SEARCH_FACETS[name], {}) for name in facets},
+        facet_stats=results.get('facetStats') or {},
+    )
+    
+    if facet and facet_query is not None:
+        try:
+            facet_results = await async_meilisearch_service.facet_search(
+                SEARCH_FACETS[facet],
+                facet_query,
+                query=q,
+                filters=filters
+            )
+            response.facet_hits = [
+                FacetValue(value=hit['value'], count=hit['count'])
+                for hit in facet_results.get('facetHits', [])
+            ]
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Erreur facet search: {str(e)}")
+    
+    return response
+
+@posts_router.get("/search/cache-stats")
+async def get_search_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Compteurs hit/miss du cache de recherche"""
+    try:
+        return await search_cache_stats()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache indisponible: {str(e)}")
+
+@posts_router.post("/search/batch", response_model=List[SearchBatchResult])
+async def search_posts_batch(
+    payload: SearchBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Plusieurs recherches en un appel (widgets du dashboard).
+
+    Les requêtes absentes du cache partent en un seul /multi-search Meilisearch.
+    Les résultats sont retournés dans l'ordre des requêtes.
+    """
+    if len(payload.queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Trop de requêtes ({len(payload.queries)}), maximum {settings.SEARCH_BATCH_MAX_QUERIES}"
+        )
+    
+    if async_meilisearch_service.enabled:
+        try:
+            results = await cached_multi_search([
+                {
+                    'query': item.q,
+                    'limit': item.limit,
+                    'offset': item.offset,
+                    'filters': _search_filters(
+                        item.platform, item.min_score, item.language,
+                        max_score=item.max_score, hashtags=item.hashtags,
+                        posted_after=item.posted_after, posted_before=item.posted_before
+                    ),
+                    'sort': SEARCH_SORT,
+                    'options': _search_options(),
+                }
+                for item in payload.queries
+            ])
+            
+            if _FIELDS_NOT_IN_INDEX:
+                # Un seul aller-retour PostgreSQL pour tous les hits du lot
+                hit_ids = [hit.get('id') for result in results for hit in result.get('hits', [])]
+                posts = await _fetch_posts_in_order(db, hit_ids)
+                post_dict = {post.id: post for post in posts}
+                hits_per_query = [
+                    [post_dict[hit.get('id')] for hit in result.get('hits', []) if hit.get('id') in post_dict]
+                    for result in results
+                ]
+            else:
+                hits_per_query = [
+                    [_post_from_hit(hit) for hit in result.get('hits', [])]
+                    for result in results
+                ]
+            
+            return [
+                SearchBatchResult(
+                    query=item.q,
+                    total_hits=result.get('estimatedTotalHits', result.get('totalHits', 0)),
+                    hits=hits,
+                )
+                for item, result, hits in zip(payload.queries, results, hits_per_query)
+            ]
+        except Exception as e:
+            # Fallback sur PostgreSQL si Meilisearch échoue
+            pass
+    
+    # Fallback: index inversé en mémoire, sinon recherches PostgreSQL basiques
+    batch = []
+    for item in payload.queries:
+        filters = _search_filters(
+            item.platform, item.min_score, item.language,
+            max_score=item.max_score, hashtags=item.hashtags,
+            posted_after=item.posted_after, posted_before=item.posted_before
+        )
+        posts, total = await _fallback_search(db, item.q, filters, item.limit, item.offset)
+        batch.append(SearchBatchResult(query=item.q, total_hits=total, hits=posts))
+    return batch
+
+def _search_filters(
+    platform: Optional[str] = None,
+    min_score: Optional[float] = None,
+    language: Optional[str] = None,
+    max_score: Optional[float] = None,
+    hashtags: Optional[List[str]] = None,
+    posted_after: Optional[datetime] = None,
+    posted_before: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """Filtres Meilisearch d'une recherche (None si aucun), compilés par services.search_filters"""
+    filters: Dict[str, Any] = {}
+    if platform:
+        filters['platform_name'] = platform
+    if min_score is not None:
+        filters['min_score'] = min_score
+    if max_score is not None:
+        filters['max_score'] = max_score
+    if language:
+        filters['language'] = language
+    if hashtags:
+        filters['hashtags'] = hashtags
+    if posted_after is not None:
+        filters['posted_after'] = posted_after
+    if posted_before is not None:
+        filters['posted_before'] = posted_before
+    return filters or None
+
+def _search_options(highlight: bool = False, crop_length: Optional[int] = None) -> Dict[str, Any]:
+    """Options Meilisearch : champs de la réponse uniquement, surlignage / recadrage de caption"""
+    options: Dict[str, Any] = {'attributesToRetrieve': POST_RESPONSE_FIELDS}
+    if highlight:
+        options['attributesToHighlight'] = ['caption']
+        options['highlightPreTag'] = '<mark>'
+        options['highlightPostTag'] = '</mark>'
+    if crop_length:
+        options['attributesToCrop'] = ['caption']
+        options['cropLength'] = crop_length
+    return options
+
+def _post_from_hit(hit: Dict[str, Any]) -> PostResponse:
+    """Construit la réponse directement depuis un document Meilisearch"""
+    data = {field: hit[field] for field in POST_RESPONSE_FIELDS if field in hit}
+    formatted = hit.get('_formatted') or {}
+    if formatted.get('caption') is not None:
+        data['caption'] = formatted['caption']
+    return PostResponse(**data)
+
+async def _fetch_posts_in_order(db: AsyncSession, hit_ids: List[str]) -> List[Post]:
+    """Charge les posts depuis PostgreSQL dans l'ordre des hits Meilisearch"""
+    posts = (await db.scalars(select(Post).where(Post.id.in_(hit_ids)))).all()
+    post_dict = {post.id: post for post in posts}
+    return [post_dict[pid] for pid in hit_ids if pid in post_dict]
+
+async def _fallback_search(
+    db: Optional[AsyncSession],
+    q: str,
+    filters: Optional[Dict[str, Any]],
+    limit: int,
+    offset: int
+) -> Tuple[List[Any], int]:
+    """Recherche dégradée : index en mémoire s'il est à jour, sinon plein texte PostgreSQL.
+
+    filters : dict de _search_filters, appliqué en entier comme par Meilisearch.
+    Sans session (db=None), une session dédiée est ouverte pour la requête.
+    """
+    if fallback_post_index.fresh:
+        documents, total = fallback_post_index.search(q, limit, offset, filters)
+        return [_post_from_hit(document) for document in documents], total
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            posts = await _search_posts_db(session, q, filters, limit, offset)
+    else:
+        posts = await _search_posts_db(db, q, filters, limit, offset)
+    return posts, len(posts)
+
+async def _search_posts_db(
+    db: AsyncSession,
+    q: str,
+    filters: Optional[Dict[str, Any]],
+    limit: int,
+    offset: int
+) -> List[Post]:
+    """Recherche plein texte PostgreSQL (tsvector / FTS5), ILIKE si le schéma plein texte manque.
+
+    filters : dict de _search_filters, traduit avec les mêmes conditions que l'export.
+    """
+    filters = filters or {}
+    conditions = post_filter_conditions(
+        db.get_bind().dialect.name,
+        platform=filters.get('platform_name'),
+        language=filters.get('language'),
+        min_score=filters.get('min_score'),
+        max_score=filters.get('max_score'),
+        hashtag=filters.get('hashtags'),
+        posted_after=filters.get('posted_after'),
+        posted_before=filters.get('posted_before'),
+    )
+    if q.strip():
+        try:
+            return await fulltext_search(db, q, conditions, limit, offset)
+        except Exception:
+            await db.rollback()
+    
+    # Recherche basique dans caption
+    stmt = select(Post).where(*conditions, Post.caption.ilike(f"%{q}%"))
+    
+    stmt = stmt.order_by(Post.score_trend.desc(), Post.posted_at.desc()).offset(offset).limit(limit)
+    return list((await db.scalars(stmt)).all())
+
 @posts_router.get("/{post_id}", response_model=PostResponse)
-def get_post(
+async def get_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer un post par ID"""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    selected = parse_fields(fields, POST_RESPONSE_FIELDS)
+    row = (await db.execute(select(*post_columns(selected)).where(Post.id == post_id))).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Post non trouvé")
-    return post
+    return post_response(row, selected)
 
 @posts_router.post("/", response_model=PostResponse)
-def create_post(
+async def create_post(
     post_in: PostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Créer un nouveau post"""
     # Vérifier que la plateforme existe
-    platform = db.query(Platform).filter(Platform.id == post_in.platform_id).first()
+    platform = await db.get(Platform, post_in.platform_id)
     if not platform:
         raise HTTPException(status_code=400, detail="Plateforme non trouvée")
     
     post = Post(**post_in.dict())
     db.add(post)
-    db.commit()
-    db.refresh(post)
+    enqueue_post_change(db, post.id, OUTBOX_UPSERT)
+    await db.commit()
+    await db.refresh(post)
     return post
 
 @posts_router.put("/{post_id}", response_model=PostResponse)
-def update_post(
+async def update_post(
     post_id: str,
     post_in: PostUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mettre à jour un post"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post non trouvé")
     
@@ -79,105 +529,159 @@ def update_post(
     for field, value in update_data.items():
         setattr(post, field, value)
     
-    db.commit()
-    db.refresh(post)
+    enqueue_post_change(db, post.id, OUTBOX_UPSERT)
+    await db.commit()
+    await db.refresh(post)
     return post
 
 @posts_router.delete("/{post_id}")
-def delete_post(
+async def delete_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Supprimer un post"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post non trouvé")
     
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    enqueue_post_change(db, post.id, OUTBOX_DELETE)
+    await db.commit()
     return {"message": "Post supprimé"}
 
+async def _fetch_rows_in_order(db: AsyncSession, columns: List[Any], post_ids: List[str]) -> List[Any]:
+    """Lignes projetées des posts, dans l'ordre des ids donnés"""
+    result = await db.execute(select(*columns).where(Post.id.in_(post_ids)))
+    rows = {row.id: row for row in result.all()}
+    return [rows[pid] for pid in post_ids if pid in rows]
+
+async def _trending_page(
+    db: AsyncSession,
+    key: str,
+    columns: List[Any],
+    stmt: Any,
+    limit: int,
+    cursor: Optional[str]
+) -> Tuple[List[Any], Optional[str]]:
+    """Page tendance depuis le classement Redis, PostgreSQL (keyset) s'il ne peut pas répondre.
+
+    Les deux sources trient par (score_trend DESC, id DESC) et un curseur émis par l'une
+    est repris par l'autre ; les ex aequo ne suivent le même ordre que si la collation
+    de posts.id coïncide avec l'ordre des octets de Redis (voir TrendingLeaderboards).
+    """
+    after = None
+    if cursor:
+        last = decode_cursor(cursor, "posts:trending")
+        if last.get('v') is not None and last.get('id') is not None:
+            after = (float(last['v']), str(last['id']))
+    entries = await trending_leaderboards.top(key, limit, after) if after or not cursor else None
+    if entries is None:
+        return await keyset_page(db, stmt, Post.score_trend, Post.id, "posts:trending", limit, cursor)
+
+    page = entries[:limit]
+    posts = await _fetch_rows_in_order(db, columns, [post_id for post_id, _ in page])
+    missing = {post_id for post_id, _ in page} - {post.id for post in posts}
+    if missing:
+        # Supprimés sans passer par l'outbox : nettoyage à la lecture
+        await trending_leaderboards.remove_many(missing)
+    next_cursor = None
+    if len(entries) > limit:
+        last_id, last_score = page[-1]
+        next_cursor = encode_cursor("posts:trending", v=last_score, id=last_id)
+    return posts, next_cursor
+
 @posts_router.get("/trending/global", response_model=List[PostResponse])
-def get_trending_posts_global(
+async def get_trending_posts_global(
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Curseur de page (en-tête X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts les plus tendance globalement"""
-    posts = db.query(Post).filter(Post.score_trend > 0).order_by(Post.score_trend.desc()).limit(limit).all()
-    return posts
+    """Récupérer les posts les plus tendance globalement (classement Redis)"""
+    selected = parse_fields(fields, POST_RESPONSE_FIELDS)
+    columns = post_columns(selected, extra=('id', 'score_trend'))
+    stmt = select(*columns).where(Post.score_trend > 0)
+    rows, next_cursor = await _trending_page(db, leaderboard_key(), columns, stmt, limit, cursor)
+    return post_list_response(
+        rows, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None, fields=selected
+    )
 
 @posts_router.get("/trending/{platform_name}", response_model=List[PostResponse])
-def get_trending_posts_platform(
+async def get_trending_posts_platform(
     platform_name: str,
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Curseur de page (en-tête X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts les plus tendance pour une plateforme"""
-    posts = db.query(Post).join(Platform).filter(
-        Platform.name == platform_name,
+    """Récupérer les posts les plus tendance pour une plateforme (classement Redis)"""
+    selected = parse_fields(fields, POST_RESPONSE_FIELDS)
+    columns = post_columns(selected, extra=('id', 'score_trend'))
+    # Même normalisation que la clé du classement (leaderboard_key)
+    stmt = select(*columns).join(Platform).where(
+        func.lower(Platform.name) == platform_name.strip().lower(),
         Post.score_trend > 0
-    ).order_by(Post.score_trend.desc()).limit(limit).all()
-    return posts
+    )
+    key = leaderboard_key('platform', platform_name)
+    rows, next_cursor = await _trending_page(db, key, columns, stmt, limit, cursor)
+    return post_list_response(
+        rows, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None, fields=selected
+    )
 
-@posts_router.get("/search", response_model=List[PostResponse])
-def search_posts(
-    q: str = Query(..., min_length=1, description="Terme de recherche"),
-    platform: Optional[str] = Query(None, description="Filtrer par plateforme"),
-    min_score: Optional[float] = Query(None, ge=0, description="Score minimum"),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+# Déclarée après /trending/{platform_name} pour ne pas capturer /trending/similar
+@posts_router.get("/{post_id}/similar", response_model=List[SimilarPostResponse])
+async def get_similar_posts(
+    post_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Recherche de posts avec Meilisearch (fallback PostgreSQL si indisponible)"""
-    # Essayer d'abord avec Meilisearch
-    if meilisearch_service.client:
-        try:
-            filters = {}
-            if platform:
-                filters['platform_name'] = platform
-            if min_score is not None:
-                filters['min_score'] = min_score
-            
-            sort = ['score_trend:desc', 'posted_at:desc']
-            
-            results = meilisearch_service.search_posts(
-                query=q,
-                limit=limit,
-                offset=offset,
-                filters=filters if filters else None,
-                sort=sort
-            )
-            
-            # Récupérer les IDs des posts trouvés
-            hit_ids = [hit.get('id') for hit in results.get('hits', [])]
-            
-            if hit_ids:
-                # Récupérer les posts complets depuis PostgreSQL
-                posts = db.query(Post).filter(Post.id.in_(hit_ids)).all()
-                # Trier selon l'ordre Meilisearch
-                post_dict = {post.id: post for post in posts}
-                posts = [post_dict[pid] for pid in hit_ids if pid in post_dict]
-                return posts
-            
-        except Exception as e:
-            # Fallback sur PostgreSQL si Meilisearch échoue
-            pass
-    
-    # Fallback: recherche PostgreSQL basique
-    query = db.query(Post)
-    
-    if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
-    
-    if min_score is not None:
-        query = query.filter(Post.score >= min_score)
-    
-    # Recherche basique dans caption
-    query = query.filter(Post.caption.ilike(f"%{q}%"))
+    """Posts les plus proches (caption + hashtags), index TF-IDF local.
+
+    Index pas encore construit ou sans ce post (pas encore repris par le drainer) :
+    posts partageant un hashtag, classés par similarité des termes.
+    """
+    post = await db.get(Post, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post non trouvé")
     
-    posts = query.order_by(Post.score_trend.desc(), Post.posted_at.desc()).offset(offset).limit(limit).all()
-    return posts
+    # Calcul numpy et lecture des fichiers de l'index : hors de la boucle asyncio
+    neighbours = await run_in_threadpool(_indexed_neighbours, post, limit)
+    if neighbours is None:
+        neighbours = await _similar_posts_db(db, post, limit)
+    scores = dict(neighbours)
+    posts = await _fetch_posts_in_order(db, [pid for pid, _ in neighbours])
+    return [
+        SimilarPostResponse(
+            **PostResponse.model_validate(similar).model_dump(),
+            similarity=round(scores[similar.id], 4)
+        )
+        for similar in posts
+    ]
+
+def _indexed_neighbours(post: Post, limit: int) -> Optional[List[Tuple[str, float]]]:
+    """Voisins depuis l'index de similarité, None s'il ne contient pas le post"""
+    similar_posts_index.refresh()
+    if post.id not in similar_posts_index:
+        return None
+    return similar_posts_index.similar(post.id, post.caption, post.hashtags, limit)
+
+async def _similar_posts_db(db: AsyncSession, post: Post, limit: int) -> List[Tuple[str, float]]:
+    """Repli sans index : posts partageant un hashtag, cosinus des termes (sans IDF)"""
+    hashtags = [str(tag) for tag in post.hashtags or []]
+    if not hashtags:
+        return []
+    conditions = post_filter_conditions(db.get_bind().dialect.name, hashtag=hashtags)
+    rows = (await db.execute(
+        select(Post.id, Post.caption, Post.hashtags)
+        .where(Post.id != post.id, *conditions)
+        .order_by(Post.score_trend.desc())
+        .limit(SIMILAR_DB_CANDIDATES)
+    )).all()
+    query = post_features(post.caption, post.hashtags)
+    scored = [(row.id, feature_similarity(query, post_features(row.caption, row.hashtags))) for row in rows]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [(post_id, score) for post_id, score in scored[:limit] if score > 0]
@@ -0,0 +1,74 @@
+# posts/projection.py
+# Chemin rapide des listes de posts : projection des seules colonnes de réponse + encodage orjson
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson  # type: ignore
+from fastapi import Response  # type: ignore
+
+from core.fieldsets import select_columns
+from db.models import Post
+from .schemas import PostResponse
+
+# Champs de PostResponse, dans l'ordre de sérialisation de Pydantic
+POST_RESPONSE_FIELDS = list(PostResponse.model_fields)
+POST_RESPONSE_COLUMNS = [getattr(Post, field) for field in POST_RESPONSE_FIELDS]
+
+# Colonnes JSON (décodées par db.types ; texte brut toléré), et champs float que Pydantic
+# coerce (un 0 entier devient 0.0)
+_JSON_TEXT_FIELDS = {'hashtags': list, 'metrics': dict}
+_FLOAT_FIELDS = ('sentiment', 'score', 'score_trend')
+
+# OPT_UTC_Z : datetimes UTC en "...Z", comme Pydantic. Le document JSON est celui de la réponse
+# validée, pas les octets : orjson écrit les exposants sans "+" ni zéro (1e-5, 1e16 et non 1e-05, 1e+16)
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+def _decode_json_text(value: Any, expected: type) -> Any:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else None
+        except ValueError:
+            return None
+    return value if isinstance(value, expected) else None
+
+def post_columns(fields: Optional[Sequence[str]] = None, extra: Sequence[str] = ()) -> List[Any]:
+    """Colonnes projetées : tous les champs de réponse, ou seulement ceux demandés (fields=)"""
+    if fields is None:
+        return POST_RESPONSE_COLUMNS
+    return select_columns(Post, fields, extra)
+
+def post_row_to_dict(row: Any, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Ligne projetée (post_columns) -> dict identique à PostResponse.model_dump(),
+    restreint aux champs demandés (les colonnes de tri en plus sont ignorées)"""
+    data = dict(zip(fields or POST_RESPONSE_FIELDS, row))
+    for field, expected in _JSON_TEXT_FIELDS.items():
+        if field in data:
+            data[field] = _decode_json_text(data[field], expected)
+    for field in _FLOAT_FIELDS:
+        if data.get(field) is not None:
+            data[field] = float(data[field])
+    return data
+
+def encode_post_rows(rows: Iterable[Any], fields: Optional[Sequence[str]] = None) -> bytes:
+    """Encode des lignes projetées en JSON (même document que la réponse validée par Pydantic)"""
+    return orjson.dumps([post_row_to_dict(row, fields) for row in rows], option=ORJSON_OPTIONS)
+
+def post_list_response(
+    rows: Iterable[Any],
+    headers: Optional[Dict[str, str]] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Response:
+    """Réponse JSON d'une liste de posts sans passer par la validation du response_model.
+
+    Les en-têtes doivent être passés ici : ceux posés sur le paramètre Response de
+    la route sont ignorés quand la route retourne elle-même une Response.
+    """
+    return Response(content=encode_post_rows(rows, fields), media_type="application/json", headers=headers)
+
+def post_response(row: Any, fields: Optional[Sequence[str]] = None) -> Response:
+    """Réponse JSON d'un post projeté"""
+    return Response(
+        content=orjson.dumps(post_row_to_dict(row, fields), option=ORJSON_OPTIONS),
+        media_type="application/json"
+    )
@@ -1,8 +1,22 @@
 # posts/schemas.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+def _integer_likes(metrics: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """metrics.likes entier (12.0 / "12" acceptés, 12.7 refusé) : l'index ix_posts_likes
+    ne couvre que les valeurs numériques de 18 chiffres au plus"""
+    if not metrics or metrics.get('likes') is None:
+        return metrics
+    likes = metrics['likes']
+    if isinstance(likes, float) and likes.is_integer():
+        likes = int(likes)
+    elif isinstance(likes, str) and likes.strip().lstrip('-').isdigit():
+        likes = int(likes)
+    if isinstance(likes, bool) or not isinstance(likes, int) or abs(likes) >= 10 ** 18:
+        raise ValueError("metrics.likes doit être un entier")
+    return {**metrics, 'likes': likes}
+
 class PostBase(BaseModel):
     platform_id: int
     author: Optional[str] = None
@@ -19,6 +33,8 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     id: str
 
+    _metrics_likes = field_validator('metrics')(_integer_likes)
+
 class PostUpdate(BaseModel):
     author: Optional[str] = None
     caption: Optional[str] = None
@@ -31,6 +47,8 @@ class PostUpdate(BaseModel):
     score: Optional[float] = None
     score_trend: Optional[float] = None
 
+    _metrics_likes = field_validator('metrics')(_integer_likes)
+
 class PostResponse(PostBase):
     id: str
     platform_id: int
@@ -38,3 +56,39 @@ class PostResponse(PostBase):
     
     class Config:
         from_attributes = True
+
+
+class SimilarPostResponse(PostResponse):
+    similarity: float  # cosinus TF-IDF (0..1)
+
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+class SearchFacetsResponse(BaseModel):
+    query: str
+    total_hits: int
+    facets: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # {"platform": {"tiktok": 42}}
+    facet_stats: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # {"score": {"min": 0, "max": 12.5}}
+    facet_hits: Optional[List[FacetValue]] = None  # Résultat de facet_query
+
+class SearchQuery(BaseModel):
+    q: str = ""
+    platform: Optional[str] = None
+    min_score: Optional[float] = Field(default=None, ge=0)
+    max_score: Optional[float] = Field(default=None, ge=0)
+    language: Optional[str] = None
+    hashtags: Optional[List[str]] = None
+    posted_after: Optional[datetime] = None
+    posted_before: Optional[datetime] = None
+    limit: int = Field(default=20, ge=1, le=100)
+    offset: int = Field(default=0, ge=0)
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchQuery] = Field(..., min_length=1)
+
+class SearchBatchResult(BaseModel):
+    query: str
+    total_hits: int
+    hits: List[PostResponse]
@@ -1,10 +1,15 @@
 # projects/projects_endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 import json
 
-from db.base import get_db
+from core.fieldsets import FIELDS_DESCRIPTION, parse_fields, pick_fields, select_columns
+from db.base import get_async_db
 from db.models import Project, User, ProjectHashtag, ProjectCreator, Hashtag, Platform
 from auth_unified.auth_endpoints import get_current_user
 from projects.schemas import ProjectCreate, ProjectUpdate, ProjectResponse
@@ -48,34 +53,79 @@ def serialize_project(project: Project, include_relations: bool = True) -> dict:
     
     return result
 
+# Champs de ProjectResponse : colonnes de la table, puis relations (détail uniquement)
+PROJECT_RELATION_FIELDS = ('hashtags', 'creators')
+PROJECT_RESPONSE_FIELDS = list(ProjectResponse.model_fields)
+PROJECT_COLUMN_FIELDS = [f for f in PROJECT_RESPONSE_FIELDS if f not in PROJECT_RELATION_FIELDS]
+
+def serialize_project_columns(row, fields: List[str]) -> dict:
+    """Sérialise une ligne projetée (fields=) comme serialize_project"""
+    result = dict(zip(fields, row))
+    if 'platforms' in result:
+        result['platforms'] = json.loads(result['platforms']) if result['platforms'] else []
+    return jsonable_encoder(result)
+
+async def _get_user_project(
+    db: AsyncSession,
+    project_id: int,
+    user_id: int,
+    with_relations: bool = False
+) -> Optional[Project]:
+    """Projet de l'utilisateur ; hashtags et créateurs chargés d'avance si demandés
+    (pas de lazy load implicite en async, populate_existing relit après un commit)"""
+    stmt = select(Project).where(Project.id == project_id, Project.user_id == user_id)
+    if with_relations:
+        stmt = stmt.options(
+            selectinload(Project.hashtags), selectinload(Project.creators)
+        ).execution_options(populate_existing=True)
+    return await db.scalar(stmt)
+
 @projects_router.get("", response_model=List[ProjectResponse])
-def list_projects(
-    db: Session = Depends(get_db),
+async def list_projects(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Liste tous les projets de l'utilisateur"""
-    projects = db.query(Project).filter(Project.user_id == current_user.id).all()
+    selected = parse_fields(fields, PROJECT_COLUMN_FIELDS)
+    if selected:
+        rows = (await db.execute(
+            select(*select_columns(Project, selected)).where(Project.user_id == current_user.id)
+        )).all()
+        return JSONResponse([serialize_project_columns(row, selected) for row in rows])
+    projects = (await db.scalars(select(Project).where(Project.user_id == current_user.id))).all()
     return [serialize_project(p, include_relations=False) for p in projects]
 
 @projects_router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer un projet spécifique"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    selected = parse_fields(fields, PROJECT_RESPONSE_FIELDS)
+    if selected and not set(selected) & set(PROJECT_RELATION_FIELDS):
+        # Colonnes seules : pas de chargement de l'entité ni des relations
+        row = (await db.execute(select(*select_columns(Project, selected)).where(
+            Project.id == project_id,
+            Project.user_id == current_user.id
+        ))).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return JSONResponse(serialize_project_columns(row, selected))
+    
+    project = await _get_user_project(db, project_id, current_user.id, with_relations=True)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    if selected:
+        return JSONResponse(jsonable_encoder(pick_fields(serialize_project(project), selected)))
     return serialize_project(project)
 
 @projects_router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-def create_project(
+async def create_project(
     project_in: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Créer un nouveau projet avec hashtags et créateurs"""
@@ -94,7 +144,7 @@ def create_project(
         **project_data
     )
     db.add(project)
-    db.flush()  # Pour obtenir l'ID du projet
+    await db.flush()  # Pour obtenir l'ID du projet
     
     # Ajouter les hashtags (créer ou réutiliser ceux existants)
     hashtag_names = project_in.hashtag_names or []
@@ -107,15 +157,15 @@ def create_project(
         platforms = project_in.platforms or []
         for platform_name in platforms:
             # Trouver la plateforme
-            platform = db.query(Platform).filter(Platform.name == platform_name.lower()).first()
+            platform = await db.scalar(select(Platform).where(Platform.name == platform_name.lower()))
             if not platform:
                 continue
             
             # Chercher le hashtag existant
-            hashtag = db.query(Hashtag).filter(
+            hashtag = await db.scalar(select(Hashtag).where(
                 Hashtag.name == normalized_name,
                 Hashtag.platform_id == platform.id
-            ).first()
+            ))
             
             # Créer si n'existe pas
             if not hashtag:
@@ -124,13 +174,13 @@ def create_project(
                     platform_id=platform.id
                 )
                 db.add(hashtag)
-                db.flush()
+                await db.flush()
             
             # Créer la liaison (éviter doublons)
-            existing_link = db.query(ProjectHashtag).filter(
+            existing_link = await db.scalar(select(ProjectHashtag).where(
                 ProjectHashtag.project_id == project.id,
                 ProjectHashtag.hashtag_id == hashtag.id
-            ).first()
+            ))
             
             if not existing_link:
                 project_hashtag = ProjectHashtag(
@@ -148,16 +198,16 @@ def create_project(
         # Trouver la plateforme
         platforms = project_in.platforms or ['instagram']  # Default Instagram
         for platform_name in platforms:
-            platform = db.query(Platform).filter(Platform.name == platform_name.lower()).first()
+            platform = await db.scalar(select(Platform).where(Platform.name == platform_name.lower()))
             if not platform:
                 continue
             
             # Créer la liaison (éviter doublons)
-            existing_creator = db.query(ProjectCreator).filter(
+            existing_creator = await db.scalar(select(ProjectCreator).where(
                 ProjectCreator.project_id == project.id,
                 ProjectCreator.platform_id == platform.id,
                 ProjectCreator.creator_username == normalized_username
-            ).first()
+            ))
             
             if not existing_creator:
                 project_creator = ProjectCreator(
@@ -171,22 +221,19 @@ def create_project(
     # Mettre à jour les compteurs
     project.creators_count = creators_count
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    project = await _get_user_project(db, project.id, current_user.id, with_relations=True)
     return serialize_project(project)
 
 @projects_router.put("/{project_id}", response_model=ProjectResponse)
-def update_project(
+async def update_project(
     project_id: int,
     project_in: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mettre à jour un projet"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = await _get_user_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -207,7 +254,7 @@ def update_project(
     # Gérer les hashtags si fournis
     if project_in.hashtag_names is not None:
         # Supprimer les anciennes liaisons
-        db.query(ProjectHashtag).filter(ProjectHashtag.project_id == project.id).delete()
+        await db.execute(delete(ProjectHashtag).where(ProjectHashtag.project_id == project.id))
         
         # Ajouter les nouveaux hashtags (même logique que create)
         hashtag_names = project_in.hashtag_names or []
@@ -215,24 +262,24 @@ def update_project(
         for hashtag_name in hashtag_names:
             normalized_name = hashtag_name.replace('#', '').strip()
             for platform_name in platforms:
-                platform = db.query(Platform).filter(Platform.name == platform_name.lower()).first()
+                platform = await db.scalar(select(Platform).where(Platform.name == platform_name.lower()))
                 if not platform:
                     continue
-                hashtag = db.query(Hashtag).filter(
+                hashtag = await db.scalar(select(Hashtag).where(
                     Hashtag.name == normalized_name,
                     Hashtag.platform_id == platform.id
-                ).first()
+                ))
                 if not hashtag:
                     hashtag = Hashtag(name=normalized_name, platform_id=platform.id)
                     db.add(hashtag)
-                    db.flush()
+                    await db.flush()
                 project_hashtag = ProjectHashtag(project_id=project.id, hashtag_id=hashtag.id)
                 db.add(project_hashtag)
     
     # Gérer les créateurs si fournis
     if project_in.creator_usernames is not None:
         # Supprimer les anciennes liaisons
-        db.query(ProjectCreator).filter(ProjectCreator.project_id == project.id).delete()
+        await db.execute(delete(ProjectCreator).where(ProjectCreator.project_id == project.id))
         
         # Ajouter les nouveaux créateurs
         creator_usernames = project_in.creator_usernames or []
@@ -241,7 +288,7 @@ def update_project(
         for creator_username in creator_usernames:
             normalized_username = creator_username.replace('@', '').strip()
             for platform_name in platforms:
-                platform = db.query(Platform).filter(Platform.name == platform_name.lower()).first()
+                platform = await db.scalar(select(Platform).where(Platform.name == platform_name.lower()))
                 if not platform:
                     continue
                 project_creator = ProjectCreator(
@@ -253,25 +300,22 @@ def update_project(
                 creators_count += 1
         project.creators_count = creators_count
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    project = await _get_user_project(db, project.id, current_user.id, with_relations=True)
     return serialize_project(project)
 
 @projects_router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Supprimer un projet"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = await _get_user_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
     return None
 
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai du débit des routers : session synchrone (route def, threadpool) contre
+session asynchrone (route async def, asyncpg / aiosqlite, db.base.get_async_db).
+Les deux applications exécutent la même requête que GET /api/v1/posts (projection + orjson)
+et reçoivent les mêmes rafales de requêtes concurrentes (httpx + ASGITransport, en process).
+--latency-ms ajoute un pg_sleep par requête (PostgreSQL uniquement) pour simuler une base distante.
+--sync-pool / --async-pool remplacent la taille des pools (sans débordement) le temps du banc :
+la route synchrone ne dépasse pas 40 requêtes en vol (threadpool AnyIO), la route asynchrone
+n'est bornée que par son pool. Tant que le CPU sature avant (1 vCPU partagé avec la base),
+l'asyncio coûte plus qu'il ne rapporte ; le gain apparaît quand 40 / latence passe sous ce plafond.
+Usage: python scripts/bench_async_db.py [--seed 2000] [--requests 2000] [--concurrency 50,200,500] [--latency-ms 20]
+       [--sync-pool 40] [--async-pool 100]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from db.base import AsyncSessionLocal, SessionLocal, async_engine, engine, get_async_db, get_db
+from db.models import Platform, Post
+from posts.projection import post_columns, post_list_response
+
+BENCH_PLATFORM = "bench_async_db"
+PAGE_SIZE = 50
+
+def page_statement():
+    return select(*post_columns()).order_by(Post.posted_at.desc(), Post.id.desc()).limit(PAGE_SIZE)
+
+def build_apps(latency: float):
+    """Deux applications minimales : même requête, session synchrone ou asynchrone"""
+    sleep_sql = text("SELECT pg_sleep(:s)")
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/posts")
+    def sync_page(db: Session = Depends(get_db)):
+        if latency:
+            db.execute(sleep_sql, {'s': latency})
+        return post_list_response(db.execute(page_statement()).all())
+
+    async_app = FastAPI()
+
+    @async_app.get("/posts")
+    async def async_page(db: AsyncSession = Depends(get_async_db)):
+        if latency:
+            await db.execute(sleep_sql, {'s': latency})
+        return post_list_response((await db.execute(page_statement())).all())
+
+    return sync_app, async_app
+
+def seed(rows: int):
+    db = SessionLocal()
+    try:
+        platform = Platform(name=BENCH_PLATFORM)
+        db.add(platform)
+        db.flush()
+        now = datetime.utcnow()
+        db.add_all(
+            Post(
+                id=f"{BENCH_PLATFORM}_{i:07d}",
+                platform_id=platform.id,
+                author=f"auteur_{i % 500}",
+                caption=f"Légende n°{i}",
+                hashtags=["bench", f"tag{i % 50}"],
+                metrics={"likes": i * 3, "views": i * 40},
+                posted_at=now - timedelta(minutes=i),
+                fetched_at=now,
+                score=float(i % 100),
+                score_trend=float(i % 37),
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        platform_ids = select(Platform.id).where(Platform.name == BENCH_PLATFORM).scalar_subquery()
+        db.execute(delete(Post).where(Post.platform_id.in_(platform_ids)))
+        db.execute(delete(Platform).where(Platform.name == BENCH_PLATFORM))
+        db.commit()
+    finally:
+        db.close()
+
+async def run_load(app: FastAPI, requests: int, concurrency: int):
+    """requests appels, au plus concurrency en vol ; retourne (req/s, p50 ms, p95 ms, erreurs)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: List[float] = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/posts")
+                    if response.status_code != 200:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+    return requests / elapsed, statistics.median(timings), p95, errors
+
+def resize_pools(sync_pool: int, async_pool: int):
+    """Moteurs de même URL avec d'autres pools, branchés sur les sessions de get_db / get_async_db"""
+    global engine, async_engine
+    if sync_pool:
+        engine = create_engine(engine.url, pool_size=sync_pool, max_overflow=0)
+        SessionLocal.configure(bind=engine)
+    if async_pool:
+        async_engine = create_async_engine(async_engine.url, pool_size=async_pool, max_overflow=0, pool_pre_ping=True)
+        AsyncSessionLocal.configure(bind=async_engine)
+
+async def bench(args, levels: List[int]):
+    latency = args.latency_ms / 1000
+    sync_app, async_app = build_apps(latency)
+
+    async def release(label: str):
+        # Un seul pool ouvert à la fois : sync + async doivent sinon tenir dans max_connections
+        if label == "async":
+            await async_engine.dispose()
+        else:
+            engine.dispose()
+
+    for concurrency in levels:
+        print(f"📋 concurrence {concurrency} ({args.requests} requêtes)")
+        results = {}
+        for label, app in (("sync + threadpool", sync_app), ("async", async_app)):
+            # Chauffe : premières connexions du pool ouvertes avant la mesure
+            await run_load(app, 20, 10)
+            rps, p50, p95, errors = await run_load(app, args.requests, concurrency)
+            await release(label)
+            results[label] = rps
+            suffix = f", ❌ {errors} erreurs" if errors else ""
+            print(f"   {label:<18}: {rps:8.1f} req/s, p50 {p50:7.1f} ms, p95 {p95:7.1f} ms{suffix}")
+        print(f"   gain débit       : x{results['async'] / results['sync + threadpool']:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit des routers : session synchrone contre asynchrone")
+    parser.add_argument("--seed", type=int, default=0, help="Posts synthétiques insérés (puis supprimés)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requêtes par mesure")
+    parser.add_argument("--concurrency", default="50,200,500", help="Niveaux de concurrence, séparés par des virgules")
+    parser.add_argument("--latency-ms", type=float, default=0, help="pg_sleep par requête (PostgreSQL)")
+    parser.add_argument("--sync-pool", type=int, default=0, help="Taille du pool synchrone (défaut : db.base)")
+    parser.add_argument("--async-pool", type=int, default=0, help="Taille du pool asynchrone (défaut : DB_POOL_SIZE)")
+    args = parser.parse_args()
+    resize_pools(args.sync_pool, args.async_pool)
+
+    if args.latency_ms and engine.dialect.name != "postgresql":
+        print("⚠️ --latency-ms ignoré : pg_sleep n'existe que sur PostgreSQL")
+        args.latency_ms = 0
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    # Client, application et base partagent les CPU de la machine : à lire avec les résultats
+    print(f"📋 base : {engine.dialect.name}, {os.cpu_count()} CPU")
+    print(f"📋 pool sync  : {engine.pool.status()}")
+    print(f"📋 pool async : {async_engine.pool.status()}")
+    if args.seed:
+        seed(args.seed)
+        print(f"✅ {args.seed} posts synthétiques insérés")
+    try:
+        asyncio.run(bench(args, levels))
+    finally:
+        if args.seed:
+            cleanup()
+            print("✅ Posts synthétiques supprimés")
+
+if __name__ == "__main__":
+    print("📊 Banc d'essai sync / async des sessions SQLAlchemy...")
+    print("=" * 50)
+    main()
+    print("=" * 50)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des index de listing des posts (migration add_posts_listing_indexes)
+Remplit une table synthétique avec N posts (generate_series), puis mesure chaque forme
+de requête de posts_endpoints sans puis avec les index : EXPLAIN (ANALYZE, BUFFERS) + latences.
+PostgreSQL uniquement ; travaille dans un schéma jetable, la table posts réelle n'est pas touchée.
+Usage: python scripts/bench_post_indexes.py [--rows 2000000] [--runs 20] [--keep]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from db.base import engine
+
+SCHEMA = "bench_post_indexes"
+
+# Mêmes définitions que la migration (NULLS LAST compris)
+INDEXES = [
+    "CREATE INDEX ix_posts_recent ON posts (posted_at DESC NULLS LAST, id DESC)",
+    "CREATE INDEX ix_posts_platform_recent ON posts (platform_id, posted_at DESC NULLS LAST, id DESC)",
+    "CREATE INDEX ix_posts_trending ON posts (score_trend DESC NULLS LAST, id DESC) WHERE score_trend > 0",
+    "CREATE INDEX ix_posts_platform_trending ON posts "
+    "(platform_id, score_trend DESC NULLS LAST, id DESC) WHERE score_trend > 0",
+    "CREATE INDEX ix_posts_fetched_at ON posts (fetched_at)",
+]
+
+# Formes de requête réellement émises par l'API (keyset_page : limit + 1 lignes)
+QUERIES = {
+    "recent": (
+        "SELECT * FROM posts ORDER BY posted_at DESC NULLS LAST, id DESC LIMIT 21"
+    ),
+    "platform_recent": (
+        "SELECT * FROM posts WHERE platform_id = 2 "
+        "ORDER BY posted_at DESC NULLS LAST, id DESC LIMIT 21"
+    ),
+    "trending": (
+        "SELECT * FROM posts WHERE score_trend > 0 "
+        "ORDER BY score_trend DESC NULLS LAST, id DESC LIMIT 21"
+    ),
+    "platform_trending": (
+        "SELECT * FROM posts WHERE platform_id = 2 AND score_trend > 0 "
+        "ORDER BY score_trend DESC NULLS LAST, id DESC LIMIT 21"
+    ),
+    # Page profonde via curseur (comparaison de lignes de keyset_page) : même coût que la première page
+    "recent_deep_cursor": (
+        "SELECT * FROM posts WHERE (posted_at, id) < (now() - interval '300 days', 'p_0') "
+        "ORDER BY posted_at DESC NULLS LAST, id DESC LIMIT 21"
+    ),
+    # Rattrapage du reindex Meilisearch (_stream_posts) : posts synchronisés pendant la copie
+    "reindex_catch_up": (
+        "SELECT * FROM posts WHERE fetched_at >= now() - interval '10 minutes' ORDER BY id"
+    ),
+}
+
+def setup(conn, rows: int):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    conn.execute(text(
+        "CREATE TABLE posts (id varchar PRIMARY KEY, platform_id integer NOT NULL, "
+        "caption text, author varchar, posted_at timestamptz, fetched_at timestamptz, "
+        "score double precision, score_trend double precision)"
+    ))
+    # 4 plateformes, ~1 % de posted_at NULL, ~30 % des posts en tendance
+    conn.execute(text(
+        "INSERT INTO posts "
+        "SELECT 'p_' || g, 1 + g % 4, 'caption ' || g, 'author_' || (g % 5000), "
+        "CASE WHEN g % 100 = 0 THEN NULL ELSE now() - (random() * interval '365 days') END, "
+        "now() - (random() * interval '30 days'), random() * 100, "
+        "CASE WHEN random() < 0.3 THEN random() * 100 ELSE 0 END "
+        "FROM generate_series(1, :rows) AS g"
+    ), {"rows": rows})
+    conn.execute(text("ANALYZE posts"))
+
+def measure(conn, sql: str, runs: int):
+    plan = "\n".join(
+        row[0] for row in conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+    )
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(text(sql)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return plan, statistics.median(timings), timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+
+def run_all(conn, runs: int, label: str):
+    results = {}
+    for name, sql in QUERIES.items():
+        plan, p50, p95 = measure(conn, sql, runs)
+        results[name] = (p50, p95)
+        print(f"\n--- {label} / {name} : p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+        print(plan)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des index de listing des posts")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Nombre de posts synthétiques")
+    parser.add_argument("--runs", type=int, default=20, help="Exécutions par requête")
+    parser.add_argument("--keep", action="store_true", help="Garder le schéma de test à la fin")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print(f"❌ PostgreSQL requis (DATABASE_URL pointe sur {engine.dialect.name})")
+        sys.exit(1)
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        print(f"🔄 Génération de {args.rows} posts synthétiques...")
+        setup(conn, args.rows)
+
+        before = run_all(conn, args.runs, "sans index")
+        print("\n🔄 Création des index...")
+        for statement in INDEXES:
+            conn.execute(text(statement))
+        conn.execute(text("ANALYZE posts"))
+        after = run_all(conn, args.runs, "avec index")
+
+        print("\n📋 Résumé (p50 / p95 en ms)")
+        for name in QUERIES:
+            (b50, b95), (a50, a95) = before[name], after[name]
+            print(f"  {name:<20} {b50:>9.2f} / {b95:>9.2f}  ->  {a50:>7.2f} / {a95:>7.2f}")
+
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    print("📊 Banc d'essai des index de listing des posts...")
+    print("=" * 50)
+    main()
+    print("=" * 50)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai de la sérialisation des listes de posts (GET /api/v1/posts)
+Compare le chemin ORM + validation response_model + JSONResponse au chemin
+projection de colonnes + orjson (posts/projection.py), et vérifie que les documents JSON sont identiques
+(les octets peuvent différer : exposants des floats, voir ORJSON_OPTIONS).
+Base SQLite en mémoire : aucune donnée réelle n'est touchée.
+Usage: python scripts/bench_post_serialization.py [--rows 1000] [--runs 50]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.base import Base
+from db.models import Platform, Post
+from posts.projection import POST_RESPONSE_COLUMNS, encode_post_rows
+from posts.schemas import PostResponse
+
+def seed(db, rows: int):
+    platform = Platform(name="tiktok")
+    db.add(platform)
+    db.flush()
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(rows):
+        db.add(Post(
+            id=f"bench_{i:07d}",
+            platform_id=platform.id,
+            author=f"auteur_{i % 500}",
+            caption=f"Légende n°{i} avec des accents et un emoji 🎉",
+            hashtags=["mode", f"tag{i % 50}"],
+            metrics={"likes": i * 3, "views": i * 40, "ratio": round(random.random(), 4)},
+            posted_at=now - timedelta(minutes=i, microseconds=i * 7),
+            fetched_at=now,
+            language=random.choice(["fr", "en"]),
+            media_url=f"https://cdn.example.com/{i}.mp4",
+            sentiment=random.uniform(-1, 1),
+            score=float(i % 100),
+            score_trend=random.uniform(0, 50),
+        ))
+    db.commit()
+
+def orm_path(db, field, limit: int) -> bytes:
+    """Chemin actuel : objets Post, validation List[PostResponse], JSONResponse"""
+    posts = db.query(Post).order_by(Post.posted_at.desc(), Post.id.desc()).limit(limit).all()
+    db.expunge_all()
+    content = asyncio.run(serialize_response(field=field, response_content=posts, is_coroutine=True))
+    return JSONResponse(content).body
+
+def projection_path(db, limit: int) -> bytes:
+    """Nouveau chemin : tuples des colonnes de réponse, encodage orjson"""
+    rows = db.query(*POST_RESPONSE_COLUMNS).order_by(Post.posted_at.desc(), Post.id.desc()).limit(limit).all()
+    return encode_post_rows(rows)
+
+def timed(func, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de la sérialisation des listes de posts")
+    parser.add_argument("--rows", type=int, default=1000, help="Taille de page (max de GET /posts)")
+    parser.add_argument("--runs", type=int, default=50, help="Exécutions par chemin")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.rows)
+    field = create_model_field(name="Response_get_posts", type_=List[PostResponse], mode="serialization")
+
+    expected = orm_path(db, field, args.rows)
+    actual = projection_path(db, args.rows)
+    if orjson.loads(expected) != orjson.loads(actual):
+        print("❌ Les deux chemins ne produisent pas le même document JSON")
+        sys.exit(1)
+    print(f"✅ Documents JSON identiques ({len(actual)} octets pour {args.rows} posts)")
+
+    orm_p50, orm_p95 = timed(lambda: orm_path(db, field, args.rows), args.runs)
+    fast_p50, fast_p95 = timed(lambda: projection_path(db, args.rows), args.runs)
+    print(f"📋 ORM + response_model : p50 {orm_p50:.2f} ms, p95 {orm_p95:.2f} ms")
+    print(f"📋 projection + orjson  : p50 {fast_p50:.2f} ms, p95 {fast_p95:.2f} ms")
+    print(f"📋 gain p50 : x{orm_p50 / fast_p50:.1f}")
+
+if __name__ == "__main__":
+    print("📊 Banc d'essai de la sérialisation des posts...")
+    print("=" * 50)
+    main()
+    print("=" * 50)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script pour appliquer la configuration Meilisearch (searchable, filterable, sortable, typo)
+Ne pousse rien si le hash de configuration appliqué est déjà à jour ; sinon efface aussi
+les hash des documents indexés (le prochain rafraîchissement renvoie des documents complets).
+Usage: python scripts/meili_migrate.py [--force] [--index posts]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+
+from services.meilisearch_settings import meilisearch_settings_manager
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration de la configuration Meilisearch")
+    parser.add_argument("--force", action="store_true", help="Pousser la configuration même si le hash est à jour")
+    parser.add_argument("--index", default=None, help="Index cible (défaut: MEILI_INDEX)")
+    args = parser.parse_args()
+
+    result = asyncio.run(meilisearch_settings_manager.migrate(index_uid=args.index, force=args.force))
+    print(f"📋 Résultat: {result}")
+    if result.get("status") == "error":
+        sys.exit(1)
+
+if __name__ == "__main__":
+    print("🔧 Migration de la configuration Meilisearch...")
+    print("=" * 50)
+    main()
+    print("=" * 50)
@@ -1,9 +1,25 @@
 # services/cache.py
-# Helpers de cache JSON avec Redis
+# Helpers de cache JSON avec Redis + cache read-through des routes (anti-stampede)
 
+import asyncio
+import functools
+import hashlib
+import inspect
 import json
+import logging
+import math
+import random
+import secrets
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Set
+
+from fastapi.concurrency import run_in_threadpool  # type: ignore
+from fastapi.encoders import jsonable_encoder  # type: ignore
+
 from core.redis_client import redis
 
+logger = logging.getLogger(__name__)
+
 async def cache_get_json(key: str):
     """Récupère une valeur JSON depuis le cache Redis"""
     v = await redis.get(key)
@@ -12,3 +28,155 @@ async def cache_get_json(key: str):
 async def cache_set_json(key: str, data, ttl: int = 300):
     """Stocke une valeur JSON dans le cache Redis avec TTL"""
     await redis.set(key, json.dumps(data), ex=ttl)
+
+async def cache_mget_json(keys: list) -> list:
+    """Récupère plusieurs valeurs JSON en un aller-retour (None si absente)"""
+    if not keys:
+        return []
+    values = await redis.mget(keys)
+    return [json.loads(v) if v else None for v in values]
+
+async def cache_mset_json(items: dict, ttl: int = 300):
+    """Stocke plusieurs valeurs JSON avec TTL en un seul pipeline"""
+    if not items:
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, data in items.items():
+            pipe.set(key, json.dumps(data), ex=ttl)
+        await pipe.execute()
+
+async def cache_incr(key: str, amount: int = 1) -> int:
+    """Incrémente un compteur Redis"""
+    return await redis.incrby(key, amount)
+
+async def cache_get_int(key: str, default: int = 0) -> int:
+    """Lit un compteur Redis"""
+    v = await redis.get(key)
+    return int(v) if v else default
+
+# --- Cache read-through des routes -------------------------------------------------
+
+ROUTE_CACHE_PREFIX = "cache:route"
+_LOCK_POLL_INTERVAL = 0.05
+
+# Références fortes vers les recalculs en tâche de fond (sinon collectés en cours de route)
+_background_refreshes: Set["asyncio.Task[Any]"] = set()
+
+def route_cache_key(name: str, params: Dict[str, Any]) -> str:
+    """Clé de cache d'une route : nom + paramètres canoniques"""
+    payload = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{ROUTE_CACHE_PREFIX}:{name}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+async def _acquire_lock(key: str, timeout: float) -> Optional[str]:
+    token = secrets.token_hex(8)
+    acquired = await redis.set(f"{key}:lock", token, nx=True, px=int(timeout * 1000))
+    return token if acquired else None
+
+async def _release_lock(key: str, token: str):
+    # Ne pas libérer un verrou expiré puis repris par un autre worker
+    if await redis.get(f"{key}:lock") == token:
+        await redis.delete(f"{key}:lock")
+
+def _should_refresh_early(entry: Dict[str, Any], beta: float, now: float) -> bool:
+    """XFetch : recalcul anticipé, d'autant plus probable que l'expiration approche
+    et que le calcul est long (un seul worker gagne le verrou)"""
+    return now - entry['d'] * beta * math.log(random.random() or 1e-12) >= entry['e']
+
+def read_through(
+    name: str,
+    ttl: int,
+    key_params: Sequence[str] = (),
+    stale_ttl: Optional[int] = None,
+    beta: float = 1.0,
+    lock_timeout: float = 10.0,
+    session_param: Optional[str] = 'db'
+) -> Callable:
+    """Cache read-through pour une route FastAPI (async ou sync).
+
+    - frais (< ttl) : servi depuis Redis ; recalcul anticipé probabiliste (XFetch)
+    - périmé (< ttl + stale_ttl) : servi tel quel, recalculé en tâche de fond
+    - absent : un seul worker recalcule (verrou Redis SET NX), les autres attendent
+      le résultat jusqu'à lock_timeout puis calculent eux-mêmes
+    Les recalculs de fond ouvrent leur propre session (`session_param`), celle de
+    la requête étant fermée après la réponse. Sans Redis, la route est appelée directement.
+    key_params : paramètres de la route qui font partie de la clé.
+    """
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    def decorator(func: Callable) -> Callable:
+        is_async = inspect.iscoroutinefunction(func)
+
+        async def compute(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            started = time.monotonic()
+            result = await func(**kwargs) if is_async else await run_in_threadpool(func, **kwargs)
+            now = time.time()
+            return {'v': jsonable_encoder(result), 'd': time.monotonic() - started, 'e': now + ttl}
+
+        async def store(key: str, entry: Dict[str, Any]):
+            await redis.set(key, json.dumps(entry), ex=ttl + stale_ttl)
+
+        async def refresh(key: str, kwargs: Dict[str, Any]):
+            token = await _acquire_lock(key, lock_timeout)
+            if token is None:
+                return  # déjà en cours ailleurs
+            session = None
+            try:
+                if session_param and session_param in kwargs:
+                    from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
+                    from db.base import AsyncSessionLocal, SessionLocal
+                    # Même type de session que la requête (routes async : AsyncSession)
+                    is_async_session = isinstance(kwargs[session_param], AsyncSession)
+                    session = AsyncSessionLocal() if is_async_session else SessionLocal()
+                    kwargs = {**kwargs, session_param: session}
+                await store(key, await compute(kwargs))
+            except Exception as e:
+                logger.warning(f"⚠️ Recalcul du cache {name} échoué: {e}")
+            finally:
+                if session is not None:
+                    if is_async_session:
+                        await session.close()
+                    else:
+                        await run_in_threadpool(session.close)
+                await _release_lock(key, token)
+
+        def refresh_in_background(key: str, kwargs: Dict[str, Any]):
+            task = asyncio.create_task(refresh(key, kwargs))
+            _background_refreshes.add(task)
+            task.add_done_callback(_background_refreshes.discard)
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            key = route_cache_key(name, {param: kwargs.get(param) for param in key_params})
+            try:
+                raw = await redis.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache {name} indisponible: {e}")
+                return (await compute(kwargs))['v']
+
+            if raw:
+                entry = json.loads(raw)
+                now = time.time()
+                if now >= entry['e'] or _should_refresh_early(entry, beta, now):
+                    refresh_in_background(key, kwargs)
+                return entry['v']
+
+            # Absent : calcul unique dans toute la flotte
+            token = await _acquire_lock(key, lock_timeout)
+            if token is None:
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(_LOCK_POLL_INTERVAL)
+                    raw = await redis.get(key)
+                    if raw:
+                        return json.loads(raw)['v']
+                return (await compute(kwargs))['v']
+            try:
+                entry = await compute(kwargs)
+                await store(key, entry)
+                return entry['v']
+            finally:
+                await _release_lock(key, token)
+
+        return wrapper
+
+    return decorator
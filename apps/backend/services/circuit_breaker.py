@@ -0,0 +1,168 @@
+# services/circuit_breaker.py
+# Disjoncteur par process et requêtes couvertes (hedging) pour les appels à un service externe
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur est ouvert : l'appel n'est pas tenté"""
+
+class CircuitBreaker:
+    """Disjoncteur fermé / ouvert / semi-ouvert.
+
+    S'ouvre après `failure_threshold` échecs consécutifs (une réponse plus lente
+    que `latency_slo` compte comme un échec). Après `reset_timeout` secondes, une
+    requête sonde est laissée passer : succès -> fermé, échec -> ouvert à nouveau.
+    Garde aussi les latences récentes pour dériver le délai de hedging (p95).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        latency_slo: Optional[float] = None,
+        reset_timeout: float = 30.0,
+        window: int = 200
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def allow_request(self) -> bool:
+        """Vrai si l'appel peut partir (en semi-ouvert, une seule sonde à la fois)"""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: Optional[float] = None):
+        """Enregistre un appel réussi ; une latence au-delà du SLO compte comme un échec"""
+        if latency is not None:
+            self._latencies.append(latency)
+            if self.latency_slo and latency > self.latency_slo:
+                self.record_failure(reason=f"latence {latency * 1000:.0f} ms > SLO")
+                return
+        if self.state != STATE_CLOSED:
+            logger.info(f"✅ Disjoncteur '{self.name}' refermé")
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, reason: Any = None):
+        """Enregistre un échec ; ouvre le disjoncteur au seuil (ou si la sonde échoue)"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning(
+                    f"⚠️ Disjoncteur '{self.name}' ouvert ({self.consecutive_failures} échecs, dernier: {reason})"
+                )
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile des latences récentes (None sans historique)"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, minimum: float = 0.0, min_samples: int = 20) -> Optional[float]:
+        """Délai avant la requête de couverture : p95 observé (SLO tant que l'historique est trop court)"""
+        if len(self._latencies) < min_samples:
+            return self.latency_slo
+        return max(minimum, self.percentile(0.95) or 0.0)
+
+    async def call(self, func: Callable[[], Awaitable[Any]], track_latency: bool = True) -> Any:
+        """Exécute func derrière le disjoncteur"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"Disjoncteur '{self.name}' ouvert")
+        started = time.perf_counter()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # Annulé (requête couverte perdante) : ni succès ni échec, mais libérer la sonde
+            self._probe_in_flight = False
+            raise
+        except Exception as e:
+            self.record_failure(reason=e)
+            raise
+        self.record_success(time.perf_counter() - started if track_latency else None)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'samples': len(self._latencies),
+        }
+
+def _result_or_none(task: "asyncio.Future[Any]") -> Any:
+    try:
+        return task.result()
+    except Exception:
+        return None
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    fallback: Callable[[], Awaitable[Any]],
+    delay: Optional[float]
+) -> Any:
+    """Lance primary ; si rien n'est revenu après `delay`, lance fallback en parallèle.
+
+    Retourne le premier résultat exploitable (non None). Un résultat None ou une
+    exception de primary bascule sur fallback. La requête perdante est annulée.
+    Sans délai (None), fallback n'est lancé qu'après l'échec de primary.
+    """
+    primary_task = asyncio.ensure_future(primary())
+    done, _ = await asyncio.wait({primary_task}, timeout=delay)
+    if done:
+        result = _result_or_none(primary_task)
+        return result if result is not None else await fallback()
+
+    # primary plus lent que le délai de couverture : course avec fallback
+    fallback_task = asyncio.ensure_future(fallback())
+    pending = {primary_task, fallback_task}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if fallback_task in done:
+                if primary_task in done and _result_or_none(primary_task) is not None:
+                    return primary_task.result()
+                if fallback_task.exception() is None or not pending:
+                    return fallback_task.result()
+                # fallback en échec : attendre primary
+            else:
+                result = _result_or_none(primary_task)
+                if result is not None:
+                    return result
+                # primary en échec : attendre fallback
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
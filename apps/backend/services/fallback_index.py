@@ -0,0 +1,354 @@
+# services/fallback_index.py
+# Index inversé en mémoire sur les posts récents : recherche dégradée quand Meilisearch est indisponible
+
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from core.config import settings
+from db.base import SessionLocal
+from db.models import Post, Platform, SearchOutbox
+from services.meilisearch_client import build_document, post_to_index_data
+from services.search_filters import filters_from_dict, matches_filter
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Suivi des écritures : un id d'outbox sauté (transaction pas encore validée) est relu pendant
+# OUTBOX_GAP_TIMEOUT secondes ; les posts de la sync sont relus sur FETCHED_AT_OVERLAP
+OUTBOX_GAP_TIMEOUT = 30.0
+OUTBOX_MAX_GAPS = 1000
+FETCHED_AT_OVERLAP = timedelta(seconds=30)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokens normalisés (minuscules, sans accents)"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
+class InMemoryPostIndex:
+    """Index inversé compact des posts les plus récents.
+
+    Chaque post occupe un slot ; les listes de postings sont des array('I') de
+    slots, triées car les slots sont attribués de façon croissante. Une mise à
+    jour tombe le slot précédent et en alloue un nouveau ; l'index est compacté
+    quand les slots morts dépassent un quart du total, ou ramené à 90 % de sa
+    capacité (posts les plus récents) quand elle est dépassée.
+    Les documents stockés ont le format Meilisearch (build_document).
+
+    Chaque worker tient son propre index à jour en suivant la base (start) :
+    l'outbox par id pour les écritures de l'API, fetched_at pour le job de sync,
+    indépendamment du drainer et de Meilisearch.
+    """
+
+    def __init__(self, max_posts: Optional[int] = None, interval: Optional[float] = None):
+        self.max_posts = settings.FALLBACK_INDEX_MAX_POSTS if max_posts is None else max_posts
+        self.interval = interval or settings.SEARCH_OUTBOX_INTERVAL
+        self.max_staleness = settings.FALLBACK_INDEX_MAX_STALENESS
+        self._lock = threading.RLock()
+        self._reset()
+        self.ready = False
+        # Dernier suivi réussi (time.monotonic) et curseurs du suivi
+        self.synced_at: Optional[float] = None
+        self._outbox_cursor = 0
+        self._outbox_gaps: Dict[int, float] = {}
+        self._fetched_since = datetime.utcnow()
+        self._fetched_seen: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _reset(self):
+        self._documents: List[Optional[Dict[str, Any]]] = []
+        self._score_trend = array('d')
+        self._posted_ts = array('d')
+        self._slot_by_id: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._dead = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_posts > 0
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    @property
+    def fresh(self) -> bool:
+        """Chargé, non vide et suivi depuis moins de FALLBACK_INDEX_MAX_STALENESS secondes :
+        sinon la recherche de secours passe par la base"""
+        return (
+            self.ready
+            and len(self) > 0
+            and self.synced_at is not None
+            and time.monotonic() - self.synced_at <= self.max_staleness
+        )
+
+    @staticmethod
+    def _terms(document: Dict[str, Any]) -> Set[str]:
+        terms = set(tokenize(document.get('caption')))
+        terms.update(tokenize(document.get('author')))
+        for tag in document.get('hashtags') or []:
+            terms.update(tokenize(str(tag)))
+        return terms
+
+    def _add(self, document: Dict[str, Any]):
+        slot = len(self._documents)
+        self._documents.append(document)
+        self._score_trend.append(float(document.get('score_trend') or 0))
+        self._posted_ts.append(float(document.get('posted_at_ts') or 0))
+        self._slot_by_id[str(document['id'])] = slot
+        for term in self._terms(document):
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array('I')
+                self._sorted_terms = None
+            postings.append(slot)
+
+    def _remove(self, post_id: str):
+        slot = self._slot_by_id.pop(post_id, None)
+        if slot is not None:
+            self._documents[slot] = None
+            self._dead += 1
+
+    def _compact(self):
+        """Reconstruit les postings depuis les slots vivants, en gardant les posts les plus récents"""
+        documents = [doc for doc in self._documents if doc is not None]
+        if len(documents) > self.max_posts:
+            keep = max(1, int(self.max_posts * 0.9))
+            documents = heapq.nlargest(keep, documents, key=lambda d: d.get('posted_at_ts') or 0)
+        self._reset()
+        for document in documents:
+            self._add(document)
+
+    def upsert_many(self, posts: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute ou remplace des posts (dicts de post_to_index_data ou de la sync)"""
+        if not self.enabled:
+            return 0
+        count = 0
+        with self._lock:
+            for post in posts:
+                if not post.get('id'):
+                    continue
+                document = build_document(post)
+                self._remove(str(document['id']))
+                self._add(document)
+                count += 1
+            if self._dead * 4 > len(self._documents) or len(self._slot_by_id) > self.max_posts:
+                self._compact()
+        return count
+
+    def delete_many(self, post_ids: Iterable[str]):
+        """Retire des posts de l'index"""
+        with self._lock:
+            for post_id in post_ids:
+                self._remove(str(post_id))
+
+    def _matching_slots(self, term: str, prefix: bool) -> array:
+        """Postings d'un terme ; pour le dernier terme, union des termes préfixés"""
+        postings = self._postings.get(term)
+        if not prefix:
+            return postings if postings is not None else array('I')
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect.bisect_left(self._sorted_terms, term)
+        slots: Set[int] = set()
+        for candidate in self._sorted_terms[start:]:
+            if not candidate.startswith(term):
+                break
+            slots.update(self._postings[candidate])
+        return array('I', sorted(slots))
+
+    @staticmethod
+    def _contains(postings: array, slot: int) -> bool:
+        i = bisect.bisect_left(postings, slot)
+        return i < len(postings) and postings[i] == slot
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Recherche ET sur les termes (dernier terme en préfixe), triée par score_trend puis posted_at.
+
+        filters : même dict que pour Meilisearch (services.search_filters.filters_from_dict),
+        évalué sur chaque document candidat. Retourne (documents de la page, nombre total de résultats).
+        """
+        terms = tokenize(query)
+        node = filters_from_dict(filters) if filters else None
+        with self._lock:
+            if terms:
+                lists = [
+                    self._matching_slots(term, prefix=(i == len(terms) - 1))
+                    for i, term in enumerate(terms)
+                ]
+                lists.sort(key=len)
+                # Intersection : on parcourt la plus courte liste, recherche dichotomique dans les autres
+                candidates: Iterable[int] = (
+                    slot for slot in lists[0]
+                    if all(self._contains(other, slot) for other in lists[1:])
+                )
+            else:
+                candidates = range(len(self._documents))
+
+            matches = []
+            for slot in candidates:
+                document = self._documents[slot]
+                if document is None or not matches_filter(node, document):
+                    continue
+                matches.append(slot)
+
+            page = heapq.nsmallest(
+                offset + limit,
+                matches,
+                key=lambda s: (-self._score_trend[s], -self._posted_ts[s]),
+            )[offset:]
+            return [self._documents[slot] for slot in page], len(matches)
+
+    def _load_recent(self) -> int:
+        db: Session = SessionLocal()
+        try:
+            # Marques prises avant la lecture : les écritures concurrentes seront rejouées par le suivi
+            outbox_mark = db.execute(select(func.max(SearchOutbox.id))).scalar() or 0
+            fetched_mark = datetime.utcnow()
+            rows = (
+                db.query(Post, Platform.name)
+                .outerjoin(Platform, Post.platform_id == Platform.id)
+                .order_by(Post.posted_at.desc())
+                .limit(self.max_posts)
+                .all()
+            )
+            posts = [post_to_index_data(post, platform_name) for post, platform_name in rows]
+        finally:
+            db.close()
+        with self._lock:
+            self._reset()
+            self.upsert_many(posts)
+            self._outbox_cursor, self._outbox_gaps = outbox_mark, {}
+            self._fetched_since, self._fetched_seen = fetched_mark, {}
+            self.ready = True
+            self.synced_at = time.monotonic()
+        return len(posts)
+
+    async def warm(self):
+        """Charge les posts récents depuis la base (au démarrage, hors event loop)"""
+        if not self.enabled:
+            return
+        try:
+            count = await asyncio.to_thread(self._load_recent)
+            logger.info(f"✅ Index de secours chargé: {count} posts, {len(self._postings)} termes")
+        except Exception as e:
+            logger.warning(f"⚠️ Index de secours non chargé: {e}")
+
+    def _changed_post_ids(self, db: Session, now: float) -> Tuple[Set[str], Dict[str, Any]]:
+        """Posts modifiés depuis le dernier suivi et nouveaux curseurs (appliqués après coup)"""
+        changed: Set[str] = set()
+        cursor, gaps = self._outbox_cursor, dict(self._outbox_gaps)
+        rows = db.execute(
+            select(SearchOutbox.id, SearchOutbox.post_id)
+            .where(or_(SearchOutbox.id > cursor, SearchOutbox.id.in_(list(gaps))))
+            .order_by(SearchOutbox.id)
+            .limit(settings.SEARCH_OUTBOX_BATCH)
+        ).all()
+        for outbox_id, post_id in rows:
+            changed.add(post_id)
+            gaps.pop(outbox_id, None)
+            if outbox_id > cursor:
+                for missing in range(max(cursor + 1, outbox_id - OUTBOX_MAX_GAPS), outbox_id):
+                    gaps.setdefault(missing, now)
+                cursor = outbox_id
+        gaps = {outbox_id: seen for outbox_id, seen in gaps.items() if now - seen < OUTBOX_GAP_TIMEOUT}
+
+        # Le job de sync n'écrit pas dans l'outbox : posts récupérés depuis la marque, avec un
+        # recouvrement pour les transactions validées en retard ; un post déjà vu n'est pas rejoué
+        since, seen = self._fetched_since, dict(self._fetched_seen)
+        fetched = db.execute(
+            select(Post.id, Post.fetched_at).where(Post.fetched_at > since - FETCHED_AT_OVERLAP)
+        ).all()
+        for post_id, fetched_at in fetched:
+            if seen.get(post_id) != fetched_at:
+                changed.add(post_id)
+                seen[post_id] = fetched_at
+            since = max(since, fetched_at)
+        seen = {post_id: fetched_at for post_id, fetched_at in seen.items() if fetched_at > since - FETCHED_AT_OVERLAP}
+        return changed, {
+            '_outbox_cursor': cursor,
+            '_outbox_gaps': gaps,
+            '_fetched_since': since,
+            '_fetched_seen': seen,
+        }
+
+    def _follow(self) -> int:
+        """Applique les changements écrits depuis le dernier suivi. Retourne le nombre de posts touchés"""
+        now = time.monotonic()
+        db: Session = SessionLocal()
+        try:
+            changed, cursors = self._changed_post_ids(db, now)
+            post_ids = list(changed)
+            documents: List[Dict[str, Any]] = []
+            for start in range(0, len(post_ids), settings.SEARCH_OUTBOX_BATCH):
+                rows = (
+                    db.query(Post, Platform.name)
+                    .outerjoin(Platform, Post.platform_id == Platform.id)
+                    .filter(Post.id.in_(post_ids[start:start + settings.SEARCH_OUTBOX_BATCH]))
+                    .all()
+                )
+                documents.extend(post_to_index_data(post, platform_name) for post, platform_name in rows)
+        finally:
+            db.close()
+        found = {str(document['id']) for document in documents}
+        with self._lock:
+            self.upsert_many(documents)
+            # Absents de la base : supprimés depuis
+            self.delete_many(post_id for post_id in post_ids if post_id not in found)
+            for name, value in cursors.items():
+                setattr(self, name, value)
+            self.synced_at = now
+        return len(post_ids)
+
+    async def run_forever(self):
+        """Chargement initial (réessayé s'il échoue) puis suivi des changements"""
+        while True:
+            try:
+                if not self.ready:
+                    await self.warm()
+                else:
+                    await asyncio.to_thread(self._follow)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Index de secours non synchronisé: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Démarre chargement et suivi en tâche de fond (rien si l'index est désactivé)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Arrête le suivi"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Instance globale
+fallback_post_index = InMemoryPostIndex()
@@ -0,0 +1,177 @@
+# services/index_refresh.py
+# Rafraîchissement incrémental de l'index : diff par hash, mises à jour partielles des métriques
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.redis_client import redis
+from services.meilisearch_async import AsyncMeilisearchService, async_meilisearch_service
+from services.meilisearch_client import build_document
+from services.meilisearch_indexer import BulkIndexer, IndexingReport
+
+logger = logging.getLogger(__name__)
+
+# search:doc_hashes:{index_uid}:{createdAt de l'index} ; la clé seule est l'ancien format non versionné
+DOC_HASHES_PREFIX = "search:doc_hashes"
+
+# Champs rafraîchis à chaque sync ; le reste du document change rarement
+METRIC_FIELDS = ('metrics', 'score', 'score_trend', 'score_bucket')
+# Change à chaque sync sans rien dire du contenu : hors diff, envoyé avec les mises à jour
+VOLATILE_FIELDS = ('fetched_at',)
+
+_DIGEST_SIZE = 6  # 12 caractères hex par groupe de champs
+
+def _digest(document: Dict[str, Any], fields: Iterable[str]) -> str:
+    payload = json.dumps(
+        {field: document.get(field) for field in fields},
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=_DIGEST_SIZE).hexdigest()
+
+def document_hash(document: Dict[str, Any]) -> str:
+    """Hash compact d'un document : contenu (12 hex) + métriques (12 hex)"""
+    content_fields = sorted(set(document) - set(METRIC_FIELDS) - set(VOLATILE_FIELDS))
+    return _digest(document, content_fields) + _digest(document, METRIC_FIELDS)
+
+def partial_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Document minimal pour une mise à jour des métriques"""
+    fields = ('id',) + METRIC_FIELDS + VOLATILE_FIELDS
+    return {field: document[field] for field in fields if field in document}
+
+class DocumentHashCache:
+    """Hash du dernier état indexé de chaque post, dans un hash Redis (un champ par id).
+
+    Une clé par index et par génération (createdAt de l'index Meilisearch) : un index
+    recréé ou perdu repart d'un cache vide. Le reindex (swap) et la migration de
+    configuration l'effacent explicitement (clear).
+    """
+
+    def __init__(self, index_uid: Optional[str] = None, service: AsyncMeilisearchService = async_meilisearch_service):
+        self.service = service
+        self.index_uid = index_uid or service.index_name
+
+    async def key(self) -> Optional[str]:
+        """Clé de la génération courante ; None si l'index n'existe pas (tout part en complet)"""
+        index = await self.service.get_index(self.index_uid)
+        if not index:
+            return None
+        return f"{DOC_HASHES_PREFIX}:{self.index_uid}:{index.get('createdAt')}"
+
+    async def get_many(self, key: str, post_ids: List[str]) -> List[Optional[str]]:
+        if not post_ids:
+            return []
+        return await redis.hmget(key, post_ids)
+
+    async def set_many(self, key: str, hashes: Dict[str, str]):
+        if hashes:
+            await redis.hset(key, mapping=hashes)
+
+    async def forget(self, post_ids: List[str]):
+        """Oublie des posts (modifiés hors sync ou supprimés) : prochain envoi complet"""
+        if not post_ids:
+            return
+        key = await self.key()
+        if key:
+            await redis.hdel(key, *post_ids)
+
+    async def clear(self):
+        """Oublie toutes les générations de l'index : chaque post repart en document complet"""
+        keys = [key async for key in redis.scan_iter(match=f"{DOC_HASHES_PREFIX}:{self.index_uid}:*")]
+        if self.index_uid == async_meilisearch_service.index_name:
+            keys.append(DOC_HASHES_PREFIX)
+        if keys:
+            await redis.unlink(*keys)
+
+@dataclass
+class RefreshReport:
+    """Bilan d'un rafraîchissement : envois complets, partiels, posts inchangés"""
+    full: IndexingReport
+    partial: IndexingReport
+    skipped: int = 0
+
+    @property
+    def indexed(self) -> int:
+        return self.full.indexed + self.partial.indexed
+
+    @property
+    def failed_ids(self) -> List[str]:
+        return self.full.failed_ids + self.partial.failed_ids
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "full": self.full.as_dict(),
+            "partial": self.partial.as_dict(),
+            "skipped": self.skipped,
+        }
+
+async def refresh_posts(
+    posts_data: List[Dict[str, Any]],
+    cache: Optional[DocumentHashCache] = None,
+    index_uid: Optional[str] = None
+) -> RefreshReport:
+    """Indexe des posts re-fetchés en n'envoyant que ce qui a changé.
+
+    - contenu inconnu ou modifié : document complet
+    - seules les métriques ont changé : document partiel (id + métriques)
+    - rien n'a changé : aucun envoi
+    Sans Redis (ou sans index existant), tout est envoyé en complet.
+    """
+    cache = cache or (document_hash_cache if index_uid is None else DocumentHashCache(index_uid))
+    # Documents construits une fois ici : servent au hash et à l'envoi
+    full_indexer = BulkIndexer(index_uid=index_uid, built=True)
+    partial_indexer = BulkIndexer(index_uid=index_uid, partial=True)
+    if not full_indexer.service.enabled:
+        return RefreshReport(full=IndexingReport(), partial=IndexingReport())
+
+    documents = [build_document(post) for post in posts_data if post.get('id')]
+    hashes = {str(doc['id']): document_hash(doc) for doc in documents}
+
+    key: Optional[str] = None
+    try:
+        key = await cache.key()
+        previous = dict(zip(hashes, await cache.get_many(key, list(hashes)))) if key else {}
+    except Exception as e:
+        logger.warning(f"⚠️ Cache des hash de documents indisponible: {e}")
+        previous = {}
+
+    full: List[Dict[str, Any]] = []
+    partial: List[Dict[str, Any]] = []
+    skipped = 0
+    for document in documents:
+        post_id = str(document['id'])
+        old = previous.get(post_id)
+        new = hashes[post_id]
+        if old == new:
+            skipped += 1
+        elif old and old[:2 * _DIGEST_SIZE] == new[:2 * _DIGEST_SIZE]:
+            partial.append(partial_document(document))
+        else:
+            full.append(document)
+
+    report = RefreshReport(
+        full=await full_indexer.run(full),
+        partial=await partial_indexer.run(partial),
+        skipped=skipped,
+    )
+
+    failed = set(report.failed_ids)
+    sent = [str(doc['id']) for doc in full + partial]
+    try:
+        # Index créé par cet envoi : la génération n'est connue qu'au prochain rafraîchissement
+        if key:
+            await cache.set_many(key, {pid: hashes[pid] for pid in sent if pid not in failed})
+    except Exception as e:
+        logger.warning(f"⚠️ Hash de documents non enregistrés: {e}")
+
+    logger.info(
+        f"✅ Rafraîchissement index: {len(full)} complets, {len(partial)} partiels, {skipped} inchangés"
+    )
+    return report
+
+# Instance globale
+document_hash_cache = DocumentHashCache()
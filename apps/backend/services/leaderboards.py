@@ -0,0 +1,330 @@
+# services/leaderboards.py
+# Classements "tendance" dans des sorted sets Redis, tenus à jour à l'ingestion (sync + outbox)
+
+import asyncio
+import json
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select  # type: ignore
+
+from core.config import settings
+from core.redis_client import redis
+from db.base import SessionLocal
+from db.models import Platform, Post
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_PREFIX = "lb:trending"
+READY_KEY = f"{LEADERBOARD_PREFIX}:ready"
+# Battement du drainer de l'outbox (TTL) : sans lui, plus rien ne tient les classements à jour
+MAINTAINED_KEY = f"{LEADERBOARD_PREFIX}:maintained"
+MAINTAINED_TTL = 120
+# post_id -> classements où il figure ("|"), pour le retirer quand il change de plateforme / hashtags
+MEMBERSHIPS_KEY = f"{LEADERBOARD_PREFIX}:memberships"
+# classement -> plus haut score évincé par la troncature (ZSET) : en dessous, le classement n'est plus complet
+EVICTED_KEY = f"{LEADERBOARD_PREFIX}:evicted"
+# Reconstruction demandée par une lecture (au plus une par REBUILD_COOLDOWN pour toute la flotte)
+REBUILD_REQUEST_KEY = f"{LEADERBOARD_PREFIX}:rebuild_requested"
+REBUILD_COOLDOWN = 600
+REBUILD_SUFFIX = ":rebuild"
+REBUILD_BATCH = 5000
+
+DIMENSIONS = ('platform', 'hashtag', 'language')
+
+def _normalize(value: Any) -> str:
+    """Plateforme / langue : insensible à la casse (comparées avec lower() en base)"""
+    return str(value).strip().lower()
+
+def _tag(value: Any) -> str:
+    """Hashtag sans '#', casse conservée : même comparaison que les tableaux en base"""
+    return str(value).strip().lstrip('#')
+
+def leaderboard_key(dimension: Optional[str] = None, value: Optional[str] = None) -> str:
+    """Clé d'un classement : global, ou par plateforme / hashtag / langue"""
+    if dimension is None:
+        return f"{LEADERBOARD_PREFIX}:global"
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Dimension de classement inconnue: {dimension}")
+    normalized = _tag(value) if dimension == 'hashtag' else _normalize(value)
+    return f"{LEADERBOARD_PREFIX}:{dimension}:{normalized}"
+
+def _hashtags(value: Any) -> List[str]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else []
+        except ValueError:
+            value = [value]
+    return [tag for tag in (_tag(t) for t in value or []) if tag]
+
+def post_leaderboard_keys(post: Dict[str, Any]) -> List[str]:
+    """Classements d'un post (dict avec platform_name, language, hashtags)"""
+    keys = [leaderboard_key()]
+    if post.get('platform_name'):
+        keys.append(leaderboard_key('platform', post['platform_name']))
+    if post.get('language'):
+        keys.append(leaderboard_key('language', post['language']))
+    keys.extend(leaderboard_key('hashtag', tag) for tag in dict.fromkeys(_hashtags(post.get('hashtags'))))
+    return keys
+
+class TrendingLeaderboards:
+    """Top-K des posts par score_trend, un sorted set par classement.
+
+    À score égal Redis ordonne les membres par octets décroissants en ZREVRANGE.
+    La pagination keyset en base (score_trend DESC, id DESC) suit la collation de
+    la colonne : même ordre sous collation C / BINARY (SQLite), et en pratique pour
+    des ids de même forme (numériques, UUID) ; sinon des ex aequo peuvent être
+    répétés ou sautés quand un curseur passe de Redis à la base. Chaque classement est
+    borné à `size` posts. Un post évincé n'y revient que si son score change :
+    le plus haut score évincé (EVICTED_KEY) borne la partie fiable du classement,
+    les pages qui descendent jusqu'à lui sont servies par PostgreSQL.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or settings.TRENDING_LEADERBOARD_SIZE
+        self._rebuild_lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def _truncate(self, pipe: Any, key: str):
+        """Lit le meilleur membre au-delà de size (le plus haut score évincé) puis tronque"""
+        pipe.zrevrange(key, self.size, self.size, withscores=True)
+        pipe.zremrangebyrank(key, 0, -(self.size + 1))
+
+    @staticmethod
+    def _evicted_scores(keys: List[str], results: List[Any]) -> Dict[str, float]:
+        """Résultats des paires (ZREVRANGE, ZREMRANGEBYRANK) de _truncate -> {clé: score évincé}"""
+        evicted = {}
+        for key, (best, _) in zip(keys, zip(results[0::2], results[1::2])):
+            if best:
+                evicted[key] = float(best[0][1])
+        return evicted
+
+    # --- Écritures -----------------------------------------------------------------
+
+    async def update_many(self, posts: Iterable[Dict[str, Any]]):
+        """ZADD des posts (score_trend > 0) dans leurs classements, retrait des autres"""
+        posts = [post for post in posts if post.get('id')]
+        if not posts:
+            return
+        post_ids = [str(post['id']) for post in posts]
+        previous = await redis.hmget(MEMBERSHIPS_KEY, post_ids)
+
+        touched = set()
+        # MULTI : le score lu par _truncate est bien celui du membre évincé
+        async with redis.pipeline(transaction=True) as pipe:
+            for post_id, post, old in zip(post_ids, posts, previous):
+                old_keys = set(old.split('|')) if old else set()
+                score = post.get('score_trend') or 0
+                new_keys = post_leaderboard_keys(post) if score > 0 else []
+                for key in old_keys - set(new_keys):
+                    pipe.zrem(key, post_id)
+                for key in new_keys:
+                    pipe.zadd(key, {post_id: float(score)})
+                touched.update(new_keys)
+                if new_keys:
+                    pipe.hset(MEMBERSHIPS_KEY, post_id, '|'.join(new_keys))
+                elif old_keys:
+                    pipe.hdel(MEMBERSHIPS_KEY, post_id)
+            updates = len(pipe)
+            touched_keys = sorted(touched)
+            for key in touched_keys:
+                self._truncate(pipe, key)
+            results = await pipe.execute()
+
+        evicted = self._evicted_scores(touched_keys, results[updates:])
+        if evicted:
+            # ZADD GT : ne garde que le maximum, même avec plusieurs écrivains
+            await redis.zadd(EVICTED_KEY, evicted, gt=True)
+
+    async def remove_many(self, post_ids: Iterable[str]):
+        """Retire des posts (supprimés) de tous leurs classements"""
+        post_ids = [str(post_id) for post_id in post_ids]
+        if not post_ids:
+            return
+        previous = await redis.hmget(MEMBERSHIPS_KEY, post_ids)
+        async with redis.pipeline(transaction=False) as pipe:
+            for post_id, old in zip(post_ids, previous):
+                for key in (old.split('|') if old else [leaderboard_key()]):
+                    pipe.zrem(key, post_id)
+            pipe.hdel(MEMBERSHIPS_KEY, *post_ids)
+            await pipe.execute()
+
+    async def heartbeat(self):
+        """Signale que les classements sont tenus à jour (appelé par le drainer de l'outbox)"""
+        await redis.set(MAINTAINED_KEY, '1', ex=MAINTAINED_TTL)
+
+    # --- Lectures ------------------------------------------------------------------
+
+    async def top(
+        self,
+        key: str,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Jusqu'à limit + 1 (post_id, score) après la position (score, id) du curseur.
+
+        None si le classement ne peut pas répondre (pas encore construit, plus
+        maintenu par le drainer, Redis indisponible, ou page au-delà de la partie
+        fiable) : lire PostgreSQL.
+        """
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.exists(READY_KEY, MAINTAINED_KEY)
+                pipe.zscore(EVICTED_KEY, key)
+                if after is None:
+                    pipe.zrevrange(key, 0, limit, withscores=True)
+                ready, evicted, *first = await pipe.execute()
+            if ready < 2:
+                return None
+            entries = first[0] if after is None else await self._after(key, limit, after)
+        except Exception as e:
+            logger.warning(f"⚠️ Classement {key} indisponible: {e}")
+            return None
+
+        if evicted is not None:
+            # À égalité avec le plus haut score évincé, un post évincé d'id supérieur passerait devant
+            if any(score <= float(evicted) for _, score in entries[:limit]):
+                # Des membres sont passés sous les évincés : le classement se vide de sa partie fiable
+                await self._request_rebuild()
+                return None
+            # Page incomplète d'un classement tronqué : la suite n'existe qu'en base
+            if len(entries) <= limit:
+                return None
+        return entries[:limit + 1]
+
+    async def _request_rebuild(self):
+        """Classement dégradé par les évictions : reconstruction en tâche de fond,
+        au plus une par REBUILD_COOLDOWN pour toute la flotte"""
+        try:
+            if await redis.set(REBUILD_REQUEST_KEY, '1', nx=True, ex=REBUILD_COOLDOWN):
+                self._rebuild_task = asyncio.create_task(rebuild_trending_leaderboards())
+        except Exception as e:
+            logger.warning(f"⚠️ Reconstruction des classements non planifiée: {e}")
+
+    async def _after(self, key: str, limit: int, after: Tuple[float, str]) -> List[Tuple[str, float]]:
+        """ZREVRANGEBYSCORE depuis le score du curseur, en sautant les ex aequo déjà servis"""
+        value, last_id = after
+        entries: List[Tuple[str, float]] = []
+        start = 0
+        while len(entries) <= limit:
+            chunk = await redis.zrevrangebyscore(key, value, '-inf', start=start, num=limit + 1, withscores=True)
+            entries.extend((member, score) for member, score in chunk if score < value or member < last_id)
+            start += len(chunk)
+            if len(chunk) < limit + 1:
+                break
+        return entries
+
+    # --- Reconstruction ------------------------------------------------------------
+
+    async def is_ready(self) -> bool:
+        try:
+            return bool(await redis.exists(READY_KEY))
+        except Exception:
+            return False
+
+    async def rebuild(self) -> int:
+        """Reconstruit tous les classements depuis PostgreSQL (démarrage à froid).
+
+        Écrit dans des clés temporaires puis les renomme d'un bloc : les lectures
+        voient l'ancien ou le nouveau classement, jamais un état partiel. Les
+        mises à jour reçues pendant la reconstruction sont réappliquées à la sync suivante.
+        """
+        async with self._rebuild_lock:
+            count = 0
+            built = set()
+            evicted: Dict[str, float] = {}
+            memberships: Dict[str, str] = {}
+            after_id: Optional[str] = None
+            # Restes d'une reconstruction interrompue
+            leftovers = [key async for key in redis.scan_iter(match=f"{LEADERBOARD_PREFIX}:*{REBUILD_SUFFIX}")]
+            if leftovers:
+                await redis.delete(*leftovers)
+            while True:
+                rows = await asyncio.to_thread(_trending_rows_from_db, after_id, REBUILD_BATCH)
+                if not rows:
+                    break
+                after_id = rows[-1]['id']
+                touched = set()
+                async with redis.pipeline(transaction=False) as pipe:
+                    for post in rows:
+                        keys = post_leaderboard_keys(post)
+                        for key in keys:
+                            pipe.zadd(key + REBUILD_SUFFIX, {post['id']: float(post['score_trend'])})
+                        memberships[post['id']] = '|'.join(keys)
+                        touched.update(keys)
+                    updates = len(pipe)
+                    touched_keys = sorted(touched)
+                    for key in touched_keys:
+                        self._truncate(pipe, key + REBUILD_SUFFIX)
+                    results = await pipe.execute()
+                for key, score in self._evicted_scores(touched_keys, results[updates:]).items():
+                    evicted[key] = max(score, evicted.get(key, score))
+                built.update(touched)
+                count += len(rows)
+
+            stale = set(await redis.hkeys(MEMBERSHIPS_KEY)) - set(memberships)
+            existing = [key async for key in redis.scan_iter(match=f"{LEADERBOARD_PREFIX}:*")]
+            async with redis.pipeline(transaction=True) as pipe:
+                for key in existing:
+                    if key not in (READY_KEY, MAINTAINED_KEY, MEMBERSHIPS_KEY, REBUILD_REQUEST_KEY) and not key.endswith(REBUILD_SUFFIX) and key not in built:
+                        pipe.delete(key)
+                for key in built:
+                    pipe.rename(key + REBUILD_SUFFIX, key)
+                # Évictions de la reconstruction seulement : les classements repartent de la base
+                pipe.delete(EVICTED_KEY)
+                if evicted:
+                    pipe.zadd(EVICTED_KEY, evicted)
+                if stale:
+                    pipe.hdel(MEMBERSHIPS_KEY, *stale)
+                items = iter(memberships.items())
+                for _ in range(0, len(memberships), REBUILD_BATCH):
+                    pipe.hset(MEMBERSHIPS_KEY, mapping=dict(islice(items, REBUILD_BATCH)))
+                pipe.set(READY_KEY, '1')
+                await pipe.execute()
+
+            logger.info(f"✅ Classements tendance reconstruits: {count} posts, {len(built)} classements")
+            return count
+
+def _trending_rows_from_db(after_id: Optional[str], batch_size: int) -> List[Dict[str, Any]]:
+    """Lot de posts en tendance (score_trend > 0) par id croissant"""
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(Post.id, Post.score_trend, Post.language, Post.hashtags, Platform.name)
+            .outerjoin(Platform, Post.platform_id == Platform.id)
+            .where(Post.score_trend > 0)
+            .order_by(Post.id)
+            .limit(batch_size)
+        )
+        if after_id is not None:
+            stmt = stmt.where(Post.id > after_id)
+        return [
+            {
+                'id': row.id,
+                'score_trend': row.score_trend,
+                'language': row.language,
+                'hashtags': row.hashtags,
+                'platform_name': row.name,
+            }
+            for row in db.execute(stmt)
+        ]
+    finally:
+        db.close()
+
+async def rebuild_trending_leaderboards() -> Dict[str, Any]:
+    """Reconstruit les classements (tâche de fond / endpoint admin)"""
+    try:
+        count = await trending_leaderboards.rebuild()
+        return {"status": "completed", "posts": count}
+    except Exception as e:
+        logger.error(f"❌ Erreur reconstruction des classements tendance: {e}")
+        return {"status": "failed", "error": str(e)}
+
+async def ensure_trending_leaderboards():
+    """Au démarrage : reconstruit les classements s'ils n'existent pas encore"""
+    if not await trending_leaderboards.is_ready():
+        await rebuild_trending_leaderboards()
+
+# Instance globale
+trending_leaderboards = TrendingLeaderboards()
@@ -0,0 +1,349 @@
+# services/meilisearch_async.py
+# Client Meilisearch asyncio pour le chemin de requête (pool keep-alive partagé)
+
+from typing import List, Dict, Optional, Any
+import asyncio
+import logging
+import httpx
+from core.config import settings
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.meilisearch_client import build_document, build_filter_string
+
+logger = logging.getLogger(__name__)
+
+class AsyncMeilisearchService:
+    """Service Meilisearch asyncio basé sur un httpx.AsyncClient partagé.
+
+    Même surface que MeilisearchService (search_posts, batch_index_posts, get_stats)
+    pour permettre une migration progressive des appelants.
+    """
+
+    def __init__(self):
+        """Prépare la configuration, le client HTTP est créé à la première requête"""
+        self.host = (settings.MEILI_HOST or "").rstrip('/')
+        self.index_name = settings.MEILI_INDEX
+        self.timeout = httpx.Timeout(settings.MEILI_TIMEOUT, connect=settings.MEILI_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=settings.MEILI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MEILI_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MEILI_KEEPALIVE_EXPIRY,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        # Disjoncteur du chemin de lecture (search / multi-search / facet-search) : les écritures,
+        # le suivi des tâches et l'administration des index ne passent jamais par lui
+        self.breaker = CircuitBreaker(
+            'meilisearch',
+            failure_threshold=settings.MEILI_BREAKER_FAILURES,
+            latency_slo=settings.MEILI_LATENCY_SLO,
+            reset_timeout=settings.MEILI_BREAKER_RESET,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Retourne le client partagé (recréé s'il a été fermé)"""
+        if self._client is None or self._client.is_closed:
+            headers = {'Content-Type': 'application/json'}
+            if settings.MEILI_MASTER_KEY:
+                headers['Authorization'] = f"Bearer {settings.MEILI_MASTER_KEY}"
+            self._client = httpx.AsyncClient(
+                base_url=self.host,
+                headers=headers,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+        return self._client
+
+    async def close(self):
+        """Ferme le pool de connexions (arrêt de l'application)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        content: Optional[bytes] = None,
+        search_path: bool = False
+    ) -> Any:
+        """Exécute une requête sur le pool partagé, timeout optionnel par appel.
+
+        search_path : l'appel passe par le disjoncteur et son SLO de latence (erreurs réseau,
+        5xx et lenteurs comptent comme échecs, pas les 4xx) et lève CircuitOpenError sans
+        appeler Meilisearch s'il est ouvert. Les écritures et le suivi des tâches le contournent :
+        quelques recherches lentes ne doivent pas bloquer l'indexation ni un reindex en cours.
+        """
+        async def send() -> httpx.Response:
+            response = await self._get_client().request(
+                method,
+                path,
+                json=json,
+                params=params,
+                content=content,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        if search_path:
+            response = await self.breaker.call(send, track_latency=True)
+        else:
+            response = await send()
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    def _build_search_params(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[str]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Construit le corps d'une requête de recherche.
+
+        options: paramètres Meilisearch additionnels (attributesToRetrieve,
+        attributesToHighlight, attributesToCrop, cropLength...)
+        """
+        search_params: Dict[str, Any] = {
+            'q': query,
+            'limit': limit,
+            'offset': offset,
+        }
+
+        if filters:
+            filter_str = build_filter_string(filters)
+            if filter_str:
+                search_params['filter'] = filter_str
+
+        if sort:
+            search_params['sort'] = sort
+
+        if options:
+            search_params.update(options)
+
+        return search_params
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Recherche de posts, les erreurs sont propagées à l'appelant"""
+        search_params = self._build_search_params(query, limit, offset, filters, sort, options)
+        return await self._request(
+            'POST',
+            f"/indexes/{self.index_name}/search",
+            json=search_params,
+            timeout=timeout,
+            search_path=True,
+        )
+
+    async def search_posts(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Recherche de posts dans Meilisearch (résultat vide en cas d'erreur)"""
+        empty = {'hits': [], 'estimatedTotalHits': 0, 'limit': limit, 'offset': offset}
+        if not self.enabled:
+            return empty
+
+        try:
+            return await self.search(query, limit, offset, filters, sort, timeout, options)
+        except CircuitOpenError:
+            return empty
+        except Exception as e:
+            logger.error(f"❌ Erreur recherche: {e}")
+            return empty
+
+    async def multi_search(
+        self,
+        queries: List[Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Exécute plusieurs recherches en un seul appel /multi-search.
+
+        Chaque requête est un dict d'arguments de _build_search_params
+        (query, limit, offset, filters, sort, options). Résultats dans le même ordre.
+        """
+        body = {
+            'queries': [
+                {'indexUid': self.index_name, **self._build_search_params(**query)}
+                for query in queries
+            ]
+        }
+        response = await self._request('POST', "/multi-search", json=body, timeout=timeout, search_path=True)
+        return response.get('results', [])
+
+    async def facet_search(
+        self,
+        facet_name: str,
+        facet_query: str = '',
+        query: str = '',
+        filters: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Recherche dans les valeurs d'une facette (ex: hashtags commençant par 'fash')"""
+        params: Dict[str, Any] = {'facetName': facet_name, 'facetQuery': facet_query, 'q': query}
+        if filters:
+            filter_str = build_filter_string(filters)
+            if filter_str:
+                params['filter'] = filter_str
+        return await self._request(
+            'POST',
+            f"/indexes/{self.index_name}/facet-search",
+            json=params,
+            timeout=timeout,
+            search_path=True,
+        )
+
+    async def batch_index_posts(self, posts_data: List[Dict[str, Any]], timeout: Optional[float] = None) -> int:
+        """Indexe plusieurs posts en lot"""
+        if not self.enabled or not posts_data:
+            return 0
+
+        try:
+            documents = [build_document(post_data) for post_data in posts_data]
+            task = await self._request(
+                'POST',
+                f"/indexes/{self.index_name}/documents",
+                json=documents,
+                params={'primaryKey': 'id'},
+                timeout=timeout,
+            )
+            logger.info(f"✅ {len(documents)} posts indexés (task: {task.get('taskUid')})")
+            return len(documents)
+        except Exception as e:
+            logger.error(f"❌ Erreur batch indexation: {e}")
+            return 0
+
+    async def add_documents_raw(
+        self,
+        payload: bytes,
+        index_uid: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Envoie un tableau JSON de documents déjà encodé. Retourne la tâche enregistrée"""
+        return await self._request(
+            'POST',
+            f"/indexes/{index_uid or self.index_name}/documents",
+            content=payload,
+            params={'primaryKey': 'id'},
+            timeout=timeout,
+        )
+
+    async def update_documents_raw(
+        self,
+        payload: bytes,
+        index_uid: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Mise à jour partielle (PUT) : seuls les champs envoyés sont remplacés. Retourne la tâche"""
+        return await self._request(
+            'PUT',
+            f"/indexes/{index_uid or self.index_name}/documents",
+            content=payload,
+            params={'primaryKey': 'id'},
+            timeout=timeout,
+        )
+
+    async def delete_documents(
+        self,
+        document_ids: List[str],
+        index_uid: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Supprime un lot de documents par id. Retourne la tâche enregistrée"""
+        return await self._request(
+            'POST',
+            f"/indexes/{index_uid or self.index_name}/documents/delete-batch",
+            json=document_ids,
+            timeout=timeout,
+        )
+
+    async def get_task(self, task_uid: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Récupère l'état d'une tâche Meilisearch"""
+        return await self._request('GET', f"/tasks/{task_uid}", timeout=timeout)
+
+    async def wait_for_task(
+        self,
+        task_uid: int,
+        timeout: float = 120.0,
+        interval: float = 0.1,
+        max_interval: float = 2.0
+    ) -> Dict[str, Any]:
+        """Attend la fin d'une tâche (succeeded / failed / canceled) avec backoff progressif"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            task = await self.get_task(task_uid)
+            if task.get('status') in ('succeeded', 'failed', 'canceled'):
+                return task
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Tâche Meilisearch {task_uid} non terminée après {timeout}s")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    async def get_index(self, index_uid: Optional[str] = None, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Métadonnées d'un index (uid, primaryKey, createdAt, updatedAt), None s'il n'existe pas"""
+        try:
+            return await self._request('GET', f"/indexes/{index_uid or self.index_name}", timeout=timeout)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def create_index(self, index_uid: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Crée un index (clé primaire 'id'). Retourne la tâche enregistrée"""
+        return await self._request(
+            'POST',
+            "/indexes",
+            json={'uid': index_uid, 'primaryKey': 'id'},
+            timeout=timeout,
+        )
+
+    async def delete_index(self, index_uid: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Supprime un index. Retourne la tâche enregistrée"""
+        return await self._request('DELETE', f"/indexes/{index_uid}", timeout=timeout)
+
+    async def swap_indexes(self, index_a: str, index_b: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Échange atomiquement le contenu de deux index. Retourne la tâche enregistrée"""
+        return await self._request(
+            'POST',
+            "/swap-indexes",
+            json=[{'indexes': [index_a, index_b]}],
+            timeout=timeout,
+        )
+
+    async def get_stats(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Récupère les statistiques de l'index"""
+        if not self.enabled:
+            return {}
+
+        try:
+            return await self._request('GET', f"/indexes/{self.index_name}/stats", timeout=timeout)
+        except Exception as e:
+            logger.error(f"❌ Erreur récupération stats: {e}")
+            return {}
+
+# Instance globale
+async_meilisearch_service = AsyncMeilisearchService()
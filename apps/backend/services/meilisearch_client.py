@@ -1,9 +1,13 @@
 # services/meilisearch_client.py
 # Client Meilisearch pour l'indexation et la recherche de posts
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 from meilisearch import Client  # type: ignore
 from core.config import settings
+from services.search_filters import FilterNode, compile_filter, filters_from_dict, to_timestamp
+from datetime import datetime
+import hashlib
+import json
 import logging
 
 # Gestion des erreurs - version compatible 0.37
@@ -18,6 +22,148 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Configuration de l'index posts, optimisée pour les posts sociaux.
+# Toute modification change settings_hash() et sera poussée au prochain démarrage / migrate.
+INDEX_SETTINGS: Dict[str, Any] = {
+    'searchableAttributes': [
+        'caption',
+        'author',
+        'hashtags',
+        'language'
+    ],
+    'filterableAttributes': [
+        'platform_id',
+        'platform_name',
+        'posted_at',
+        'posted_at_ts',
+        'score',
+        'score_trend',
+        'language',
+        'hashtags',
+        'score_bucket'
+    ],
+    'sortableAttributes': [
+        'posted_at',
+        'posted_at_ts',
+        'score',
+        'score_trend'
+    ],
+    'typoTolerance': {
+        'enabled': True,
+        'minWordSizeForTypos': {
+            'oneTypo': 4,
+            'twoTypos': 8
+        }
+    },
+    'faceting': {
+        'maxValuesPerFacet': 100
+    },
+}
+
+def settings_hash(index_settings: Optional[Dict[str, Any]] = None) -> str:
+    """Hash stable de la configuration d'index (indépendant de l'ordre des clés)"""
+    payload = json.dumps(index_settings or INDEX_SETTINGS, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+# Champs stockés dans chaque document de l'index posts
+INDEXED_POST_FIELDS = (
+    'id', 'platform_id', 'platform_name', 'author', 'caption', 'hashtags', 'metrics',
+    'posted_at', 'fetched_at', 'language', 'media_url', 'sentiment', 'score', 'score_trend',
+    'score_bucket', 'posted_at_ts',
+)
+
+# Tranches de score (engagement %) utilisées comme facette : (borne haute exclue, libellé)
+SCORE_BUCKETS = [
+    (1, '0-1'),
+    (5, '1-5'),
+    (10, '5-10'),
+    (20, '10-20'),
+]
+SCORE_BUCKET_MAX = '20+'
+
+def score_bucket(score: Optional[float]) -> str:
+    """Tranche de score d'un post pour le facetting"""
+    score = score or 0
+    for upper, label in SCORE_BUCKETS:
+        if score < upper:
+            return label
+    return SCORE_BUCKET_MAX
+
+def build_document(post_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Formate un post pour Meilisearch"""
+    document = {
+        'id': post_data.get('id'),
+        'platform_id': post_data.get('platform_id'),
+        'platform_name': post_data.get('platform_name', ''),
+        'author': post_data.get('author', ''),
+        'caption': post_data.get('caption', ''),
+        'hashtags': post_data.get('hashtags', []),
+        'metrics': post_data.get('metrics', {}),
+        'posted_at': post_data.get('posted_at'),
+        'fetched_at': post_data.get('fetched_at'),
+        'language': post_data.get('language', ''),
+        'media_url': post_data.get('media_url', ''),
+        'sentiment': post_data.get('sentiment', 0),
+        'score': post_data.get('score', 0),
+        'score_trend': post_data.get('score_trend', 0),
+        'score_bucket': score_bucket(post_data.get('score')),
+    }
+    # Timestamp numérique : les filtres de plage ne portent que sur des nombres
+    posted_at = document['posted_at']
+    if isinstance(posted_at, str):
+        try:
+            posted_at = datetime.fromisoformat(posted_at)
+        except ValueError:
+            posted_at = None
+    if isinstance(posted_at, datetime):
+        document['posted_at_ts'] = to_timestamp(posted_at)
+    # Dates en ISO 8601 pour la sérialisation JSON
+    for key in ('posted_at', 'fetched_at'):
+        if isinstance(document[key], datetime):
+            document[key] = document[key].isoformat()
+    # Nettoyer les valeurs None
+    return {k: v for k, v in document.items() if v is not None}
+
+def build_filter_string(filters: Union[Dict[str, Any], FilterNode, None]) -> Optional[str]:
+    """Construit une chaîne de filtre Meilisearch (valeurs échappées).
+
+    Accepte le dict de filtres des endpoints (voir filters_from_dict) ou un AST.
+    """
+    if not filters:
+        return None
+    node = filters_from_dict(filters) if isinstance(filters, dict) else filters
+    return compile_filter(node) if node is not None else None
+
+def _decode_json_text(value: Any, default: Any) -> Any:
+    """Décode une colonne JSON stockée en Text (compatibilité SQLite)"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default
+    return value
+
+def post_to_index_data(post: Any, platform_name: Optional[str] = None) -> Dict[str, Any]:
+    """Convertit un Post SQLAlchemy en dictionnaire prêt pour build_document"""
+    return {
+        'id': post.id,
+        'platform_id': post.platform_id,
+        'platform_name': platform_name or '',
+        'author': post.author,
+        'caption': post.caption,
+        'hashtags': _decode_json_text(post.hashtags, []),
+        'metrics': _decode_json_text(post.metrics, {}),
+        'posted_at': post.posted_at,
+        'fetched_at': post.fetched_at,
+        'language': post.language,
+        'media_url': post.media_url,
+        'sentiment': post.sentiment,
+        'score': post.score,
+        'score_trend': post.score_trend,
+    }
+
 class MeilisearchService:
     """Service pour gérer l'indexation et la recherche avec Meilisearch"""
     
@@ -36,61 +182,37 @@ class MeilisearchService:
             self.client = None
             self.index = None
     
-    def _ensure_index_exists(self):
-        """Crée l'index s'il n'existe pas avec la configuration optimale"""
+    def ensure_index(self, index_uid: Optional[str] = None) -> bool:
+        """Crée l'index s'il n'existe pas. Retourne True si l'index vient d'être créé"""
+        index_uid = index_uid or self.index_name
+        try:
+            self.client.get_index(index_uid)
+            return False
+        except Exception as e:
+            # Si l'index n'existe pas, le créer
+            error_msg = str(e).lower()
+            if "not_found" in error_msg or "index_not_found" in error_msg or "404" in error_msg:
+                task = self.client.create_index(index_uid, {'primaryKey': 'id'})
+                self.client.wait_for_task(task.task_uid)
+                logger.info(f"✅ Index '{index_uid}' créé")
+                return True
+            raise
+    
+    def apply_settings(self, index_uid: Optional[str] = None) -> bool:
+        """Pousse INDEX_SETTINGS en une seule tâche et attend sa fin.
+        
+        Appelé uniquement par MeilisearchSettingsManager (démarrage / migrate),
+        jamais depuis le chemin d'écriture.
+        """
         if not self.client:
             return False
         
+        index_uid = index_uid or self.index_name
         try:
-            # Vérifier si l'index existe
-            try:
-                self.client.get_index(self.index_name)
-            except Exception as e:
-                # Si l'index n'existe pas, le créer
-                error_msg = str(e).lower()
-                if "not_found" in error_msg or "index_not_found" in error_msg or "404" in error_msg:
-                    # Créer l'index avec configuration optimale
-                    self.client.create_index(self.index_name, {'primaryKey': 'id'})
-                    logger.info(f"✅ Index '{self.index_name}' créé")
-                else:
-                    raise
-            
-            # Configurer les paramètres de recherche
-            index = self.client.index(self.index_name)
-            
-            # Settings de recherche optimisés pour les posts sociaux
-            index.update_searchable_attributes([
-                'caption',
-                'author',
-                'hashtags',
-                'language'
-            ])
-            
-            index.update_filterable_attributes([
-                'platform_id',
-                'platform_name',
-                'posted_at',
-                'score',
-                'score_trend',
-                'language'
-            ])
-            
-            index.update_sortable_attributes([
-                'posted_at',
-                'score',
-                'score_trend'
-            ])
-            
-            # Configuration de la typo-tolérance
-            index.update_typo_tolerance({
-                'enabled': True,
-                'minWordSizeForTypos': {
-                    'oneTypo': 4,
-                    'twoTypos': 8
-                }
-            })
-            
-            logger.info("✅ Configuration Meilisearch appliquée")
+            self.ensure_index(index_uid)
+            task = self.client.index(index_uid).update_settings(INDEX_SETTINGS)
+            self.client.wait_for_task(task.task_uid, timeout_in_ms=60000)
+            logger.info(f"✅ Configuration Meilisearch appliquée sur '{index_uid}'")
             return True
         except Exception as e:
             logger.error(f"❌ Erreur configuration index: {e}")
@@ -102,30 +224,7 @@ class MeilisearchService:
             return False
         
         try:
-            self._ensure_index_exists()
-            
-            # Formater les données pour Meilisearch
-            document = {
-                'id': post_data.get('id'),
-                'platform_id': post_data.get('platform_id'),
-                'platform_name': post_data.get('platform_name', ''),
-                'author': post_data.get('author', ''),
-                'caption': post_data.get('caption', ''),
-                'hashtags': post_data.get('hashtags', []),
-                'metrics': post_data.get('metrics', {}),
-                'posted_at': post_data.get('posted_at'),
-                'fetched_at': post_data.get('fetched_at'),
-                'language': post_data.get('language', ''),
-                'media_url': post_data.get('media_url', ''),
-                'sentiment': post_data.get('sentiment', 0),
-                'score': post_data.get('score', 0),
-                'score_trend': post_data.get('score_trend', 0),
-            }
-            
-            # Nettoyer les valeurs None
-            document = {k: v for k, v in document.items() if v is not None}
-            
-            self.index.add_documents([document])
+            self.index.add_documents([build_document(post_data)], primary_key='id')
             return True
         except Exception as e:
             logger.error(f"❌ Erreur indexation post {post_data.get('id')}: {e}")
@@ -137,31 +236,8 @@ class MeilisearchService:
             return 0
         
         try:
-            self._ensure_index_exists()
-            
-            documents = []
-            for post_data in posts_data:
-                document = {
-                    'id': post_data.get('id'),
-                    'platform_id': post_data.get('platform_id'),
-                    'platform_name': post_data.get('platform_name', ''),
-                    'author': post_data.get('author', ''),
-                    'caption': post_data.get('caption', ''),
-                    'hashtags': post_data.get('hashtags', []),
-                    'metrics': post_data.get('metrics', {}),
-                    'posted_at': post_data.get('posted_at'),
-                    'fetched_at': post_data.get('fetched_at'),
-                    'language': post_data.get('language', ''),
-                    'media_url': post_data.get('media_url', ''),
-                    'sentiment': post_data.get('sentiment', 0),
-                    'score': post_data.get('score', 0),
-                    'score_trend': post_data.get('score_trend', 0),
-                }
-                # Nettoyer les valeurs None
-                document = {k: v for k, v in document.items() if v is not None}
-                documents.append(document)
-            
-            task = self.index.add_documents(documents)
+            documents = [build_document(post_data) for post_data in posts_data]
+            task = self.index.add_documents(documents, primary_key='id')
             logger.info(f"✅ {len(documents)} posts indexés (task: {task.task_uid})")
             return len(documents)
         except Exception as e:
@@ -202,21 +278,7 @@ class MeilisearchService:
     
     def _build_filter_string(self, filters: Dict[str, Any]) -> Optional[str]:
         """Construit une chaîne de filtre Meilisearch"""
-        filter_parts = []
-        
-        if 'platform_name' in filters:
-            filter_parts.append(f"platform_name = '{filters['platform_name']}'")
-        
-        if 'min_score' in filters:
-            filter_parts.append(f"score >= {filters['min_score']}")
-        
-        if 'min_trend_score' in filters:
-            filter_parts.append(f"score_trend >= {filters['min_trend_score']}")
-        
-        if 'language' in filters:
-            filter_parts.append(f"language = '{filters['language']}'")
-        
-        return ' AND '.join(filter_parts) if filter_parts else None
+        return build_filter_string(filters)
     
     def delete_post(self, post_id: str) -> bool:
         """Supprime un post de l'index"""
@@ -0,0 +1,189 @@
+# services/meilisearch_indexer.py
+# Pipeline d'indexation en masse : chunks bornés (docs + octets), concurrence bornée, suivi des tâches
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from core.config import settings
+from services.meilisearch_async import AsyncMeilisearchService, async_meilisearch_service
+from services.meilisearch_client import build_document
+from services.search_cache import bump_index_version
+
+logger = logging.getLogger(__name__)
+
+PostsSource = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+@dataclass
+class IndexingReport:
+    """Bilan d'une indexation en masse"""
+    indexed: int = 0
+    chunks: int = 0
+    retries: int = 0
+    bytes_sent: int = 0
+    elapsed: float = 0.0
+    failed_ids: List[str] = field(default_factory=list)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.indexed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "indexed": self.indexed,
+            "failed": len(self.failed_ids),
+            "failed_ids": self.failed_ids,
+            "chunks": self.chunks,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "elapsed_s": round(self.elapsed, 3),
+            "docs_per_s": round(self.docs_per_second, 1),
+            "bytes_per_s": round(self.bytes_per_second, 1),
+        }
+
+class BulkIndexer:
+    """Indexe un flux de posts par chunks bornés, avec un nombre borné de chunks en vol.
+
+    Chaque chunk attend la fin de sa tâche Meilisearch. Une erreur de transport
+    (réseau, 5xx, timeout de tâche) est réessayée avec backoff, puis tout le chunk
+    passe en échec. Les envois contournent le disjoncteur, réservé aux recherches.
+    Seule une tâche rejetée par Meilisearch (status 'failed') est coupée en deux
+    pour isoler les documents fautifs.
+    Les posts passent par build_document, sauf avec built (documents déjà construits).
+    En mode partial, les documents sont envoyés tels quels en mise à jour partielle.
+    """
+
+    def __init__(
+        self,
+        service: AsyncMeilisearchService = async_meilisearch_service,
+        index_uid: Optional[str] = None,
+        max_chunk_docs: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        task_timeout: Optional[float] = None,
+        retry_backoff: float = 0.5,
+        partial: bool = False,
+        built: bool = False
+    ):
+        self.service = service
+        self.index_uid = index_uid or service.index_name
+        self.max_chunk_docs = max_chunk_docs or settings.MEILI_INDEX_CHUNK_DOCS
+        self.max_chunk_bytes = max_chunk_bytes or settings.MEILI_INDEX_CHUNK_BYTES
+        self.concurrency = concurrency or settings.MEILI_INDEX_CONCURRENCY
+        self.max_retries = settings.MEILI_INDEX_MAX_RETRIES if max_retries is None else max_retries
+        self.task_timeout = task_timeout or settings.MEILI_TASK_TIMEOUT
+        self.retry_backoff = retry_backoff
+        self.partial = partial
+        self.built = built
+
+    @staticmethod
+    async def _aiter(posts: PostsSource) -> AsyncIterator[Dict[str, Any]]:
+        if hasattr(posts, '__aiter__'):
+            async for post in posts:
+                yield post
+        else:
+            for post in posts:
+                yield post
+
+    async def _chunks(self, posts: PostsSource) -> AsyncIterator[Tuple[List[str], List[bytes]]]:
+        """Découpe le flux en chunks bornés par nombre de documents et par octets"""
+        ids: List[str] = []
+        parts: List[bytes] = []
+        size = 2  # crochets du tableau JSON
+
+        async for post in self._aiter(posts):
+            document = post if self.partial or self.built else build_document(post)
+            encoded = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if parts and (len(parts) >= self.max_chunk_docs or size + len(encoded) + 1 > self.max_chunk_bytes):
+                yield ids, parts
+                ids, parts, size = [], [], 2
+            ids.append(str(document.get('id')))
+            parts.append(encoded)
+            size += len(encoded) + 1
+
+        if parts:
+            yield ids, parts
+
+    async def _send_chunk(self, ids: List[str], parts: List[bytes], report: IndexingReport):
+        """Envoie un chunk et attend sa tâche : retries sur erreur de transport, bissection sur rejet"""
+        payload = b'[' + b','.join(parts) + b']'
+        last_error: Any = None
+        rejected = False
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                report.retries += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+            try:
+                send = self.service.update_documents_raw if self.partial else self.service.add_documents_raw
+                task = await send(payload, index_uid=self.index_uid)
+                report.bytes_sent += len(payload)
+                result = await self.service.wait_for_task(task['taskUid'], timeout=self.task_timeout)
+                if result.get('status') == 'succeeded':
+                    report.indexed += len(ids)
+                    return
+                # Tâche rejetée par Meilisearch (document invalide...) : réessayer à l'identique ne sert à rien
+                last_error = result.get('error') or result.get('status')
+                rejected = result.get('status') == 'failed'
+                break
+            except Exception as e:
+                last_error = e
+
+        if rejected and len(ids) > 1:
+            # Isoler les documents fautifs plutôt que perdre tout le chunk
+            middle = len(ids) // 2
+            await self._send_chunk(ids[:middle], parts[:middle], report)
+            await self._send_chunk(ids[middle:], parts[middle:], report)
+            return
+
+        if rejected:
+            logger.error(f"❌ Échec indexation document {ids[0]}: {last_error}")
+        else:
+            # Meilisearch indisponible : couper le chunk ne ferait que multiplier les cycles de retry
+            logger.error(f"❌ Échec indexation d'un chunk de {len(ids)} documents: {last_error}")
+        report.failed_ids.extend(ids)
+
+    async def run(self, posts: PostsSource) -> IndexingReport:
+        """Indexe tout le flux et retourne le bilan (débit, ids en échec)"""
+        report = IndexingReport()
+        if not self.service.enabled:
+            return report
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        in_flight: set = set()
+
+        async def worker(ids: List[str], parts: List[bytes]):
+            try:
+                await self._send_chunk(ids, parts, report)
+            finally:
+                semaphore.release()
+
+        async for ids, parts in self._chunks(posts):
+            await semaphore.acquire()
+            report.chunks += 1
+            task = asyncio.create_task(worker(ids, parts))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+        report.elapsed = time.perf_counter() - started
+        if report.indexed:
+            # Nouveaux documents : invalider les recherches en cache
+            await bump_index_version()
+        logger.info(
+            f"✅ Indexation en masse '{self.index_uid}': {report.indexed} docs, "
+            f"{len(report.failed_ids)} échecs, {report.docs_per_second:.0f} docs/s, "
+            f"{report.bytes_per_second / 1024:.0f} Ko/s"
+        )
+        return report
@@ -0,0 +1,79 @@
+# services/meilisearch_settings.py
+# Application versionnée de la configuration Meilisearch (hors chemin d'écriture)
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from core.redis_client import redis
+from services.index_refresh import DocumentHashCache
+from services.meilisearch_client import MeilisearchService, meilisearch_service, settings_hash
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_HASH_KEY = "meili:settings_hash:{index_uid}"
+
+class MeilisearchSettingsManager:
+    """Applique INDEX_SETTINGS uniquement quand leur hash diffère du dernier hash appliqué.
+
+    Le hash appliqué est stocké dans Redis (partagé entre workers). Si Redis est
+    indisponible ou si l'index vient d'être créé, la configuration est poussée.
+    """
+
+    def __init__(self, service: MeilisearchService):
+        self.service = service
+
+    async def get_applied_hash(self, index_uid: str) -> Optional[str]:
+        """Récupère le hash de configuration déjà appliqué sur l'index"""
+        try:
+            return await redis.get(SETTINGS_HASH_KEY.format(index_uid=index_uid))
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponible, hash de configuration inconnu: {e}")
+            return None
+
+    async def mark_applied(self, index_uid: str, value: Optional[str] = None):
+        """Enregistre le hash appliqué (ex: après un swap d'index reconstruit)"""
+        value = value or settings_hash()
+        try:
+            await redis.set(SETTINGS_HASH_KEY.format(index_uid=index_uid), value)
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible de stocker le hash de configuration: {e}")
+
+    async def migrate(self, index_uid: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Crée l'index si besoin et pousse la configuration si elle a changé"""
+        if not self.service.client:
+            return {"status": "skipped", "reason": "Meilisearch client non initialisé"}
+
+        index_uid = index_uid or self.service.index_name
+        desired_hash = settings_hash()
+
+        try:
+            created = await asyncio.to_thread(self.service.ensure_index, index_uid)
+        except Exception as e:
+            logger.error(f"❌ Erreur vérification index '{index_uid}': {e}")
+            return {"status": "error", "index": index_uid, "error": str(e)}
+
+        applied_hash = await self.get_applied_hash(index_uid)
+        if not force and not created and applied_hash == desired_hash:
+            logger.info(f"✅ Configuration Meilisearch à jour sur '{index_uid}' (hash {desired_hash})")
+            return {"status": "up_to_date", "index": index_uid, "hash": desired_hash}
+
+        ok = await asyncio.to_thread(self.service.apply_settings, index_uid)
+        if not ok:
+            return {"status": "error", "index": index_uid, "hash": desired_hash}
+
+        await self.mark_applied(index_uid, desired_hash)
+        # Index créé ou reconfiguré : les hash des documents envoyés ne garantissent plus leur présence
+        try:
+            await DocumentHashCache(index_uid).clear()
+        except Exception as e:
+            logger.warning(f"⚠️ Hash de documents non effacés: {e}")
+        return {
+            "status": "applied",
+            "index": index_uid,
+            "hash": desired_hash,
+            "previous_hash": applied_hash,
+        }
+
+# Instance globale
+meilisearch_settings_manager = MeilisearchSettingsManager(meilisearch_service)
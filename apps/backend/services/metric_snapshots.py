@@ -0,0 +1,215 @@
+# services/metric_snapshots.py
+# Historique des métriques de posts : relevés en lot, taux de croissance, maintenance des partitions
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, func, insert, select, update  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from core.config import settings
+from core.redis_client import redis
+from db.base import SessionLocal, engine
+from db.models import Post, PostMetricSnapshot
+from db.partitions import ensure_snapshot_partitions, prune_snapshots
+from services.leaderboards import trending_leaderboards
+from services.search_outbox import enqueue_post_change
+
+logger = logging.getLogger(__name__)
+
+# Écart minimal entre deux relevés pour mesurer une vitesse (resynchronisations rapprochées = bruit)
+MIN_GROWTH_INTERVAL = timedelta(minutes=10)
+# Âge minimal retenu pour la vitesse depuis publication (un post de 2 minutes n'a pas 30x la vitesse d'un post d'une heure)
+MIN_PUBLICATION_AGE = timedelta(hours=1)
+# Maintenance : partitions à venir, rétention et tendances périmées, toutes les heures
+MAINTENANCE_INTERVAL = 3600
+# Un seul passage par intervalle pour toute la flotte (verrou Redis jamais relâché, expiré un peu avant le passage suivant)
+MAINTENANCE_LOCK_KEY = "metric_snapshots:maintenance"
+MAINTENANCE_LOCK_MARGIN = 60
+EXPIRE_BATCH = 1000
+
+def metric_count(metrics: Any, name: str) -> int:
+    """Compteur entier >= 0 depuis le dict metrics d'un post"""
+    if not isinstance(metrics, dict):
+        return 0
+    try:
+        return max(int(float(metrics.get(name) or 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def engagement(metrics: Any) -> int:
+    """likes + comments + shares"""
+    return sum(metric_count(metrics, name) for name in ('likes', 'comments', 'shares'))
+
+def engagement_velocity(gained: int, elapsed: timedelta, minimum: timedelta = MIN_GROWTH_INTERVAL) -> float:
+    """Interactions gagnées par heure (jamais négatif : likes / commentaires supprimés)"""
+    hours = max(elapsed, minimum).total_seconds() / 3600
+    return round(max(gained, 0) / hours, 4)
+
+def record_snapshots(db: Session, posts_data: List[dict], captured_at: Optional[datetime] = None) -> int:
+    """Insère un relevé par post (un seul INSERT multi-lignes), dans la transaction de la session.
+
+    Le dernier relevé d'un post présent plusieurs fois dans le lot gagne.
+    """
+    captured_at = captured_at or datetime.utcnow()
+    rows: Dict[str, dict] = {}
+    for post_data in posts_data:
+        post_id = post_data.get('id')
+        if not post_id:
+            continue
+        metrics = post_data.get('metrics')
+        rows[post_id] = {
+            'post_id': post_id,
+            'captured_at': captured_at,
+            'likes': metric_count(metrics, 'likes'),
+            'comments': metric_count(metrics, 'comments'),
+            'shares': metric_count(metrics, 'shares'),
+            'views': metric_count(metrics, 'views'),
+        }
+    if rows:
+        db.execute(insert(PostMetricSnapshot), list(rows.values()))
+    return len(rows)
+
+def oldest_snapshots(db: Session, post_ids: List[str], since: datetime, until: datetime) -> Dict[str, Tuple[datetime, int]]:
+    """Plus ancien relevé de chaque post entre since et until : {post_id: (captured_at, engagement)}"""
+    snapshot = PostMetricSnapshot
+    ranked = (
+        select(
+            snapshot.post_id,
+            snapshot.captured_at,
+            (snapshot.likes + snapshot.comments + snapshot.shares).label('engagement'),
+            func.row_number().over(partition_by=snapshot.post_id, order_by=snapshot.captured_at).label('rank'),
+        )
+        .where(snapshot.post_id.in_(post_ids), snapshot.captured_at >= since, snapshot.captured_at <= until)
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.post_id, ranked.c.captured_at, ranked.c.engagement).where(ranked.c.rank == 1)
+    ).all()
+    return {post_id: (captured_at, int(value or 0)) for post_id, captured_at, value in rows}
+
+def apply_growth_rates(db: Session, posts_data: List[dict], now: Optional[datetime] = None) -> int:
+    """score_trend = interactions par heure depuis le plus ancien relevé de la fenêtre
+    (METRIC_GROWTH_WINDOW_HOURS). Retourne le nombre de posts mesurés.
+
+    Sans relevé assez ancien, score_trend garde la vitesse moyenne depuis publication
+    calculée par transform_tiktok_video_to_post.
+    """
+    now = now or datetime.utcnow()
+    post_ids = list({post_data['id'] for post_data in posts_data if post_data.get('id')})
+    if not post_ids:
+        return 0
+    window = timedelta(hours=settings.METRIC_GROWTH_WINDOW_HOURS)
+    baselines = oldest_snapshots(db, post_ids, now - window, now - MIN_GROWTH_INTERVAL)
+    measured = 0
+    for post_data in posts_data:
+        baseline = baselines.get(post_data.get('id'))
+        if baseline is None:
+            continue
+        captured_at, previous = baseline
+        post_data['score_trend'] = engagement_velocity(engagement(post_data.get('metrics')) - previous, now - captured_at)
+        measured += 1
+    return measured
+
+def expire_stale_trends(now: Optional[datetime] = None, batch_size: int = EXPIRE_BATCH) -> List[str]:
+    """score_trend = 0 pour les posts synchronisés sans relevé dans la fenêtre de croissance.
+
+    Un post sorti du flux synchronisé n'est plus mesuré : sa dernière vitesse resterait
+    sinon indéfiniment dans les classements. fetched_at suit les relevés (même
+    synchronisation) et est indexé. Les posts sans aucun relevé (créés par l'API) ne sont
+    jamais mesurés et gardent leur score_trend. Le changement passe par l'outbox
+    (Meilisearch, index locaux) ; retourne les ids éteints pour les retirer des classements Redis.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=settings.METRIC_GROWTH_WINDOW_HOURS)
+    expired: List[str] = []
+    db = SessionLocal()
+    try:
+        while True:
+            post_ids = db.execute(
+                select(Post.id)
+                .where(
+                    Post.score_trend > 0,
+                    Post.fetched_at < cutoff,
+                    exists().where(PostMetricSnapshot.post_id == Post.id),
+                )
+                .limit(batch_size)
+            ).scalars().all()
+            if not post_ids:
+                break
+            db.execute(update(Post).where(Post.id.in_(post_ids)).values(score_trend=0))
+            for post_id in post_ids:
+                enqueue_post_change(db, post_id)
+            db.commit()
+            expired.extend(post_ids)
+    finally:
+        db.close()
+    return expired
+
+def run_snapshot_maintenance() -> Tuple[int, int, List[str]]:
+    """Crée les partitions des prochains jours, applique la rétention et éteint les tendances
+    périmées : (jours couverts, partitions / lignes supprimées, ids des posts éteints)"""
+    covered = ensure_snapshot_partitions(engine, settings.METRIC_SNAPSHOT_PARTITIONS_AHEAD)
+    pruned = prune_snapshots(engine, settings.METRIC_SNAPSHOT_RETENTION_DAYS)
+    if pruned:
+        logger.info(f"✅ Historique des métriques: {pruned} partitions / lignes expirées supprimées")
+    expired = expire_stale_trends()
+    if expired:
+        logger.info(f"✅ {len(expired)} posts sans relevé depuis {settings.METRIC_GROWTH_WINDOW_HOURS} h sortis des tendances")
+    return covered, pruned, expired
+
+class MetricSnapshotMaintenance:
+    """Boucle horaire de maintenance (partitions, rétention, tendances périmées)"""
+
+    def __init__(self, interval: float = MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _claim(self) -> bool:
+        """Passage réservé à ce worker pour l'intervalle en cours (Redis indisponible :
+        on passe quand même, les partitions à venir ne peuvent pas attendre)"""
+        try:
+            ttl = max(int(self.interval) - MAINTENANCE_LOCK_MARGIN, 1)
+            return bool(await redis.set(MAINTENANCE_LOCK_KEY, '1', nx=True, ex=ttl))
+        except Exception as e:
+            logger.warning(f"⚠️ Verrou de maintenance indisponible, passage sans verrou: {e}")
+            return True
+
+    async def run_once(self) -> bool:
+        """Un passage de maintenance ; False si un autre worker l'a déjà fait pour cet intervalle"""
+        if not await self._claim():
+            return False
+        _, _, expired = await asyncio.to_thread(run_snapshot_maintenance)
+        if expired:
+            # Sans attendre le drainer (absent si Meilisearch n'est pas configuré)
+            await trending_leaderboards.remove_many(expired)
+        return True
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur maintenance historique des métriques: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Démarre la boucle en tâche de fond"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        """Arrête la boucle de maintenance"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Instance globale
+metric_snapshot_maintenance = MetricSnapshotMaintenance()
@@ -0,0 +1,191 @@
+# services/search_cache.py
+# Cache Redis des recherches Meilisearch : clés canoniques versionnées par index
+
+import hashlib
+import json
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from services.cache import (
+    cache_get_json, cache_set_json, cache_mget_json, cache_mset_json, cache_incr, cache_get_int
+)
+from services.circuit_breaker import CircuitOpenError
+from services.meilisearch_async import AsyncMeilisearchService, async_meilisearch_service
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_VERSION_KEY = "search:index_version"
+SEARCH_CACHE_HITS_KEY = "search:cache:hits"
+SEARCH_CACHE_MISSES_KEY = "search:cache:misses"
+
+def normalize_query(query: str) -> str:
+    """Normalise une requête : NFKC, minuscules, espaces fusionnés"""
+    return ' '.join(unicodedata.normalize('NFKC', query or '').lower().split())
+
+def _canonical_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Trie les clés et les listes (l'ordre d'une liste de valeurs de filtre est sans effet)"""
+    canonical: Dict[str, Any] = {}
+    for key, value in sorted((filters or {}).items()):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(
+                json.dumps(_canonical_filters(v), sort_keys=True, default=str) if isinstance(v, dict) else str(v)
+                for v in value
+            )
+        canonical[key] = value
+    return canonical
+
+def search_cache_key(
+    version: int,
+    query: str,
+    limit: int,
+    offset: int,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[List[str]] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> str:
+    """Construit la clé de cache canonique d'une recherche"""
+    payload = json.dumps(
+        {
+            'q': normalize_query(query),
+            'f': _canonical_filters(filters),
+            's': list(sort or []),
+            'l': limit,
+            'o': offset,
+            'x': extra or {},
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"search:v{version}:{digest}"
+
+async def get_index_version() -> int:
+    """Version courante de l'index (fait partie de chaque clé de cache)"""
+    return await cache_get_int(SEARCH_INDEX_VERSION_KEY)
+
+async def bump_index_version() -> Optional[int]:
+    """Invalide toutes les recherches en cache d'un coup (sans scan de clés)"""
+    try:
+        return await cache_incr(SEARCH_INDEX_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Impossible d'incrémenter la version de l'index de recherche: {e}")
+        return None
+
+async def cached_search(
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[List[str]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    service: AsyncMeilisearchService = async_meilisearch_service,
+    ttl: Optional[int] = None
+) -> Dict[str, Any]:
+    """Recherche Meilisearch derrière le cache Redis.
+
+    Seuls les résultats valides sont mis en cache. Si Redis est indisponible,
+    la recherche est exécutée directement.
+    """
+    try:
+        version = await get_index_version()
+    except Exception as e:
+        logger.warning(f"⚠️ Cache de recherche indisponible: {e}")
+        return await service.search_posts(query, limit, offset, filters, sort, options=options)
+
+    key = search_cache_key(version, query, limit, offset, filters, sort, extra=options)
+    try:
+        cached = await cache_get_json(key)
+        if cached is not None:
+            await cache_incr(SEARCH_CACHE_HITS_KEY)
+            return cached
+        await cache_incr(SEARCH_CACHE_MISSES_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Lecture du cache de recherche impossible: {e}")
+
+    try:
+        results = await service.search(query, limit, offset, filters, sort, options=options)
+    except CircuitOpenError:
+        # Disjoncteur ouvert : l'appelant bascule sur la recherche de secours
+        return {'hits': [], 'estimatedTotalHits': 0, 'limit': limit, 'offset': offset}
+    except Exception as e:
+        logger.error(f"❌ Erreur recherche: {e}")
+        return {'hits': [], 'estimatedTotalHits': 0, 'limit': limit, 'offset': offset}
+
+    try:
+        await cache_set_json(key, results, ttl=ttl or settings.SEARCH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Écriture du cache de recherche impossible: {e}")
+    return results
+
+async def cached_multi_search(
+    queries: List[Dict[str, Any]],
+    service: AsyncMeilisearchService = async_meilisearch_service,
+    ttl: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Plusieurs recherches derrière le cache : un MGET Redis, puis un seul
+    /multi-search Meilisearch pour les requêtes absentes du cache.
+
+    Chaque requête est un dict (query, limit, offset, filters, sort, options).
+    Les résultats sont retournés dans l'ordre des requêtes.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    keys: List[Optional[str]] = [None] * len(queries)
+
+    try:
+        version = await get_index_version()
+        keys = [
+            search_cache_key(
+                version,
+                query.get('query', ''),
+                query.get('limit', 20),
+                query.get('offset', 0),
+                query.get('filters'),
+                query.get('sort'),
+                extra=query.get('options'),
+            )
+            for query in queries
+        ]
+        results = await cache_mget_json(keys)
+        hits = sum(1 for result in results if result is not None)
+        if hits:
+            await cache_incr(SEARCH_CACHE_HITS_KEY, hits)
+        if hits < len(queries):
+            await cache_incr(SEARCH_CACHE_MISSES_KEY, len(queries) - hits)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache de recherche indisponible: {e}")
+        keys = [None] * len(queries)
+        results = [None] * len(queries)
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    fetched = await service.multi_search([queries[i] for i in missing])
+    to_cache: Dict[str, Any] = {}
+    for i, result in zip(missing, fetched):
+        results[i] = result
+        if keys[i] is not None:
+            to_cache[keys[i]] = result
+
+    try:
+        await cache_mset_json(to_cache, ttl=ttl or settings.SEARCH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Écriture du cache de recherche impossible: {e}")
+    return results
+
+async def search_cache_stats() -> Dict[str, Any]:
+    """Compteurs hit/miss du cache de recherche (partagés entre workers)"""
+    hits = await cache_get_int(SEARCH_CACHE_HITS_KEY)
+    misses = await cache_get_int(SEARCH_CACHE_MISSES_KEY)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'index_version': await get_index_version(),
+    }
@@ -0,0 +1,282 @@
+# services/search_filters.py
+# Expressions de filtre Meilisearch typées : AST, échappement des valeurs, gabarits mémoïsés par forme
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+FilterValue = Union[str, int, float, bool, datetime, date]
+
+# Noms d'attributs acceptés (jamais interpolés sans validation)
+_ATTRIBUTE_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_.]*$')
+
+@dataclass(frozen=True)
+class Eq:
+    """attribut = valeur (ou != si negate)"""
+    attribute: str
+    value: FilterValue
+    negate: bool = False
+
+@dataclass(frozen=True)
+class In:
+    """attribut IN [valeurs] : sur un attribut tableau (hashtags), au moins une valeur présente"""
+    attribute: str
+    values: Tuple[FilterValue, ...]
+
+@dataclass(frozen=True)
+class Range:
+    """Bornes numériques ou dates (gte/lte inclusives, gt/lt exclusives)"""
+    attribute: str
+    gte: Optional[FilterValue] = None
+    lte: Optional[FilterValue] = None
+    gt: Optional[FilterValue] = None
+    lt: Optional[FilterValue] = None
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple['FilterNode', ...]
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple['FilterNode', ...]
+
+@dataclass(frozen=True)
+class Not:
+    child: 'FilterNode'
+
+FilterNode = Union[Eq, In, Range, And, Or, Not]
+
+def all_of(*children: Optional[FilterNode]) -> Optional[FilterNode]:
+    """AND des filtres non vides (None si aucun)"""
+    nodes = tuple(child for child in children if child is not None)
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else And(nodes)
+
+def any_of(*children: Optional[FilterNode]) -> Optional[FilterNode]:
+    """OR des filtres non vides (None si aucun)"""
+    nodes = tuple(child for child in children if child is not None)
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else Or(nodes)
+
+def _attribute(name: str) -> str:
+    if not isinstance(name, str) or not _ATTRIBUTE_RE.match(name):
+        raise ValueError(f"Attribut de filtre invalide: {name!r}")
+    return name
+
+def _literal(value: FilterValue) -> str:
+    """Valeur de filtre : nombres tels quels, chaînes entre guillemets échappées"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime, date)):
+        return repr(to_timestamp(value))
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+def to_timestamp(value: Union[datetime, date]) -> int:
+    """Date -> timestamp Unix (les dates naïves sont considérées en UTC)"""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+# Emplacement d'une valeur dans un gabarit de filtre
+_SLOT = object()
+
+def _shape(node: FilterNode, values: List[FilterValue]) -> Tuple[Any, ...]:
+    """Forme d'un AST (attributs, opérateurs, type de chaque valeur) ; les valeurs vont dans values.
+
+    Le type fait partie de la forme : Eq("x", True) et Eq("x", 1) sont égaux pour les
+    dataclasses mais ne partagent pas de gabarit.
+    """
+    if isinstance(node, Eq):
+        values.append(node.value)
+        return ('eq', node.attribute, node.negate, type(node.value))
+    if isinstance(node, In):
+        values.extend(node.values)
+        return ('in', node.attribute, tuple(type(value) for value in node.values))
+    if isinstance(node, Range):
+        bounds = (node.gte, node.gt, node.lte, node.lt)
+        values.extend(bound for bound in bounds if bound is not None)
+        return ('range', node.attribute, tuple(None if bound is None else type(bound) for bound in bounds))
+    if isinstance(node, (And, Or)):
+        kind = 'and' if isinstance(node, And) else 'or'
+        return (kind, tuple(_shape(child, values) for child in node.children))
+    if isinstance(node, Not):
+        return ('not', _shape(node.child, values))
+    raise TypeError(f"Nœud de filtre inconnu: {type(node).__name__}")
+
+def _pieces(shape: Tuple[Any, ...]) -> List[Any]:
+    """Texte d'une forme, _SLOT à la place de chaque valeur (dans l'ordre de _shape)"""
+    kind = shape[0]
+    if kind == 'eq':
+        _, attribute, negate, _ = shape
+        return [f"{_attribute(attribute)} {'!=' if negate else '='} ", _SLOT]
+
+    if kind == 'in':
+        _, attribute, types = shape
+        if not types:
+            raise ValueError(f"Liste IN vide pour {attribute!r}")
+        pieces: List[Any] = [f"{_attribute(attribute)} IN ["]
+        for i in range(len(types)):
+            pieces.extend([', ', _SLOT] if i else [_SLOT])
+        pieces.append(']')
+        return pieces
+
+    if kind == 'range':
+        _, attribute, types = shape
+        attribute = _attribute(attribute)
+        present = tuple(bound is not None for bound in types)
+        if not any(present):
+            raise ValueError(f"Range sans borne pour {attribute!r}")
+        if present == (True, False, True, False):
+            # Forme native, plus compacte
+            return [f"{attribute} ", _SLOT, " TO ", _SLOT]
+        pieces = []
+        for operator, bound in zip(('>=', '>', '<=', '<'), present):
+            if bound:
+                if pieces:
+                    pieces.append(' AND ')
+                pieces.extend([f"{attribute} {operator} ", _SLOT])
+        return pieces
+
+    if kind in ('and', 'or'):
+        if not shape[1]:
+            raise ValueError("Groupe booléen vide")
+        joiner = ' AND ' if kind == 'and' else ' OR '
+        pieces = []
+        for i, child in enumerate(shape[1]):
+            pieces.extend([joiner, '('] if i else ['('])
+            pieces.extend(_pieces(child))
+            pieces.append(')')
+        return pieces
+
+    return ['NOT (', *_pieces(shape[1]), ')']
+
+@lru_cache(maxsize=1024)
+def _filter_template(shape: Tuple[Any, ...]) -> Tuple[str, ...]:
+    """Gabarit d'une forme : fragments de texte entre les valeurs (une de moins que de fragments)"""
+    fragments = ['']
+    for piece in _pieces(shape):
+        if piece is _SLOT:
+            fragments.append('')
+        else:
+            fragments[-1] += piece
+    return tuple(fragments)
+
+def compile_filter(node: FilterNode) -> str:
+    """Compile un AST en chaîne de filtre Meilisearch.
+
+    Le gabarit est mémoïsé par forme (attributs, opérateurs, types des valeurs) :
+    les dashboards qui changent seulement de valeurs le réutilisent, et chaque
+    valeur est échappée à chaque appel.
+    """
+    values: List[FilterValue] = []
+    fragments = _filter_template(_shape(node, values))
+    parts = [fragments[0]]
+    for value, fragment in zip(values, fragments[1:]):
+        parts.append(_literal(value))
+        parts.append(fragment)
+    return ''.join(parts)
+
+def _comparable(value: Any) -> Any:
+    """Valeur normalisée pour l'évaluation locale (chaînes sans casse, dates en timestamp)"""
+    if isinstance(value, (datetime, date)):
+        return to_timestamp(value)
+    if isinstance(value, str):
+        return value.casefold()
+    return value
+
+def _document_values(document: Dict[str, Any], attribute: str) -> Tuple[Any, ...]:
+    value: Any = document
+    for part in attribute.split('.'):
+        if not isinstance(value, dict):
+            return ()
+        value = value.get(part)
+    if value is None:
+        return ()
+    values = value if isinstance(value, (list, tuple)) else (value,)
+    return tuple(_comparable(item) for item in values)
+
+def _in_range(value: Any, node: Range) -> bool:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    bounds = ((node.gte, lambda b: value >= b), (node.gt, lambda b: value > b),
+              (node.lte, lambda b: value <= b), (node.lt, lambda b: value < b))
+    return all(check(_comparable(bound)) for bound, check in bounds if bound is not None)
+
+def matches_filter(node: Optional[FilterNode], document: Dict[str, Any]) -> bool:
+    """Évalue un AST sur un document au format de l'index (build_document), comme Meilisearch :
+    chaînes comparées sans casse, attribut tableau vrai si un élément correspond,
+    attribut absent jamais égal ni dans une plage. Sert l'index de secours en mémoire.
+    """
+    if node is None:
+        return True
+    if isinstance(node, Eq):
+        found = _comparable(node.value) in _document_values(document, _attribute(node.attribute))
+        return not found if node.negate else found
+    if isinstance(node, In):
+        present = _document_values(document, _attribute(node.attribute))
+        return any(_comparable(value) in present for value in node.values)
+    if isinstance(node, Range):
+        return any(_in_range(value, node) for value in _document_values(document, _attribute(node.attribute)))
+    if isinstance(node, And):
+        return all(matches_filter(child, document) for child in node.children)
+    if isinstance(node, Or):
+        return any(matches_filter(child, document) for child in node.children)
+    if isinstance(node, Not):
+        return not matches_filter(node.child, document)
+    raise TypeError(f"Nœud de filtre inconnu: {type(node).__name__}")
+
+def _values(value: Any) -> Tuple[FilterValue, ...]:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value, key=str)) if isinstance(value, (set, frozenset)) else tuple(value)
+    return (value,)
+
+def _eq_or_in(attribute: str, value: Any) -> FilterNode:
+    values = _values(value)
+    return Eq(attribute, values[0]) if len(values) == 1 else In(attribute, values)
+
+def _range(attribute: str, low: Any, high: Any) -> Optional[FilterNode]:
+    if low is None and high is None:
+        return None
+    return Range(attribute, gte=low, lte=high)
+
+def filters_from_dict(filters: Dict[str, Any]) -> Optional[FilterNode]:
+    """Traduit le dict de filtres des endpoints en AST.
+
+    Clés: platform_name, language (valeur ou liste), hashtags (liste, au moins un),
+    min_score/max_score, min_trend_score/max_trend_score,
+    posted_after/posted_before (datetime), any (liste de dicts combinés en OR).
+    """
+    nodes = []
+    for key, attribute in (('platform_name', 'platform_name'), ('language', 'language'),
+                           ('platform_id', 'platform_id'), ('score_bucket', 'score_bucket')):
+        if filters.get(key) is not None:
+            nodes.append(_eq_or_in(attribute, filters[key]))
+
+    hashtags = filters.get('hashtags')
+    if hashtags:
+        nodes.append(In('hashtags', _values(hashtags)))
+
+    nodes.append(_range('score', filters.get('min_score'), filters.get('max_score')))
+    nodes.append(_range('score_trend', filters.get('min_trend_score'), filters.get('max_trend_score')))
+
+    posted_after = filters.get('posted_after')
+    posted_before = filters.get('posted_before')
+    nodes.append(_range(
+        'posted_at_ts',
+        to_timestamp(posted_after) if posted_after is not None else None,
+        to_timestamp(posted_before) if posted_before is not None else None,
+    ))
+
+    groups: Iterable[Dict[str, Any]] = filters.get('any') or []
+    nodes.append(any_of(*(filters_from_dict(group) for group in groups)))
+
+    return all_of(*nodes)
@@ -0,0 +1,15 @@
+# services/search_outbox.py
+# Écriture dans l'outbox de synchronisation posts -> Meilisearch
+
+from typing import Union
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from db.models import SearchOutbox
+
+OUTBOX_UPSERT = 'upsert'
+OUTBOX_DELETE = 'delete'
+
+def enqueue_post_change(db: Union[Session, AsyncSession], post_id: str, operation: str = OUTBOX_UPSERT):
+    """Ajoute un changement à l'outbox sans commit : il part dans la transaction du post
+    (session synchrone des jobs ou asynchrone des routers, add() n'attend rien)"""
+    db.add(SearchOutbox(post_id=post_id, operation=operation))
@@ -0,0 +1,367 @@
+# services/similarity_index.py
+# Index "posts similaires" local : TF-IDF haché (caption + hashtags) dans une matrice NumPy memory-mappée
+
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+from sqlalchemy import select  # type: ignore
+
+from core.config import settings
+from db.base import SessionLocal
+from db.models import Post
+from services.fallback_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+HASHTAG_WEIGHT = 2.0       # un hashtag pèse plus qu'un mot de la caption
+QUERY_CHUNK_ROWS = 65536   # lignes de la matrice par produit matriciel
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'LOCK'
+
+def _decode_hashtags(value: Any) -> List[str]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value else []
+        except ValueError:
+            value = [value]
+    return [str(tag) for tag in value or []]
+
+def post_features(caption: Optional[str], hashtags: Any) -> Counter:
+    """Termes pondérés d'un post : tokens de la caption + hashtags préfixés par #"""
+    features: Counter = Counter(tokenize(caption))
+    for tag in _decode_hashtags(hashtags):
+        for token in tokenize(tag):
+            features['#' + token] += HASHTAG_WEIGHT
+    return features
+
+def feature_similarity(a: Counter, b: Counter) -> float:
+    """Cosinus entre deux jeux de termes (post_features), sans IDF : repli hors index"""
+    dot = sum(weight * b[term] for term, weight in a.items() if term in b)
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm if norm else 0.0
+
+class _Generation:
+    """Une génération de l'index : matrice memmap + ids + IDF figée à la construction"""
+
+    def __init__(self, directory: str, name: str, dim: int, capacity: int, idf: np.ndarray, mode: str):
+        self.directory = directory
+        self.name = name
+        self.dim = dim
+        self.capacity = capacity
+        self.idf = idf
+        self.matrix = np.memmap(self.path('vectors'), dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self.ids: List[str] = []
+        self.row_by_id: Dict[str, int] = {}
+        # Octets du fichier d'ids déjà lus (les autres workers y ajoutent leurs lignes)
+        self.ids_offset = 0
+
+    def path(self, kind: str) -> str:
+        extension = {'vectors': 'f32', 'ids': 'ids', 'meta': 'json'}[kind]
+        return os.path.join(self.directory, f"{self.name}.{extension}")
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def write_meta(self):
+        with open(self.path('meta'), 'w') as f:
+            json.dump({'dim': self.dim, 'capacity': self.capacity, 'idf': self.idf.tolist()}, f)
+
+    def append_ids(self, post_ids: List[str]):
+        with open(self.path('ids'), 'a') as f:
+            f.writelines(f"{post_id}\n" for post_id in post_ids)
+            self.ids_offset = f.tell()
+
+    def read_ids(self):
+        """Lit les ids ajoutés au fichier depuis la dernière lecture (lignes complètes seulement)"""
+        with open(self.path('ids'), 'rb') as f:
+            f.seek(self.ids_offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for post_id in data[:end].decode('utf-8').splitlines():
+            self.row_by_id[post_id] = len(self.ids)
+            self.ids.append(post_id)
+        self.ids_offset += end
+
+    def remove_files(self):
+        for kind in ('vectors', 'ids', 'meta'):
+            try:
+                os.remove(self.path(kind))
+            except FileNotFoundError:
+                pass
+
+class SimilarPostsIndex:
+    """Plus proches voisins (cosinus) sur des vecteurs TF-IDF hachés.
+
+    Les vecteurs normalisés sont stockés dans un fichier memmap de capacité fixe
+    (doublée si besoin). La sync y ajoute des lignes sans reconstruction ; une
+    reconstruction écrit une nouvelle génération puis bascule dessus (fichier
+    CURRENT + référence en mémoire), les requêtes en cours gardent l'ancienne.
+
+    Les workers d'un hôte partagent les fichiers : les écritures passent par un
+    verrou fichier (LOCK) et chacun reprend celles des autres avec refresh().
+    """
+
+    def __init__(self, directory: Optional[str] = None, dim: Optional[int] = None):
+        self.directory = directory or settings.SIMILAR_INDEX_DIR
+        self.dim = dim or settings.SIMILAR_INDEX_DIM
+        self._generation: Optional[_Generation] = None
+        self._lock = threading.RLock()
+
+    @property
+    def ready(self) -> bool:
+        return self._generation is not None
+
+    def __len__(self) -> int:
+        return self._generation.count if self._generation else 0
+
+    def __contains__(self, post_id: object) -> bool:
+        generation = self._generation
+        return generation is not None and str(post_id) in generation.row_by_id
+
+    @contextmanager
+    def _file_lock(self):
+        """Verrou exclusif entre process sur les fichiers de l'index"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _bucket(self, term: str) -> Tuple[int, float]:
+        h = zlib.crc32(term.encode('utf-8'))
+        return h % self.dim, (1.0 if h & 0x80000000 else -1.0)
+
+    def _vectorize(self, features: Counter, idf: np.ndarray) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term, tf in features.items():
+            bucket, sign = self._bucket(term)
+            vector[bucket] += sign * (1.0 + math.log(tf)) * idf[bucket]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    # --- Chargement / reconstruction -------------------------------------------------
+
+    def load(self) -> bool:
+        """Ouvre la génération courante depuis le disque (memmap, pas de copie en mémoire)"""
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                name = f.read().strip()
+            with open(os.path.join(self.directory, f"{name}.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        generation = _Generation(
+            self.directory, name, meta['dim'], meta['capacity'],
+            np.asarray(meta['idf'], dtype=np.float32), mode='r+'
+        )
+        # Chaque id n'apparaît qu'une fois : une mise à jour réécrit sa ligne de matrice
+        generation.read_ids()
+        self.dim = generation.dim
+        self._generation = generation
+        logger.info(f"✅ Index de similarité chargé: {generation.count} posts ({name})")
+        return True
+
+    def refresh(self) -> bool:
+        """Reprend les écritures des autres workers : nouvelle génération (CURRENT) ou lignes ajoutées"""
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return self.ready
+        with self._lock:
+            generation = self._generation
+            if generation is None or generation.name != name:
+                return self.load()
+            try:
+                generation.read_ids()
+            except FileNotFoundError:
+                # Génération remplacée entre la lecture de CURRENT et celle des ids
+                return self.load()
+        return True
+
+    def rebuild(self, posts: Iterable[Tuple[str, Optional[str], Any]]) -> int:
+        """Reconstruit l'index depuis (id, caption, hashtags) puis bascule sans interruption"""
+        os.makedirs(self.directory, exist_ok=True)
+        ids: List[str] = []
+        features: List[Counter] = []
+        df = np.zeros(self.dim, dtype=np.float64)
+        for post_id, caption, hashtags in posts:
+            post_terms = post_features(caption, hashtags)
+            if not post_terms:
+                continue
+            ids.append(str(post_id))
+            features.append(post_terms)
+            for bucket in {self._bucket(term)[0] for term in post_terms}:
+                df[bucket] += 1
+
+        idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+        capacity = max(1024, int(len(ids) * 1.25))
+        name = datetime.utcnow().strftime('gen_%Y%m%d%H%M%S%f')
+        generation = _Generation(self.directory, name, self.dim, capacity, idf, mode='w+')
+        for row, post_terms in enumerate(features):
+            generation.matrix[row] = self._vectorize(post_terms, idf)
+        generation.matrix.flush()
+        generation.append_ids(ids)
+        generation.ids = ids
+        generation.row_by_id = {post_id: row for row, post_id in enumerate(ids)}
+        generation.write_meta()
+
+        with self._file_lock():
+            self._swap(generation)
+        logger.info(f"✅ Index de similarité reconstruit: {len(ids)} posts ({name})")
+        return len(ids)
+
+    def _swap(self, generation: _Generation):
+        """Bascule atomique vers une nouvelle génération, l'ancienne est supprimée"""
+        with self._lock:
+            previous = self._generation
+            current_path = os.path.join(self.directory, CURRENT_FILE)
+            with open(current_path + '.tmp', 'w') as f:
+                f.write(generation.name)
+            os.replace(current_path + '.tmp', current_path)
+            self._generation = generation
+        if previous is not None and previous.name != generation.name:
+            previous.remove_files()
+
+    def _grow(self, generation: _Generation, needed: int) -> _Generation:
+        """Copie la génération dans un fichier de capacité doublée"""
+        capacity = max(generation.capacity * 2, needed)
+        name = datetime.utcnow().strftime('gen_%Y%m%d%H%M%S%f')
+        grown = _Generation(self.directory, name, generation.dim, capacity, generation.idf, mode='w+')
+        grown.matrix[:generation.count] = generation.matrix[:generation.count]
+        grown.matrix.flush()
+        grown.append_ids(generation.ids)
+        grown.ids = list(generation.ids)
+        grown.row_by_id = dict(generation.row_by_id)
+        grown.write_meta()
+        return grown
+
+    # --- Mises à jour incrémentales ------------------------------------------------
+
+    def append_many(self, posts: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute ou remplace des posts (dicts avec id, caption, hashtags), IDF inchangée"""
+        if self._generation is None and not self.refresh():
+            return 0
+        posts = [post for post in posts if post.get('id')]
+        with self._file_lock(), self._lock:
+            # Lignes ajoutées par les autres workers : les nouveaux posts vont à la suite
+            self.refresh()
+            generation = self._generation
+            new_ids = {str(p['id']) for p in posts} - set(generation.row_by_id)
+            grown = generation.count + len(new_ids) > generation.capacity
+            if grown:
+                generation = self._grow(generation, generation.count + len(new_ids))
+
+            appended: List[str] = []
+            for post in posts:
+                post_id = str(post['id'])
+                vector = self._vectorize(post_features(post.get('caption'), post.get('hashtags')), generation.idf)
+                row = generation.row_by_id.get(post_id)
+                if row is None:
+                    row = generation.count
+                    generation.ids.append(post_id)
+                    generation.row_by_id[post_id] = row
+                    appended.append(post_id)
+                generation.matrix[row] = vector
+            generation.matrix.flush()
+            generation.append_ids(appended)
+            if grown:
+                self._swap(generation)
+        return len(posts)
+
+    def delete_many(self, post_ids: Iterable[str]):
+        """Retire des posts (ligne mise à zéro : similarité nulle)"""
+        if self._generation is None and not self.refresh():
+            return
+        with self._file_lock(), self._lock:
+            self.refresh()
+            generation = self._generation
+            for post_id in post_ids:
+                row = generation.row_by_id.get(str(post_id))
+                if row is not None:
+                    generation.matrix[row] = 0
+            generation.matrix.flush()
+
+    # --- Requêtes ------------------------------------------------------------------
+
+    def similar(
+        self,
+        post_id: str,
+        caption: Optional[str] = None,
+        hashtags: Any = None,
+        limit: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Posts les plus proches (cosinus), hors le post lui-même.
+
+        Utilise le vecteur indexé du post, ou le calcule depuis caption/hashtags s'il est absent.
+        """
+        generation = self._generation
+        if generation is None:
+            return []
+        row = generation.row_by_id.get(str(post_id))
+        if row is not None:
+            query = np.array(generation.matrix[row])
+        else:
+            query = self._vectorize(post_features(caption, hashtags), generation.idf)
+        if not query.any():
+            return []
+
+        k = limit + 1
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        count = generation.count
+        for start in range(0, count, QUERY_CHUNK_ROWS):
+            scores = generation.matrix[start:min(count, start + QUERY_CHUNK_ROWS)] @ query
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores)
+        return [
+            (generation.ids[best_rows[i]], float(best_scores[i]))
+            for i in order
+            if best_rows[i] != row and best_scores[i] > 0
+        ][:limit]
+
+def _posts_from_db(batch_size: int = 1000) -> Iterable[Tuple[str, Optional[str], Any]]:
+    """Lit (id, caption, hashtags) de tous les posts en flux"""
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(Post.id, Post.caption, Post.hashtags)
+            .order_by(Post.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for row in db.execute(stmt):
+            yield row.id, row.caption, row.hashtags
+    finally:
+        db.close()
+
+def rebuild_similar_posts_index() -> Dict[str, Any]:
+    """Reconstruit l'index de similarité depuis la base (à lancer hors event loop)"""
+    try:
+        count = similar_posts_index.rebuild(_posts_from_db())
+        return {"status": "completed", "posts": count}
+    except Exception as e:
+        logger.error(f"❌ Erreur reconstruction index de similarité: {e}")
+        return {"status": "failed", "error": str(e)}
+
+# Instance globale
+similar_posts_index = SimilarPostsIndex()
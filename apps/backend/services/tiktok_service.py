@@ -6,6 +6,7 @@ import httpx
 import logging
 from datetime import datetime
 from core.config import settings
+from services.metric_snapshots import MIN_PUBLICATION_AGE, engagement_velocity
 
 logger = logging.getLogger(__name__)
 
@@ -128,7 +129,17 @@ class TikTokService:
             # Score simple: engagement rate = (likes + comments + shares) / views
             engagement_rate = (likes + comments + shares) / views if views > 0 else 0
             score = engagement_rate * 100  # Normaliser sur 100
-            score_trend = score  # Pour l'instant, même valeur
+            
+            # create_time est un timestamp Unix : en UTC naïf comme fetched_at (utcnow), quel que soit le fuseau de l'hôte
+            posted_at = datetime.utcfromtimestamp(
+                int(video_info.get("create_time", 0))
+            ) if video_info.get("create_time") else datetime.utcnow()
+            fetched_at = datetime.utcnow()
+            # Tendance = vitesse d'engagement (interactions / heure) : moyenne depuis publication ici,
+            # remplacée par la croissance mesurée sur post_metric_snapshots lors de la synchronisation
+            score_trend = engagement_velocity(
+                likes + comments + shares, fetched_at - posted_at, minimum=MIN_PUBLICATION_AGE
+            )
             
             post = {
                 "id": video_info.get("id", ""),
@@ -142,10 +153,8 @@ class TikTokService:
                     "shares": shares,
                     "views": views
                 },
-                "posted_at": datetime.fromtimestamp(
-                    int(video_info.get("create_time", 0))
-                ) if video_info.get("create_time") else datetime.utcnow(),
-                "fetched_at": datetime.utcnow(),
+                "posted_at": posted_at,
+                "fetched_at": fetched_at,
                 "language": video_info.get("language", "en"),
                 "media_url": video_info.get("cover_image_url", "") or video_info.get("video_url", ""),
                 "sentiment": 0,  # À calculer si nécessaire
@@ -0,0 +1,30 @@
+# tests/conftest.py
+# Environnement de test : variables requises par core.config, base SQLite jetable
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("OAUTH_STATE_SECRET", "test-oauth-state-secret")
+os.environ.setdefault("WEBHOOK_VERIFY_TOKEN", "test-webhook-token")
+
+import pytest  # noqa: E402
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Redis en mémoire (fakeredis) à la place du client partagé des classements"""
+    from fakeredis import aioredis
+
+    from services import leaderboards
+
+    client = aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(leaderboards, "redis", client)
+    return client
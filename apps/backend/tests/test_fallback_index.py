@@ -0,0 +1,129 @@
+# tests/test_fallback_index.py
+# Index de secours en mémoire : recherche ET / préfixe, filtres évalués comme Meilisearch
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.base import Base
+from db.models import Platform, Post, SearchOutbox
+from services import fallback_index
+from services.fallback_index import InMemoryPostIndex, tokenize
+from services.search_filters import Eq, In, Not, Range, matches_filter
+
+POSTS = [
+    dict(id="a", caption="Chat drôle", platform_name="TikTok", language="fr", hashtags=["Cats"],
+         score=5, score_trend=1, posted_at=datetime(2026, 1, 1)),
+    dict(id="b", caption="chat triste", platform_name="tiktok", language="en", hashtags=["dogs"],
+         score=9, score_trend=2, posted_at=datetime(2026, 3, 1)),
+    dict(id="c", caption="un chaton", platform_name="x", score=1, score_trend=3),
+]
+
+@pytest.fixture
+def index():
+    index = InMemoryPostIndex(max_posts=100)
+    index.upsert_many(POSTS)
+    return index
+
+def ids(index, query, filters=None, **options):
+    documents, _ = index.search(query, filters=filters, **options)
+    return [document["id"] for document in documents]
+
+def test_tokenize_strips_case_and_accents():
+    assert tokenize("Chat DRÔLE, été!") == ["chat", "drole", "ete"]
+
+def test_last_term_is_a_prefix_and_results_follow_score_trend(index):
+    assert ids(index, "chat") == ["c", "b", "a"]
+    assert ids(index, "chat triste") == ["b"]
+    assert ids(index, "triste chat") == ["b"]
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"platform_name": "tiktok"}, ["b", "a"]),
+    ({"language": "FR"}, ["a"]),
+    ({"max_score": 6}, ["c", "a"]),
+    ({"min_score": 2, "max_score": 6}, ["a"]),
+    ({"hashtags": ["cats", "birds"]}, ["a"]),
+    ({"posted_after": datetime(2026, 2, 1)}, ["b"]),
+    ({"posted_before": datetime(2026, 2, 1)}, ["a"]),
+])
+def test_every_search_filter_is_applied(index, filters, expected):
+    assert ids(index, "chat", filters) == expected
+
+def test_total_counts_all_matches_not_the_page(index):
+    documents, total = index.search("chat", limit=1, offset=1)
+    assert [document["id"] for document in documents] == ["b"]
+    assert total == 3
+
+def test_updates_and_deletes(index):
+    index.upsert_many([dict(POSTS[0], caption="chien")])
+    assert ids(index, "chien") == ["a"]
+    assert "a" not in ids(index, "chat")
+    index.delete_many(["b"])
+    assert ids(index, "chat") == ["c"]
+
+def test_matches_filter_semantics():
+    document = {"platform_name": "TikTok", "hashtags": ["Cats", "dogs"], "score": 5}
+    assert matches_filter(None, document)
+    assert matches_filter(Eq("platform_name", "tiktok"), document)
+    assert matches_filter(Eq("hashtags", "cats"), document)
+    assert matches_filter(In("hashtags", ("birds", "DOGS")), document)
+    assert matches_filter(Range("score", gte=5, lt=6), document)
+    assert not matches_filter(Range("score", gt=5), document)
+    # Attribut absent : jamais égal ni dans une plage, vrai sous NOT
+    assert not matches_filter(Eq("language", "fr"), document)
+    assert not matches_filter(Range("posted_at_ts", gte=0), document)
+    assert matches_filter(Not(Eq("language", "fr")), document)
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fallback.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all([Platform(id=1, name="tiktok"), Post(id="a", platform_id=1, caption="chat drôle")])
+        db.commit()
+    monkeypatch.setattr(fallback_index, "SessionLocal", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+def test_index_follows_api_and_sync_writes(database):
+    index = InMemoryPostIndex(max_posts=100)
+    assert not index.fresh
+    index._load_recent()
+    assert index.fresh and ids(index, "chat") == ["a"]
+
+    with Session(database) as db:
+        # API : post + entrée d'outbox ; job de sync : fetched_at seul ; suppression via l'outbox
+        db.add_all([Post(id="b", platform_id=1, caption="chat api"), SearchOutbox(post_id="b", operation="upsert")])
+        db.add(Post(id="c", platform_id=1, caption="chat sync", fetched_at=datetime.utcnow()))
+        db.delete(db.get(Post, "a"))
+        db.add(SearchOutbox(post_id="a", operation="delete"))
+        db.commit()
+    assert index._follow() == 3
+    assert sorted(ids(index, "chat")) == ["b", "c"]
+    # Déjà appliqués : ni l'outbox ni le recouvrement de fetched_at ne les rejouent
+    assert index._follow() == 0
+
+def test_skipped_outbox_ids_are_read_again(database):
+    index = InMemoryPostIndex(max_posts=100)
+    index._load_recent()
+    with Session(database) as db:
+        # L'id 2 est validé après le 3 (transactions concurrentes)
+        db.add_all([Post(id="late", platform_id=1, caption="retard"), Post(id="early", platform_id=1, caption="avance")])
+        db.add(SearchOutbox(id=3, post_id="early", operation="upsert"))
+        db.commit()
+        index._follow()
+        db.add(SearchOutbox(id=2, post_id="late", operation="upsert"))
+        db.commit()
+    index._follow()
+    assert ids(index, "retard") == ["late"]
+
+def test_stale_or_empty_index_is_not_fresh(database):
+    index = InMemoryPostIndex(max_posts=100)
+    index._load_recent()
+    index.synced_at -= index.max_staleness + 1
+    assert not index.fresh
+    index._follow()
+    assert index.fresh
+    index.delete_many(["a"])
+    assert not index.fresh
@@ -0,0 +1,114 @@
+# tests/test_fulltext.py
+# Plein texte côté base : traduction websearch -> FTS5, index FTS5 SQLite et filtres de recherche
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from db.base import Base
+from db.fulltext import ensure_fulltext_schema, fulltext_search, websearch_to_fts5
+from db.models import Platform, Post
+from posts.export import post_filter_conditions
+
+@pytest.mark.parametrize("query, expected", [
+    ("chat", '"chat"'),
+    ("chat noir", '"chat" AND "noir"'),
+    ('"chat noir" drôle', '"chat noir" AND "drôle"'),
+    ("chat -chien", '"chat" NOT "chien"'),
+    ("chat or chien", '("chat" OR "chien")'),
+    ("chat OR chien noir", '("chat" OR "chien") AND "noir"'),
+    ("or chat", '"chat"'),
+])
+def test_websearch_to_fts5(query, expected):
+    assert websearch_to_fts5(query) == expected
+
+@pytest.mark.parametrize("query", ["", "   ", "-chien", "***", '""', "OR"])
+def test_websearch_to_fts5_without_positive_term(query):
+    assert websearch_to_fts5(query) is None
+
+def test_fts5_operators_never_pass_through():
+    # NEAR, *, ^, : et les parenthèses disparaissent : les mots d'un même terme forment une phrase
+    assert websearch_to_fts5('NEAR(a b) caption:x* ^y') == '"NEAR a" AND "b" AND "caption x" AND "y"'
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "fulltext.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    ensure_fulltext_schema(engine)
+    with Session(engine) as db:
+        db.add_all([Platform(id=1, name="tiktok"), Platform(id=2, name="x")])
+        db.add_all([
+            Post(id="a", platform_id=1, caption="chat drôle", language="fr", hashtags=["cats"],
+                 score=5, score_trend=1, posted_at=datetime(2026, 1, 1)),
+            Post(id="b", platform_id=1, caption="chat triste", language="en", hashtags=["dogs"],
+                 score=9, score_trend=2, posted_at=datetime(2026, 3, 1)),
+            Post(id="c", platform_id=2, caption="un chat", score=1, score_trend=3),
+        ])
+        db.commit()
+    yield engine, f"sqlite+aiosqlite:///{path}"
+    engine.dispose()
+
+async def search(url, q, **filters):
+    async_engine = create_async_engine(url)
+    try:
+        async with AsyncSession(async_engine) as db:
+            posts = await fulltext_search(db, q, post_filter_conditions("sqlite", **filters))
+            return [post.id for post in posts]
+    finally:
+        await async_engine.dispose()
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("filters, expected", [
+    ({}, ["c", "b", "a"]),
+    ({"platform": "x"}, ["c"]),
+    ({"platform": " X"}, ["c"]),
+    ({"language": "fr"}, ["a"]),
+    ({"language": "FR"}, ["a"]),
+    ({"max_score": 6}, ["c", "a"]),
+    ({"hashtag": ["dogs"]}, ["b"]),
+    ({"posted_after": datetime(2026, 2, 1)}, ["b"]),
+    ({"posted_before": datetime(2026, 2, 1)}, ["a"]),
+])
+async def test_fulltext_search_applies_filters(database, filters, expected):
+    _, url = database
+    assert await search(url, "chat", **filters) == expected
+
+@pytest.mark.anyio
+async def test_fts_index_follows_updates_deletes_and_vacuum(database):
+    engine, url = database
+    with Session(engine) as db:
+        db.get(Post, "a").caption = "chien"
+        db.delete(db.get(Post, "b"))
+        db.add(Post(id="d", platform_id=1, caption="chat bleu", score_trend=0))
+        db.commit()
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+    assert await search(url, "chien") == ["a"]
+    assert await search(url, "chat") == ["c", "d"]
+
+def test_legacy_external_content_table_is_replaced(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE posts_fts USING fts5(caption, author, hashtags, content='posts', content_rowid='rowid')"
+        ))
+        conn.execute(text("INSERT INTO platforms(id, name) VALUES (1, 'tiktok')"))
+        conn.execute(text("INSERT INTO posts(id, platform_id, caption) VALUES ('a', 1, 'chat')"))
+
+    ensure_fulltext_schema(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT post_id FROM posts_fts_rowids")).scalars().all() == ["a"]
+        matched = conn.execute(text("SELECT rowid FROM posts_fts WHERE posts_fts MATCH 'chat'")).scalars().all()
+    assert len(matched) == 1
+    engine.dispose()
+
+def test_startup_never_runs_postgresql_ddl():
+    # Aucune connexion ouverte : le schéma PostgreSQL ne vient que de la migration (CONCURRENTLY)
+    engine = create_engine("postgresql://nobody@127.0.0.1:1/none")
+    assert ensure_fulltext_schema(engine) is False
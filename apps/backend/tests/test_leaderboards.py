@@ -0,0 +1,125 @@
+# tests/test_leaderboards.py
+# Classements tendance Redis : ordre des ex aequo, reprise après curseur, évictions, clés normalisées
+import pytest
+
+from services import leaderboards
+from services.leaderboards import (
+    EVICTED_KEY, MAINTAINED_KEY, MEMBERSHIPS_KEY, READY_KEY, REBUILD_REQUEST_KEY, TrendingLeaderboards,
+    leaderboard_key, post_leaderboard_keys,
+)
+
+pytestmark = pytest.mark.anyio
+
+def post(post_id, score, **extra):
+    return {"id": post_id, "score_trend": score, "platform_name": "TikTok", **extra}
+
+@pytest.fixture
+async def board(fake_redis):
+    await fake_redis.set(READY_KEY, "1")
+    await fake_redis.set(MAINTAINED_KEY, "1")
+    return TrendingLeaderboards(size=100)
+
+def bytewise_order(scores):
+    """score_trend DESC, puis id par octets décroissants (ordre Redis, keyset en collation C / BINARY)"""
+    return sorted(scores, key=lambda post_id: (-scores[post_id], [-b for b in post_id.encode()]))
+
+async def test_ties_are_ordered_by_id_bytes_descending(board):
+    scores = {"a": 2.0, "b": 5.0, "c": 2.0, "d": 2.0, "e": 5.0}
+    await board.update_many(post(post_id, score) for post_id, score in scores.items())
+
+    entries = await board.top(leaderboard_key(), 10)
+    assert [post_id for post_id, _ in entries] == bytewise_order(scores) == ["e", "b", "d", "c", "a"]
+
+async def test_ties_are_not_collation_aware(board):
+    # Majuscules avant minuscules en octets : une collation linguistique en base ordonnerait autrement
+    await board.update_many([post("B", 1.0), post("a", 1.0)])
+    assert [post_id for post_id, _ in await board.top(leaderboard_key(), 10)] == ["a", "B"]
+
+async def test_pages_after_a_cursor_skip_ties_already_served(board):
+    # 12 ex aequo : plus que limit + 1, la reprise parcourt plusieurs tranches ZREVRANGEBYSCORE
+    scores = {f"t{i:02d}": 1.0 for i in range(12)}
+    scores.update({"top": 9.0, "low": 0.5})
+    await board.update_many(post(post_id, score) for post_id, score in scores.items())
+
+    seen, after = [], None
+    while True:
+        entries = await board.top(leaderboard_key(), 3, after)
+        seen.extend(post_id for post_id, _ in entries[:3])
+        if len(entries) <= 3:
+            break
+        last_id, last_score = entries[2]
+        after = (last_score, last_id)
+    assert seen == bytewise_order(scores)
+
+async def test_zero_score_removes_the_post_everywhere(board, fake_redis):
+    await board.update_many([post("a", 3.0, language="fr", hashtags=["Cats"])])
+    assert len(await fake_redis.hget(MEMBERSHIPS_KEY, "a")) > 0
+
+    await board.update_many([post("a", 0, language="fr", hashtags=["Cats"])])
+    for key in post_leaderboard_keys(post("a", 0, language="fr", hashtags=["Cats"])):
+        assert await fake_redis.zscore(key, "a") is None
+    assert await fake_redis.hget(MEMBERSHIPS_KEY, "a") is None
+
+async def test_changing_platform_moves_the_post(board, fake_redis):
+    await board.update_many([post("a", 3.0)])
+    await board.update_many([post("a", 3.0, platform_name="Instagram")])
+
+    assert await fake_redis.zscore(leaderboard_key("platform", "tiktok"), "a") is None
+    assert await fake_redis.zscore(leaderboard_key("platform", "instagram"), "a") == 3.0
+
+async def test_keys_normalize_platform_and_language_but_keep_hashtag_case():
+    assert leaderboard_key("platform", " TikTok ") == leaderboard_key("platform", "tiktok")
+    assert leaderboard_key("language", "FR") == leaderboard_key("language", "fr")
+    assert leaderboard_key("hashtag", "#Cats") == leaderboard_key("hashtag", "Cats")
+    assert leaderboard_key("hashtag", "Cats") != leaderboard_key("hashtag", "cats")
+    with pytest.raises(ValueError):
+        leaderboard_key("author", "x")
+
+async def test_not_ready_leaderboard_defers_to_the_database(fake_redis):
+    board = TrendingLeaderboards(size=100)
+    await board.update_many([post("a", 1.0)])
+    assert await board.top(leaderboard_key(), 10) is None
+
+async def test_unmaintained_leaderboard_defers_to_the_database(board, fake_redis):
+    await board.update_many([post("a", 1.0)])
+    await fake_redis.delete(MAINTAINED_KEY)
+    assert await board.top(leaderboard_key(), 10) is None
+    await board.heartbeat()
+    assert await board.top(leaderboard_key(), 10) == [("a", 1.0)]
+    assert 0 < await fake_redis.ttl(MAINTAINED_KEY) <= leaderboards.MAINTAINED_TTL
+
+async def test_truncation_records_the_highest_evicted_score(fake_redis, monkeypatch):
+    rebuilds = []
+
+    async def rebuild():
+        rebuilds.append(True)
+    monkeypatch.setattr(leaderboards, "rebuild_trending_leaderboards", rebuild)
+
+    await fake_redis.set(READY_KEY, "1")
+    await fake_redis.set(MAINTAINED_KEY, "1")
+    board = TrendingLeaderboards(size=3)
+    await board.update_many(post(f"p{i}", float(i)) for i in range(1, 7))
+
+    key = leaderboard_key()
+    assert await fake_redis.zrevrange(key, 0, -1) == ["p6", "p5", "p4"]
+    assert await fake_redis.zscore(EVICTED_KEY, key) == 3.0
+
+    # Première page dans la partie fiable ; la suite (page incomplète) vient de la base
+    assert await board.top(key, 2) == [("p6", 6.0), ("p5", 5.0), ("p4", 4.0)]
+    assert await board.top(key, 2, after=(5.0, "p5")) is None
+    assert rebuilds == []
+
+    # Un membre passe sous le plus haut évincé : base + reconstruction demandée une seule fois
+    await board.update_many([post("p4", 2.0)])
+    assert await board.top(key, 5) is None
+    assert await board.top(key, 5) is None
+    await board._rebuild_task
+    assert rebuilds == [True]
+    assert await fake_redis.exists(REBUILD_REQUEST_KEY)
+
+async def test_remove_many_clears_every_leaderboard(board, fake_redis):
+    await board.update_many([post("a", 2.0, hashtags=["x"]), post("b", 1.0)])
+    await board.remove_many(["a"])
+
+    assert await board.top(leaderboard_key(), 10) == [("b", 1.0)]
+    assert await fake_redis.zscore(leaderboard_key("hashtag", "x"), "a") is None
@@ -0,0 +1,111 @@
+# tests/test_meilisearch_indexer.py
+# BulkIndexer : retries sur erreur de transport, bissection des chunks rejetés
+import json
+
+import httpx
+import pytest
+
+from services import meilisearch_indexer
+from services.meilisearch_indexer import BulkIndexer
+
+pytestmark = pytest.mark.anyio
+
+class FakeMeilisearch:
+    """Service Meilisearch minimal : rejette toute tâche qui contient un id de bad_ids"""
+
+    enabled = True
+    index_name = "posts"
+
+    def __init__(self, bad_ids=(), down=False):
+        self.bad_ids = set(bad_ids)
+        self.down = down
+        self.calls = []
+        self._tasks = {}
+
+    async def add_documents_raw(self, payload, index_uid=None):
+        ids = [document["id"] for document in json.loads(payload)]
+        self.calls.append(ids)
+        if self.down:
+            raise httpx.ConnectError("Meilisearch indisponible")
+        task_uid = len(self.calls)
+        self._tasks[task_uid] = "failed" if self.bad_ids.intersection(ids) else "succeeded"
+        return {"taskUid": task_uid}
+
+    async def wait_for_task(self, task_uid, timeout=None):
+        status = self._tasks[task_uid]
+        result = {"status": status}
+        if status == "failed":
+            result["error"] = {"code": "invalid_document_fields"}
+        return result
+
+@pytest.fixture(autouse=True)
+def no_cache_bump(monkeypatch):
+    async def bump():
+        return None
+    monkeypatch.setattr(meilisearch_indexer, "bump_index_version", bump)
+
+def posts(count):
+    return [{"id": f"p{i}", "caption": f"post {i}"} for i in range(count)]
+
+def indexer(service, **options):
+    defaults = dict(max_chunk_docs=8, max_chunk_bytes=1_000_000, concurrency=2, max_retries=2, retry_backoff=0)
+    return BulkIndexer(service=service, **{**defaults, **options})
+
+async def test_rejected_chunk_is_bisected_down_to_the_bad_document():
+    service = FakeMeilisearch(bad_ids={"p5"})
+    report = await indexer(service).run(posts(8))
+
+    assert report.failed_ids == ["p5"]
+    assert report.indexed == 7
+    assert report.retries == 0
+    # 8 -> 4 + 4 -> 2 + 2 -> 1 + 1 : le chunk sain de 4 passe en un appel
+    assert ["p5"] in service.calls
+    assert ["p0", "p1", "p2", "p3"] in service.calls
+
+async def test_several_bad_documents_are_all_isolated():
+    service = FakeMeilisearch(bad_ids={"p0", "p7"})
+    report = await indexer(service).run(posts(8))
+
+    assert sorted(report.failed_ids) == ["p0", "p7"]
+    assert report.indexed == 6
+
+async def test_transport_error_fails_the_whole_chunk_without_bisection():
+    service = FakeMeilisearch(down=True)
+    report = await indexer(service).run(posts(8))
+
+    # 1 envoi + 2 retries du même chunk, jamais coupé
+    assert service.calls == [[f"p{i}" for i in range(8)]] * 3
+    assert report.retries == 2
+    assert sorted(report.failed_ids) == sorted(f"p{i}" for i in range(8))
+    assert report.indexed == 0
+
+async def test_chunks_are_bounded_by_document_count():
+    service = FakeMeilisearch()
+    report = await indexer(service, max_chunk_docs=3).run(posts(8))
+
+    assert report.chunks == 3
+    assert report.indexed == 8
+    assert sorted(len(ids) for ids in service.calls) == [2, 3, 3]
+
+async def test_clearing_an_empty_hash_cache_sends_no_unlink(monkeypatch):
+    from fakeredis import aioredis
+
+    from services import index_refresh
+
+    client = aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(index_refresh, "redis", client)
+    # Autre index que celui par défaut : aucune clé à effacer (UNLINK sans clé est une erreur Redis)
+    await index_refresh.DocumentHashCache(index_uid="other", service=FakeMeilisearch()).clear()
+
+    await client.hset(f"{index_refresh.DOC_HASHES_PREFIX}:other:1", "p1", "h")
+    await index_refresh.DocumentHashCache(index_uid="other", service=FakeMeilisearch()).clear()
+    assert await client.keys("*") == []
+
+async def test_built_documents_are_not_rebuilt(monkeypatch):
+    built = []
+    monkeypatch.setattr(meilisearch_indexer, "build_document", lambda post: built.append(post["id"]) or post)
+    service = FakeMeilisearch()
+    report = await indexer(service, built=True).run(posts(3))
+    assert report.indexed == 3 and built == []
+    await indexer(service).run(posts(1))
+    assert built == ["p0"]
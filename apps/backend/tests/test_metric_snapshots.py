@@ -0,0 +1,58 @@
+# tests/test_metric_snapshots.py
+# Maintenance de l'historique des métriques : tendances périmées, un passage par intervalle pour la flotte
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.base import Base
+from db.models import Platform, Post, PostMetricSnapshot, SearchOutbox
+from services import metric_snapshots
+from services.metric_snapshots import MAINTENANCE_LOCK_KEY, MetricSnapshotMaintenance, expire_stale_trends
+
+NOW = datetime(2026, 10, 18, 12)
+STALE = NOW - timedelta(days=3)
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'snapshots.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Platform(id=1, name="tiktok"))
+        db.add_all([
+            # Sorti du flux synchronisé : relevés anciens, vitesse figée
+            Post(id="synced", platform_id=1, score_trend=4, fetched_at=STALE),
+            # Créé par l'API : jamais relevé
+            Post(id="api", platform_id=1, score_trend=2, fetched_at=STALE),
+            # Encore synchronisé
+            Post(id="fresh", platform_id=1, score_trend=3, fetched_at=NOW),
+        ])
+        db.add_all([
+            PostMetricSnapshot(post_id="synced", captured_at=STALE, likes=1, comments=0, shares=0, views=0),
+            PostMetricSnapshot(post_id="fresh", captured_at=NOW, likes=1, comments=0, shares=0, views=0),
+        ])
+        db.commit()
+    monkeypatch.setattr(metric_snapshots, "SessionLocal", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+def test_only_synced_posts_without_recent_snapshot_expire(database):
+    assert expire_stale_trends(now=NOW) == ["synced"]
+    with Session(database) as db:
+        trends = dict(db.execute(select(Post.id, Post.score_trend)).all())
+        outbox = db.execute(select(SearchOutbox.post_id)).scalars().all()
+    assert trends == {"synced": 0, "api": 2, "fresh": 3}
+    assert outbox == ["synced"]
+
+@pytest.mark.anyio
+async def test_one_maintenance_pass_per_interval_for_the_fleet(fake_redis, monkeypatch):
+    runs = []
+    monkeypatch.setattr(metric_snapshots, "redis", fake_redis)
+    monkeypatch.setattr(metric_snapshots, "run_snapshot_maintenance", lambda: runs.append(1) or (0, 0, []))
+    workers = [MetricSnapshotMaintenance(interval=3600) for _ in range(3)]
+
+    assert [await worker.run_once() for worker in workers] == [True, False, False]
+    assert runs == [1]
+    # Expire avant le passage suivant des autres workers
+    assert 0 < await fake_redis.ttl(MAINTENANCE_LOCK_KEY) < 3600
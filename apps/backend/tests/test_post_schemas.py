@@ -0,0 +1,16 @@
+# tests/test_post_schemas.py
+# Validation de metrics.likes : entier exigé par l'index ix_posts_likes
+import pytest
+from pydantic import ValidationError
+
+from posts.schemas import PostCreate, PostUpdate
+
+@pytest.mark.parametrize("likes, expected", [(12, 12), (12.0, 12), ("12", 12), (" -3 ", -3), (None, None)])
+def test_integral_likes_are_stored_as_int(likes, expected):
+    post = PostCreate(id="p", platform_id=1, metrics={"likes": likes, "views": 1.5})
+    assert post.metrics == {"likes": expected, "views": 1.5}
+
+@pytest.mark.parametrize("likes", [12.7, "12.7", "abc", True, [1], 10 ** 18])
+def test_non_integral_likes_are_rejected(likes):
+    with pytest.raises(ValidationError):
+        PostUpdate(metrics={"likes": likes})
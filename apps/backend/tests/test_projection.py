@@ -0,0 +1,35 @@
+# tests/test_projection.py
+# Encodage orjson des listes de posts : octets figés, même document JSON que la réponse Pydantic
+from datetime import datetime, timezone
+from typing import List
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from posts.projection import POST_RESPONSE_FIELDS, encode_post_rows
+from posts.schemas import PostResponse
+
+POST = dict(
+    id="p1", platform_id=1, author="auteur", caption="Été 🎉", hashtags='["mode"]',
+    metrics={"likes": 3, "ratio": 0.00001}, posted_at=datetime(2026, 1, 1, 12, 0, 0, 7),
+    fetched_at=datetime(2026, 1, 1, 12, tzinfo=timezone.utc), language="fr", media_url=None,
+    sentiment=-0.5, score=2, score_trend=1e16,
+)
+
+def test_encoded_bytes_are_pinned():
+    fields = ["id", "score", "score_trend", "metrics", "posted_at", "fetched_at"]
+    row = tuple(POST[field] for field in fields)
+    assert encode_post_rows([row], fields) == (
+        b'[{"id":"p1","score":2.0,"score_trend":1e16,"metrics":{"likes":3,"ratio":0.00001},'
+        b'"posted_at":"2026-01-01T12:00:00.000007","fetched_at":"2026-01-01T12:00:00Z"}]'
+    )
+
+def test_same_document_as_pydantic_not_same_bytes():
+    row = tuple(POST[field] for field in POST_RESPONSE_FIELDS)
+    validated = PostResponse.model_validate(dict(POST, hashtags=["mode"]))
+    pydantic_body = JSONResponse(TypeAdapter(List[PostResponse]).dump_python([validated], mode="json")).body
+    body = encode_post_rows([row])
+    assert orjson.loads(body) == orjson.loads(pydantic_body)
+    # Exposants des floats : 1e+16 / 1e-05 côté json, 1e16 / 0.00001 côté orjson
+    assert body != pydantic_body
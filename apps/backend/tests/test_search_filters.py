@@ -0,0 +1,95 @@
+# tests/test_search_filters.py
+# AST de filtres Meilisearch : échappement des valeurs, compilation, dict des endpoints
+from datetime import date, datetime, timezone
+
+import pytest
+
+from services.meilisearch_client import build_filter_string
+from services.search_filters import (
+    And, Eq, In, Not, Or, Range, _filter_template, all_of, any_of, compile_filter, filters_from_dict, to_timestamp,
+)
+
+def test_string_values_are_quoted_and_escaped():
+    assert compile_filter(Eq("author", 'say "hi"')) == 'author = "say \\"hi\\""'
+    assert compile_filter(Eq("author", "back\\slash")) == 'author = "back\\\\slash"'
+
+def test_injection_attempt_stays_inside_the_literal():
+    compiled = compile_filter(Eq("platform_name", 'tiktok" OR score > 0 OR platform_name = "x'))
+    assert compiled == 'platform_name = "tiktok\\" OR score > 0 OR platform_name = \\"x"'
+
+def test_numbers_booleans_and_dates():
+    assert compile_filter(Eq("score", 12)) == "score = 12"
+    assert compile_filter(Eq("score", 1.5)) == "score = 1.5"
+    assert compile_filter(Eq("flag", True)) == "flag = true"
+    moment = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    assert compile_filter(Eq("posted_at_ts", moment)) == f"posted_at_ts = {int(moment.timestamp())}"
+
+def test_naive_dates_are_utc():
+    assert to_timestamp(datetime(1970, 1, 2)) == 86400
+    assert to_timestamp(date(1970, 1, 2)) == 86400
+
+@pytest.mark.parametrize("attribute", ["score OR 1", "score = 1", "", "1score", 'a"b'])
+def test_invalid_attribute_names_are_rejected(attribute):
+    with pytest.raises(ValueError):
+        compile_filter(Eq(attribute, 1))
+
+def test_ranges():
+    assert compile_filter(Range("score", gte=10, lte=20)) == "score 10 TO 20"
+    assert compile_filter(Range("score", gte=10)) == "score >= 10"
+    assert compile_filter(Range("score", gt=1, lt=5)) == "score > 1 AND score < 5"
+    with pytest.raises(ValueError):
+        compile_filter(Range("score"))
+
+def test_in_and_boolean_groups():
+    node = And((In("hashtags", ("a", "b")), Or((Eq("language", "fr"), Not(Eq("language", "en"))))))
+    assert compile_filter(node) == '(hashtags IN ["a", "b"]) AND ((language = "fr") OR (NOT (language = "en")))'
+    assert compile_filter(Eq("language", "en", negate=True)) == 'language != "en"'
+    with pytest.raises(ValueError):
+        compile_filter(In("hashtags", ()))
+
+def test_all_of_and_any_of_drop_empty_children():
+    assert all_of(None, None) is None
+    assert any_of(None, Eq("a", 1)) == Eq("a", 1)
+    assert all_of(Eq("a", 1), None, Eq("b", 2)) == And((Eq("a", 1), Eq("b", 2)))
+
+def test_templates_are_memoized_by_shape():
+    _filter_template.cache_clear()
+    assert compile_filter(And((Eq("platform_name", "tiktok"), Range("score", gte=1)))) == (
+        '(platform_name = "tiktok") AND (score >= 1)'
+    )
+    # Mêmes attributs et types, autres valeurs : même gabarit
+    assert compile_filter(And((Eq("platform_name", "x"), Range("score", gte=7)))) == (
+        '(platform_name = "x") AND (score >= 7)'
+    )
+    assert _filter_template.cache_info().hits == 1
+
+def test_equal_values_of_different_types_are_not_conflated():
+    # True == 1 pour les dataclasses : le type fait partie de la forme mise en cache
+    assert Eq("flag", True) == Eq("flag", 1)
+    assert compile_filter(Eq("flag", True)) == "flag = true"
+    assert compile_filter(Eq("flag", 1)) == "flag = 1"
+    assert compile_filter(In("flag", (1, True))) == "flag IN [1, true]"
+
+def test_filters_from_dict():
+    posted_after = datetime(2026, 1, 1)
+    node = filters_from_dict({
+        "platform_name": "tiktok",
+        "language": ["fr", "en"],
+        "hashtags": ["cats"],
+        "min_score": 10,
+        "posted_after": posted_after,
+    })
+    assert compile_filter(node) == (
+        '(platform_name = "tiktok") AND (language IN ["fr", "en"]) AND (hashtags IN ["cats"]) '
+        f'AND (score >= 10) AND (posted_at_ts >= {to_timestamp(posted_after)})'
+    )
+
+def test_filters_from_dict_any_groups():
+    node = filters_from_dict({"any": [{"language": "fr"}, {"min_score": 50}]})
+    assert compile_filter(node) == '(language = "fr") OR (score >= 50)'
+
+def test_build_filter_string():
+    assert build_filter_string(None) is None
+    assert build_filter_string({}) is None
+    assert build_filter_string({"platform_name": 'a"b'}) == 'platform_name = "a\\"b"'
+    assert build_filter_string(Eq("score", 1)) == "score = 1"
@@ -0,0 +1,64 @@
+# tests/test_similarity_index.py
+# Index de similarité partagé entre workers (fichiers memmap) et repli en base hors index
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from db.base import Base
+from db.models import Platform, Post
+from posts.posts_endpoints import _similar_posts_db
+from services.similarity_index import SimilarPostsIndex, feature_similarity, post_features
+
+POSTS = [
+    ("a", "chat noir sur le toit", ["cats"]),
+    ("b", "chat blanc dans le jardin", ["cats"]),
+    ("c", "recette de gâteau", ["food"]),
+]
+
+def test_feature_similarity():
+    cat = post_features("chat noir", ["cats"])
+    assert feature_similarity(cat, cat) == pytest.approx(1.0)
+    assert feature_similarity(cat, post_features("gâteau", ["food"])) == 0.0
+    assert feature_similarity(cat, post_features("", [])) == 0.0
+
+def test_workers_see_each_other_writes(tmp_path):
+    # Deux instances sur le même répertoire : deux workers du même hôte
+    writer, reader = SimilarPostsIndex(str(tmp_path), dim=64), SimilarPostsIndex(str(tmp_path), dim=64)
+    writer.rebuild(POSTS)
+    assert reader.load() and len(reader) == 3
+
+    writer.append_many([{"id": "d", "caption": "chat roux", "hashtags": ["cats"]}])
+    assert "d" not in reader
+    reader.refresh()
+    assert "d" in reader and "d" in [post_id for post_id, _ in reader.similar("a")]
+
+    # Le lecteur écrit à la suite des lignes de l'autre, sans réutiliser sa ligne
+    reader.append_many([{"id": "e", "caption": "chat gris", "hashtags": ["cats"]}])
+    writer.refresh()
+    assert len(writer) == len(reader) == 5
+
+    # Capacité dépassée : nouvelle génération, reprise via CURRENT
+    writer.append_many({"id": f"n{i}", "caption": f"chat {i}", "hashtags": ["cats"]} for i in range(1100))
+    reader.refresh()
+    assert len(reader) == 1105 and "n1099" in reader
+
+@pytest.mark.anyio
+async def test_database_fallback_ranks_posts_sharing_a_hashtag(tmp_path):
+    path = tmp_path / "similar.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Platform(id=1, name="tiktok"))
+        db.add_all(Post(id=post_id, platform_id=1, caption=caption, hashtags=tags) for post_id, caption, tags in POSTS)
+        db.add(Post(id="d", platform_id=1, caption="chat noir", hashtags=["cats"]))
+        db.commit()
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(async_engine) as db:
+            neighbours = await _similar_posts_db(db, await db.get(Post, "a"), 10)
+    finally:
+        await async_engine.dispose()
+    assert [post_id for post_id, _ in neighbours] == ["d", "b"]
@@ -0,0 +1,102 @@
+# tests/test_trending_cursors.py
+# Curseurs de pagination : encodage, et reprise d'une page tendance entre Redis et la base
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from core.pagination import decode_cursor, encode_cursor
+from db.base import Base
+from db.models import Platform, Post
+from posts.posts_endpoints import _trending_page
+from posts.projection import post_columns
+from services.leaderboards import MAINTAINED_KEY, READY_KEY, leaderboard_key, trending_leaderboards
+
+pytestmark = pytest.mark.anyio
+
+# Trois groupes d'ex aequo : les pages se coupent au milieu d'un groupe
+SCORES = {f"p{i:02d}": float(3 - i // 5) for i in range(15)}
+# Ordre de référence : score_trend DESC, id DESC ; ids ASCII de même forme, pour lesquels l'ordre
+# des octets (Redis) et celui de la base coïncident
+EXPECTED = sorted(SCORES, key=lambda post_id: (-SCORES[post_id], [-ord(c) for c in post_id]))
+
+def test_cursor_round_trip():
+    moment = datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc)
+    token = encode_cursor("posts:recent", v=moment, id="p1")
+    assert "=" not in token
+    assert decode_cursor(token, "posts:recent") == {"v": moment, "id": "p1"}
+    assert decode_cursor(encode_cursor("posts:trending", v=2.5, id="p2"), "posts:trending") == {"v": 2.5, "id": "p2"}
+
+def test_cursor_of_another_list_is_rejected():
+    token = encode_cursor("posts:recent", v=1.0, id="p1")
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token, "posts:trending")
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("token", ["not-base64!", "e30", encode_cursor("posts:trending")[:-2] + "@@"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token, "posts:trending")
+    assert error.value.status_code == 400
+
+@pytest.fixture
+async def session(tmp_path):
+    path = tmp_path / "trending.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Platform(id=1, name="TikTok"))
+        db.add_all(Post(id=post_id, platform_id=1, score_trend=score) for post_id, score in SCORES.items())
+        db.add(Post(id="cold", platform_id=1, score_trend=0))
+        db.commit()
+    engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with AsyncSession(async_engine) as db:
+        yield db
+    await async_engine.dispose()
+
+@pytest.fixture
+async def leaderboard(fake_redis):
+    await trending_leaderboards.update_many(
+        {"id": post_id, "score_trend": score, "platform_name": "TikTok"} for post_id, score in SCORES.items()
+    )
+    await fake_redis.set(READY_KEY, "1")
+    await fake_redis.set(MAINTAINED_KEY, "1")
+    return fake_redis
+
+async def page(db, cursor, limit=4):
+    columns = post_columns()
+    stmt = select(*columns).where(Post.score_trend > 0)
+    rows, next_cursor = await _trending_page(db, leaderboard_key(), columns, stmt, limit, cursor)
+    return [row.id for row in rows], next_cursor
+
+async def walk(db, before_page=None):
+    """Parcourt toutes les pages ; before_page(n) peut changer de source entre deux pages"""
+    seen, cursor, number = [], None, 0
+    while True:
+        if before_page:
+            await before_page(number)
+        ids, cursor = await page(db, cursor)
+        seen.extend(ids)
+        number += 1
+        if not cursor:
+            return seen
+
+async def test_redis_pages_follow_keyset_order(session, leaderboard):
+    assert await walk(session) == EXPECTED
+
+async def test_database_pages_follow_the_same_order(session, fake_redis):
+    assert await walk(session) == EXPECTED
+
+async def test_cursor_moves_between_redis_and_database(session, leaderboard):
+    async def alternate(number):
+        # Pages paires depuis Redis, impaires depuis la base (classement "pas prêt")
+        if number % 2:
+            await leaderboard.delete(READY_KEY)
+        else:
+            await leaderboard.set(READY_KEY, "1")
+
+    assert await walk(session, alternate) == EXPECTED